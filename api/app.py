@@ -0,0 +1,295 @@
+"""
+API HTTP (JSON) sobre os serviços de reservas
+
+Aplicação WSGI sem dependências externas: cada pedido é encaminhado
+diretamente para os serviços, sem passar pelo ciclo de renderização do
+Streamlit. Pode ser servida por python -m api.server ou por qualquer
+servidor WSGI, e testada em processo com api.testing.TestClient.
+"""
+
+import hashlib
+import hmac
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qs
+from services import cliente_service, restaurante_service, ambiente_service, mesa_service, reserva_service
+from services.admission import admission_controller, AdmissaoRecusada
+from utils.validators import ValidationError
+from utils.performance import perf_monitor
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+HTTP_STATUS = {
+    200: "200 OK",
+    201: "201 Created",
+    400: "400 Bad Request",
+    401: "401 Unauthorized",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+    422: "422 Unprocessable Entity",
+    429: "429 Too Many Requests",
+    500: "500 Internal Server Error",
+}
+
+# Tamanho máximo aceite para o corpo de um pedido
+MAX_BODY_BYTES = 64 * 1024
+
+
+class ApiError(Exception):
+    """Erro a devolver ao cliente da API com o código HTTP indicado"""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+@dataclass
+class Pedido:
+    """Pedido HTTP já interpretado"""
+    metodo: str
+    caminho: str
+    query: Dict[str, str] = field(default_factory=dict)
+    corpo: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
+    endereco: str = ""  # REMOTE_ADDR
+
+    def json(self) -> Dict[str, Any]:
+        """Corpo do pedido como objeto JSON"""
+        try:
+            dados = json.loads(self.corpo or b"{}")
+        except ValueError:
+            raise ApiError(400, "Corpo do pedido não é JSON válido")
+        if not isinstance(dados, dict):
+            raise ApiError(400, "O corpo do pedido deve ser um objeto JSON")
+        return dados
+
+
+def _json_default(valor: Any):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def _inteiro(valor: Any, nome: str) -> int:
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{nome}' deve ser um número inteiro")
+
+
+def _data_hora(valor: Any, nome: str) -> datetime:
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise ApiError(400, f"'{nome}' deve estar no formato ISO 8601 (ex: 2025-06-01T20:00)")
+
+
+def _chave_idempotencia(pedido: Pedido) -> Optional[str]:
+    """Cabeçalho Idempotency-Key (repetições do pedido devolvem o resultado original)"""
+    chave = pedido.headers.get("idempotency-key", "").strip()
+    if len(chave) > 64:
+        raise ApiError(400, "Idempotency-Key não pode ter mais de 64 caracteres")
+    return chave or None
+
+
+def _cliente_api(pedido: Pedido) -> str:
+    """Chave do controlo de admissão de um pedido à API (resumo da chave de API ou endereço)"""
+    chave = pedido.headers.get("x-api-key")
+    if chave:
+        # A chave de API não fica nos logs do controlo de admissão
+        return "api:" + hashlib.sha256(chave.encode()).hexdigest()[:16]
+    return "ip:" + pedido.endereco
+
+
+def _obrigatorio(dados: Dict[str, Any], nome: str) -> Any:
+    if dados.get(nome) in (None, ""):
+        raise ApiError(400, f"Campo obrigatório em falta: '{nome}'")
+    return dados[nome]
+
+
+class ApiApp:
+    """Aplicação WSGI da API de reservas"""
+
+    def __init__(self, api_key: str = Config.API_KEY):
+        self.api_key = api_key
+        self._rotas: List[Tuple[str, Pattern, str, Callable[[Pedido], Tuple[int, Any]]]] = []
+
+        self.rota("GET", "/health", "health", self.health)
+        self.rota("GET", "/restaurantes", "restaurantes", self.listar_restaurantes)
+        self.rota("POST", "/clientes", "clientes.criar", self.criar_cliente)
+        self.rota("GET", "/clientes", "clientes.por_email", self.cliente_por_email)
+        self.rota("GET", "/clientes/{id}", "clientes.obter", self.obter_cliente)
+        self.rota("GET", "/ambientes/{id}/mesas-disponiveis", "mesas.disponiveis", self.mesas_disponiveis)
+        self.rota("POST", "/reservas", "reservas.criar", self.criar_reserva)
+        self.rota("GET", "/reservas/{id}", "reservas.obter", self.obter_reserva)
+        self.rota("DELETE", "/reservas/{id}", "reservas.cancelar", self.cancelar_reserva)
+
+    def rota(self, metodo: str, padrao: str, nome: str, handler: Callable[[Pedido], Tuple[int, Any]]):
+        """Regista uma rota; segmentos {nome} ficam disponíveis em Pedido.params"""
+        regex = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", padrao) + "/?$")
+        self._rotas.append((metodo, regex, nome, handler))
+
+    def __call__(self, environ, start_response):
+        try:
+            tamanho = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            tamanho = 0
+
+        if tamanho > MAX_BODY_BYTES:
+            status, resposta = 400, {"erro": "Corpo do pedido demasiado grande"}
+        else:
+            pedido = Pedido(
+                metodo=environ.get("REQUEST_METHOD", "GET").upper(),
+                caminho=environ.get("PATH_INFO") or "/",
+                query={k: v[0] for k, v in parse_qs(environ.get("QUERY_STRING", "")).items()},
+                corpo=environ["wsgi.input"].read(tamanho) if tamanho else b"",
+                headers={
+                    k[5:].replace("_", "-").lower(): v
+                    for k, v in environ.items() if k.startswith("HTTP_")
+                },
+                endereco=environ.get("REMOTE_ADDR", "")
+            )
+            status, resposta = self.despachar(pedido)
+
+        corpo = json.dumps(resposta, default=_json_default, ensure_ascii=False).encode("utf-8")
+        start_response(HTTP_STATUS.get(status, f"{status} Erro"), [
+            ("Content-Type", "application/json; charset=utf-8"),
+            ("Content-Length", str(len(corpo))),
+        ])
+        return [corpo]
+
+    def despachar(self, pedido: Pedido) -> Tuple[int, Any]:
+        """Encaminha o pedido para a rota e converte erros em respostas JSON"""
+        metodos_permitidos = False
+        for metodo, regex, nome, handler in self._rotas:
+            match = regex.match(pedido.caminho)
+            if not match:
+                continue
+            if metodo != pedido.metodo:
+                metodos_permitidos = True
+                continue
+
+            pedido.params = match.groupdict()
+            try:
+                if nome != "health":
+                    self._autenticar(pedido)
+                return perf_monitor.measure(f"api.{nome}", handler, pedido)
+            except ApiError as e:
+                return e.status, {"erro": e.mensagem}
+            except AdmissaoRecusada as e:
+                return 429, {"erro": str(e), "retry_after_s": round(e.retry_after_s, 1)}
+            except ValidationError as e:
+                return 422, {"erro": str(e)}
+            except Exception as e:
+                logger.error(f"Error handling {pedido.metodo} {pedido.caminho}: {e}")
+                return 500, {"erro": "Erro interno"}
+
+        if metodos_permitidos:
+            return 405, {"erro": "Método não permitido"}
+        return 404, {"erro": "Recurso não encontrado"}
+
+    def _autenticar(self, pedido: Pedido):
+        if not self.api_key:
+            return
+        chave = pedido.headers.get("x-api-key", "")
+        if not hmac.compare_digest(chave.encode(), self.api_key.encode()):
+            raise ApiError(401, "Chave de API inválida ou em falta")
+
+    # Rotas
+
+    def health(self, pedido: Pedido) -> Tuple[int, Any]:
+        return 200, {"status": "ok"}
+
+    def listar_restaurantes(self, pedido: Pedido) -> Tuple[int, Any]:
+        restaurantes = []
+        for restaurante in restaurante_service.get_all_restaurantes():
+            dados = restaurante.to_dict()
+            dados["ambientes"] = [
+                {"id": a.id, "nome": a.nome}
+                for a in ambiente_service.get_ambientes_by_restaurante(restaurante.id)
+            ]
+            restaurantes.append(dados)
+        return 200, {"restaurantes": restaurantes}
+
+    def criar_cliente(self, pedido: Pedido) -> Tuple[int, Any]:
+        dados = pedido.json()
+        cliente = cliente_service.create_cliente(
+            nome=str(_obrigatorio(dados, "nome")),
+            email=str(_obrigatorio(dados, "email")),
+            telefone=str(_obrigatorio(dados, "telefone"))
+        )
+        if not cliente:
+            raise ApiError(500, "Erro ao criar cliente")
+        return 201, cliente.to_dict()
+
+    def cliente_por_email(self, pedido: Pedido) -> Tuple[int, Any]:
+        email = _obrigatorio(pedido.query, "email")
+        cliente = cliente_service.get_cliente_by_email(email)
+        if not cliente:
+            raise ApiError(404, "Cliente não encontrado")
+        return 200, cliente.to_dict()
+
+    def obter_cliente(self, pedido: Pedido) -> Tuple[int, Any]:
+        cliente = cliente_service.get_cliente_by_id(_inteiro(pedido.params["id"], "id"))
+        if not cliente:
+            raise ApiError(404, "Cliente não encontrado")
+        return 200, cliente.to_dict()
+
+    def mesas_disponiveis(self, pedido: Pedido) -> Tuple[int, Any]:
+        ambiente_id = _inteiro(pedido.params["id"], "id")
+        data_reserva = _data_hora(_obrigatorio(pedido.query, "data_reserva"), "data_reserva")
+        numero_pessoas = _inteiro(_obrigatorio(pedido.query, "numero_pessoas"), "numero_pessoas")
+
+        with admission_controller.admitir('pesquisa', _cliente_api(pedido)):
+            mesas = mesa_service.get_available_tables(ambiente_id, data_reserva, numero_pessoas)
+        return 200, {
+            "ambiente_id": ambiente_id,
+            "data_reserva": data_reserva,
+            "numero_pessoas": numero_pessoas,
+            "mesas": [
+                {"id": m.id, "numero": m.numero, "capacidade": m.capacidade, "combinavel": m.combinavel}
+                for m in mesas
+            ]
+        }
+
+    def criar_reserva(self, pedido: Pedido) -> Tuple[int, Any]:
+        dados = pedido.json()
+        duracao = dados.get("duracao_minutos")
+        reserva = reserva_service.create_reserva(
+            cliente_id=_inteiro(_obrigatorio(dados, "cliente_id"), "cliente_id"),
+            mesa_id=_inteiro(_obrigatorio(dados, "mesa_id"), "mesa_id"),
+            data_reserva=_data_hora(_obrigatorio(dados, "data_reserva"), "data_reserva"),
+            numero_pessoas=_inteiro(_obrigatorio(dados, "numero_pessoas"), "numero_pessoas"),
+            observacoes=dados.get("observacoes"),
+            duracao_minutos=_inteiro(duracao, "duracao_minutos") if duracao is not None else None,
+            chave_idempotencia=_chave_idempotencia(pedido)
+        )
+        if not reserva:
+            raise ApiError(500, "Erro ao criar reserva")
+        return 201, reserva.to_dict()
+
+    def obter_reserva(self, pedido: Pedido) -> Tuple[int, Any]:
+        reserva = reserva_service.get_reserva_by_id(_inteiro(pedido.params["id"], "id"))
+        if not reserva:
+            raise ApiError(404, "Reserva não encontrada")
+        return 200, reserva.to_dict()
+
+    def cancelar_reserva(self, pedido: Pedido) -> Tuple[int, Any]:
+        reserva_id = _inteiro(pedido.params["id"], "id")
+        if not reserva_service.get_reserva_by_id(reserva_id):
+            raise ApiError(404, "Reserva não encontrada")
+        if not reserva_service.cancel_reserva(reserva_id, chave_idempotencia=_chave_idempotencia(pedido)):
+            raise ApiError(500, "Erro ao cancelar reserva")
+        return 200, {"id": reserva_id, "status": "cancelada"}
+
+
+def create_app(api_key: Optional[str] = None) -> ApiApp:
+    """Cria a aplicação WSGI (api_key None usa Config.API_KEY)"""
+    return ApiApp(api_key=Config.API_KEY if api_key is None else api_key)
@@ -0,0 +1,75 @@
+"""
+Servidor HTTP da API de reservas
+
+Uso:
+    python -m api.server [--host HOST] [--port PORTA] [--reuse-port]
+
+Com --reuse-port vários processos podem escutar a mesma porta (SO_REUSEPORT,
+Linux/BSD) e o sistema operativo distribui as ligações entre eles; ver
+python manage.py servir.
+"""
+
+import argparse
+import logging
+import sys
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from database.connection import db_manager
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Servidor WSGI com uma thread por ligação"""
+    daemon_threads = True
+
+
+class ReusePortWSGIServer(ThreadingWSGIServer):
+    """Servidor que partilha a porta com outros processos (SO_REUSEPORT)"""
+    allow_reuse_port = True
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def criar_servidor(host: str = Config.API_HOST, port: int = Config.API_PORT, app=None,
+                   reuse_port: bool = False) -> WSGIServer:
+    """Cria o servidor (port=0 escolhe uma porta livre, útil em testes de carga)"""
+    if app is None:
+        from api.app import create_app
+        app = create_app()
+    server_class = ReusePortWSGIServer if reuse_port else ThreadingWSGIServer
+    return make_server(host, port, app, server_class=server_class, handler_class=_RequestHandler)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="API HTTP do sistema de reservas")
+    parser.add_argument("--host", default=Config.API_HOST, help="Endereço (padrão: API_HOST)")
+    parser.add_argument("--port", type=int, default=Config.API_PORT, help="Porta (padrão: API_PORT)")
+    parser.add_argument("--reuse-port", action="store_true", help="Partilhar a porta com outros processos da API")
+    args = parser.parse_args(argv)
+
+    if not db_manager.initialize():
+        print("❌ Erro ao inicializar banco de dados!")
+        return 1
+
+    servidor = criar_servidor(args.host, args.port, reuse_port=args.reuse_port)
+    print(f"🌐 API a correr em http://{args.host}:{servidor.server_port} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Cliente de testes da API: chama a aplicação WSGI diretamente, sem sockets
+"""
+
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+
+@dataclass
+class Resposta:
+    """Resposta de um pedido feito pelo TestClient"""
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    corpo: bytes = b""
+
+    @property
+    def json(self) -> Any:
+        return json.loads(self.corpo) if self.corpo else None
+
+
+class TestClient:
+    """
+    Executa pedidos contra uma aplicação WSGI no próprio processo
+
+    Exemplo:
+        client = TestClient(create_app())
+        resposta = client.get("/ambientes/1/mesas-disponiveis?data_reserva=2025-06-01T20:00&numero_pessoas=2")
+    """
+
+    # Não é uma classe de testes do pytest
+    __test__ = False
+
+    def __init__(self, app, headers: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.headers = headers or {}
+
+    def request(self, metodo: str, url: str, json_body: Any = None,
+                headers: Optional[Dict[str, str]] = None) -> Resposta:
+        partes = urlsplit(url)
+        corpo = json.dumps(json_body).encode("utf-8") if json_body is not None else b""
+
+        environ: Dict[str, Any] = {
+            "REQUEST_METHOD": metodo.upper(),
+            "PATH_INFO": partes.path,
+            "QUERY_STRING": partes.query,
+            "CONTENT_LENGTH": str(len(corpo)),
+            "CONTENT_TYPE": "application/json",
+            "wsgi.input": io.BytesIO(corpo),
+        }
+        for nome, valor in {**self.headers, **(headers or {})}.items():
+            environ["HTTP_" + nome.upper().replace("-", "_")] = valor
+        setup_testing_defaults(environ)
+
+        resultado = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            resultado["status"] = int(status.split(" ", 1)[0])
+            resultado["headers"] = dict(response_headers)
+
+        corpo_resposta = b"".join(self.app(environ, start_response))
+        return Resposta(resultado["status"], resultado["headers"], corpo_resposta)
+
+    def get(self, url: str, **kwargs) -> Resposta:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, json_body: Any = None, **kwargs) -> Resposta:
+        return self.request("POST", url, json_body=json_body, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> Resposta:
+        return self.request("DELETE", url, **kwargs)
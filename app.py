@@ -2,6 +2,8 @@ import streamlit as st
 import logging
 from database.connection import db_manager
 from config import Config
+from services.maintenance import maintenance_scheduler
+from services.notifications import notificacao_worker
 
 # Importar páginas
 from pages.client import ClientePage
@@ -19,6 +21,12 @@ def initialize_app():
     """Inicializa configurações da aplicação"""
     logger.info("Aplicação unificada inicializada com sucesso")
     
+    # Tarefas de manutenção em segundo plano (arranca apenas uma vez por processo)
+    if Config.BACKGROUND_JOBS_ENABLED:
+        maintenance_scheduler.start()
+        if Config.NOTIFY_ENABLED:
+            notificacao_worker.start()
+    
     # Configurar página
     st.set_page_config(
         page_title="Sistema de Gestão de Restaurantes",
@@ -0,0 +1,219 @@
+"""
+Teste de carga da API de reservas
+
+Cada iteração consulta as mesas disponíveis, cria uma reserva na primeira
+mesa livre e cancela-a. Mede pedidos por segundo e latências por rota.
+
+Uso:
+    python -m benchmarks.api_load [--threads N] [--iteracoes N] [--url URL] [--in-process]
+                                  [--base-dados-configurada] [--email EMAIL]
+
+Sem --url arranca a API num servidor local (porta livre) sobre uma base de
+dados SQLite temporária com um catálogo sintético (--base-dados-configurada
+usa DATABASE_URL, criando e cancelando reservas reais); --in-process usa o
+TestClient (sem HTTP) para isolar o custo dos serviços.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import quote
+from contextlib import ExitStack
+from urllib.request import Request, urlopen
+from config import Config
+from benchmarks.base_temporaria import base_dados_temporaria, EMAIL_CLIENTE
+
+
+class ClienteHttp:
+    """Cliente HTTP mínimo (urllib) com a mesma interface do TestClient"""
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or {}
+
+    def request(self, metodo: str, url: str, json_body: Any = None) -> Tuple[int, Any]:
+        corpo = json.dumps(json_body).encode("utf-8") if json_body is not None else None
+        pedido = Request(self.base_url + url, data=corpo, method=metodo,
+                         headers={"Content-Type": "application/json", **self.headers})
+        try:
+            with urlopen(pedido, timeout=30) as resposta:
+                return resposta.status, json.loads(resposta.read() or b"null")
+        except HTTPError as e:
+            return e.code, json.loads(e.read() or b"null")
+
+
+class ClienteEmProcesso:
+    """Adapta o TestClient à interface (status, json) usada no teste"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None):
+        from api.app import create_app
+        from api.testing import TestClient
+        self.client = TestClient(create_app(), headers=headers)
+
+    def request(self, metodo: str, url: str, json_body: Any = None) -> Tuple[int, Any]:
+        resposta = self.client.request(metodo, url, json_body=json_body)
+        return resposta.status, resposta.json
+
+
+class Resultados:
+    """Latências e códigos de resposta por rota (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.codigos: Counter = Counter()
+
+    def registar(self, rota: str, status: int, duracao_s: float):
+        with self._lock:
+            self.latencias[rota].append(duracao_s * 1000)
+            self.codigos[status] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(len(v) for v in self.latencias.values())
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _preparar(cliente, email: str) -> Tuple[int, List[int]]:
+    """Obtém (ou cria) o cliente de teste e devolve (cliente_id, ambientes disponíveis)"""
+    status, dados = cliente.request("GET", "/restaurantes")
+    if status != 200:
+        raise RuntimeError(f"GET /restaurantes devolveu {status}: {dados}")
+    ambientes = [a["id"] for r in dados["restaurantes"] for a in r["ambientes"]]
+    if not ambientes:
+        raise RuntimeError("Sem ambientes na base de dados (execute python init_data.py)")
+
+    status, dados = cliente.request("GET", f"/clientes?email={quote(email)}")
+    if status == 200:
+        return dados["id"], ambientes
+
+    status, dados = cliente.request("POST", "/clientes", {
+        "nome": "Teste de Carga", "email": email, "telefone": "912345678"
+    })
+    if status != 201:
+        raise RuntimeError(f"POST /clientes devolveu {status}: {dados}")
+    return dados["id"], ambientes
+
+
+def _iteracao(cliente, resultados: Resultados, cliente_id: int, ambientes: List[int], rng: random.Random):
+    ambiente_id = rng.choice(ambientes)
+    dia = date.today() + timedelta(days=rng.randint(1, 60))
+    horario = rng.choice(Config.TIME_SLOTS)
+    data_reserva = datetime.combine(dia, datetime.strptime(horario, "%H:%M").time()).isoformat()
+
+    t0 = time.perf_counter()
+    status, dados = cliente.request(
+        "GET", f"/ambientes/{ambiente_id}/mesas-disponiveis?data_reserva={data_reserva}&numero_pessoas=2"
+    )
+    resultados.registar("GET mesas-disponiveis", status, time.perf_counter() - t0)
+    if status != 200 or not dados["mesas"]:
+        return
+
+    t0 = time.perf_counter()
+    status, dados = cliente.request("POST", "/reservas", {
+        "cliente_id": cliente_id, "mesa_id": dados["mesas"][0]["id"],
+        "data_reserva": data_reserva, "numero_pessoas": 2
+    })
+    resultados.registar("POST reservas", status, time.perf_counter() - t0)
+    if status != 201:
+        return
+
+    t0 = time.perf_counter()
+    status, _ = cliente.request("DELETE", f"/reservas/{dados['id']}")
+    resultados.registar("DELETE reservas", status, time.perf_counter() - t0)
+
+
+def executar(cliente, threads: int, iteracoes: int, email: str,
+             seed: int = 42) -> Tuple[Resultados, float]:
+    """Executa as iterações em paralelo e devolve (resultados, duração em segundos)"""
+    cliente_id, ambientes = _preparar(cliente, email)
+    resultados = Resultados()
+
+    def trabalhador(indice: int):
+        rng = random.Random(seed + indice)
+        for _ in range(iteracoes // threads + (indice < iteracoes % threads)):
+            _iteracao(cliente, resultados, cliente_id, ambientes, rng)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(trabalhador, range(threads)))
+    return resultados, time.perf_counter() - t0
+
+
+def imprimir(resultados: Resultados, duracao_s: float):
+    print(f"\n{resultados.total} pedidos em {duracao_s:.2f}s → {resultados.total / duracao_s:.1f} pedidos/s")
+    print(f"Códigos: {dict(sorted(resultados.codigos.items()))}\n")
+    print(f"{'Rota':<26}{'N':>7}{'média':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for rota, valores in sorted(resultados.latencias.items()):
+        print(f"{rota:<26}{len(valores):>7}{statistics.mean(valores):>10.1f}"
+              f"{_percentil(valores, 50):>10.1f}{_percentil(valores, 95):>10.1f}{_percentil(valores, 99):>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API de reservas")
+    parser.add_argument("--threads", type=int, default=8, help="Pedidos em paralelo (padrão: 8)")
+    parser.add_argument("--iteracoes", type=int, default=200, help="Ciclos consulta/reserva/cancelamento (padrão: 200)")
+    parser.add_argument("--url", default=None, help="URL de uma API já em execução (ex: http://127.0.0.1:8000)")
+    parser.add_argument("--in-process", action="store_true", help="Usar o TestClient, sem HTTP")
+    parser.add_argument("--base-dados-configurada", action="store_true",
+                        help="Sem --url, usar DATABASE_URL em vez de uma base de dados temporária")
+    parser.add_argument("--email", default=EMAIL_CLIENTE,
+                        help="Cliente usado nas reservas (criado se não existir)")
+    args = parser.parse_args(argv)
+
+    headers = {"X-API-Key": Config.API_KEY} if Config.API_KEY else {}
+
+    with ExitStack() as contexto:
+        if args.url:
+            cliente = ClienteHttp(args.url, headers)
+            base_dados = args.url
+        else:
+            from database.connection import db_manager
+            from services.admission import admission_controller
+            # Todas as reservas são do mesmo cliente: o limite por cliente recusaria quase todas
+            admission_controller.ativo = False
+            if args.base_dados_configurada:
+                if not db_manager.initialize():
+                    print("❌ Erro ao inicializar banco de dados!")
+                    return 1
+                base_dados = Config.DATABASE_URL
+            else:
+                try:
+                    contexto.enter_context(base_dados_temporaria())
+                except RuntimeError as e:
+                    print(f"❌ {e}")
+                    return 1
+                base_dados = "SQLite temporário"
+            if args.in_process:
+                cliente = ClienteEmProcesso(headers)
+            else:
+                from api.server import criar_servidor
+                servidor = criar_servidor("127.0.0.1", 0)
+                threading.Thread(target=servidor.serve_forever, daemon=True).start()
+                contexto.callback(servidor.server_close)
+                contexto.callback(servidor.shutdown)
+                cliente = ClienteHttp(f"http://127.0.0.1:{servidor.server_port}", headers)
+
+        modo = "em processo" if args.in_process else (args.url or "servidor local")
+        print(f"🚀 {args.iteracoes} iterações com {args.threads} thread(s) ({modo}, {base_dados})")
+        resultados, duracao_s = executar(cliente, args.threads, args.iteracoes, args.email)
+
+    imprimir(resultados, duracao_s)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
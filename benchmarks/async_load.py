@@ -0,0 +1,162 @@
+"""
+Comparação entre os serviços síncronos e assíncronos sob concorrência
+
+Para cada nível de concorrência lança N consultas de disponibilidade e N
+reservas em simultâneo (cada reserva numa combinação mesa/dia distinta):
+no modo assíncrono com asyncio.gather, no modo síncrono com N threads.
+As reservas criadas são canceladas no fim de cada ronda (fora da medição).
+
+Por omissão corre numa base de dados SQLite temporária com um catálogo
+sintético; --base-dados-configurada usa DATABASE_URL (cria e cancela
+reservas reais, com os respetivos eventos).
+
+Uso:
+    python -m benchmarks.async_load [--concorrencia 100 500 1000]
+                                    [--base-dados-configurada [--cliente-id ID]]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from config import Config
+from benchmarks.base_temporaria import base_dados_temporaria
+
+
+def _combinacoes(mesas: List[Tuple[int, int]], n: int) -> List[Tuple[int, int, datetime]]:
+    """n combinações (ambiente_id, mesa_id, data_reserva) sem duas reservas na mesma mesa e dia"""
+    combinacoes = []
+    dias = range(1, 90)
+    for indice in range(n):
+        ambiente_id, mesa_id = mesas[indice % len(mesas)]
+        dia = date.today() + timedelta(days=dias[(indice // len(mesas)) % len(dias)])
+        horario = Config.TIME_SLOTS[indice % len(Config.TIME_SLOTS)]
+        combinacoes.append((ambiente_id, mesa_id,
+                            datetime.combine(dia, datetime.strptime(horario, "%H:%M").time())))
+    return combinacoes
+
+
+def _medir_sync(funcao: Callable, argumentos: list) -> Tuple[list, float]:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(argumentos)) as executor:
+        resultados = list(executor.map(lambda a: _sem_erros(funcao, *a), argumentos))
+    return resultados, time.perf_counter() - t0
+
+
+async def _medir_async(funcao: Callable, argumentos: list) -> Tuple[list, float]:
+    async def chamar(a):
+        try:
+            return await funcao(*a)
+        except Exception:
+            return None
+
+    t0 = time.perf_counter()
+    resultados = await asyncio.gather(*(chamar(a) for a in argumentos))
+    return resultados, time.perf_counter() - t0
+
+
+def _sem_erros(funcao: Callable, *args):
+    try:
+        return funcao(*args)
+    except Exception:
+        return None
+
+
+def executar(concorrencias: List[int], cliente_id: Optional[int] = None) -> List[Tuple[str, int, str, int, float]]:
+    """Devolve linhas (modo, concorrência, operação, sucessos, duração em segundos)"""
+    from database.connection import db_manager
+    from database.repositories import cliente_repo, mesa_repo
+    from database.async_connection import async_db_manager
+    from services import mesa_service, reserva_service
+    from services.async_services import async_mesa_service, async_reserva_service
+    from services.admission import admission_controller
+
+    # Todas as reservas são do mesmo cliente: o limite por cliente recusaria quase todas
+    admission_controller.ativo = False
+
+    if not db_manager.initialize():
+        raise RuntimeError("Erro ao inicializar banco de dados")
+
+    mesas = [(m.ambiente_id, m.id) for m in mesa_repo.get_all()]
+    if not mesas:
+        raise RuntimeError("Sem mesas na base de dados (execute python init_data.py)")
+    if cliente_id is None:
+        clientes = cliente_repo.get_all()
+        if not clientes:
+            raise RuntimeError("Sem clientes na base de dados")
+        cliente_id = clientes[0].id
+
+    linhas = []
+
+    async def ronda_async(combinacoes):
+        if not await async_db_manager.initialize():
+            raise RuntimeError("Suporte assíncrono indisponível (instale aiosqlite e greenlet)")
+        _, duracao = await _medir_async(
+            async_mesa_service.get_available_tables, [(a, d, 2) for a, _, d in combinacoes]
+        )
+        linhas.append(("async", len(combinacoes), "disponibilidade", len(combinacoes), duracao))
+        criadas, duracao = await _medir_async(
+            async_reserva_service.create_reserva, [(cliente_id, m, d, 1) for _, m, d in combinacoes]
+        )
+        linhas.append(("async", len(combinacoes), "reserva", sum(1 for r in criadas if r), duracao))
+        for reserva in criadas:
+            if reserva:
+                await async_reserva_service.cancel_reserva(reserva.id)
+        # O engine fica associado ao event loop da ronda
+        await async_db_manager.dispose()
+
+    for n in concorrencias:
+        combinacoes = _combinacoes(mesas, n)
+
+        asyncio.run(ronda_async(combinacoes))
+
+        _, duracao = _medir_sync(mesa_service.get_available_tables, [(a, d, 2) for a, _, d in combinacoes])
+        linhas.append(("sync", n, "disponibilidade", n, duracao))
+        criadas, duracao = _medir_sync(
+            reserva_service.create_reserva, [(cliente_id, m, d, 1) for _, m, d in combinacoes]
+        )
+        linhas.append(("sync", n, "reserva", sum(1 for r in criadas if r), duracao))
+        for reserva in criadas:
+            if reserva:
+                reserva_service.cancel_reserva(reserva.id)
+
+    return linhas
+
+
+def imprimir(linhas: List[Tuple[str, int, str, int, float]]):
+    print(f"\n{'Modo':<8}{'N':>7}  {'Operação':<18}{'OK':>7}{'tempo (s)':>12}{'ops/s':>10}")
+    for modo, n, operacao, sucessos, duracao in linhas:
+        print(f"{modo:<8}{n:>7}  {operacao:<18}{sucessos:>7}{duracao:>12.2f}{n / duracao:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serviços síncronos vs assíncronos sob concorrência")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[100, 500, 1000],
+                        help="Pedidos simultâneos por ronda (padrão: 100 500 1000)")
+    parser.add_argument("--base-dados-configurada", action="store_true",
+                        help="Usar DATABASE_URL em vez de uma base de dados temporária")
+    parser.add_argument("--cliente-id", type=int, default=None,
+                        help="Cliente usado nas reservas (padrão: o primeiro cliente ativo)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.base_dados_configurada:
+            print(f"🚀 Concorrência: {', '.join(map(str, args.concorrencia))} ({Config.DATABASE_URL})")
+            linhas = executar(args.concorrencia, args.cliente_id)
+        else:
+            with base_dados_temporaria():
+                print(f"🚀 Concorrência: {', '.join(map(str, args.concorrencia))} (SQLite temporário)")
+                linhas = executar(args.concorrencia)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    imprimir(linhas)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Base de dados SQLite temporária com um catálogo sintético
+
+Usada pelos benchmarks que criam e cancelam reservas, para não deixarem
+linhas na base de dados configurada nem gerarem eventos (e notificações)
+para clientes reais.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+from config import Config
+
+EMAIL_CLIENTE = "teste.carga@example.com"
+
+
+def _semear(ambientes: int, mesas_por_ambiente: int):
+    from database.connection import db_manager
+    from models import Restaurante, Ambiente, Mesa, Cliente
+
+    session = db_manager.get_session()
+    try:
+        restaurante = Restaurante("Restaurante de Teste", "Rua dos Testes, 1 - Lisboa", "213456789")
+        session.add(restaurante)
+        session.flush()
+        for a in range(ambientes):
+            ambiente = Ambiente(f"Sala {a + 1}", restaurante.id)
+            session.add(ambiente)
+            session.flush()
+            session.add_all(Mesa(str(m + 1), 4, ambiente.id) for m in range(mesas_por_ambiente))
+        # Sem passar pelo serviço: a validação do email consultaria o DNS
+        session.add(Cliente("Teste de Carga", EMAIL_CLIENTE, "912345678"))
+        session.commit()
+    finally:
+        db_manager.close_session(session)
+
+
+@contextmanager
+def base_dados_temporaria(ambientes: int = 4, mesas_por_ambiente: int = 10) -> Iterator[str]:
+    """
+    Aponta Config.DATABASE_URL (e o db_manager) para uma base de dados nova
+    durante o bloco; devolve o URL. A base de dados configurada não é usada.
+    """
+    from database.connection import db_manager
+
+    url_original = Config.DATABASE_URL
+    with tempfile.TemporaryDirectory() as diretorio:
+        Config.DATABASE_URL = f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}"
+        db_manager.engine = db_manager.session_factory = db_manager.Session = None
+        try:
+            if not db_manager.initialize():
+                raise RuntimeError("Erro ao inicializar a base de dados temporária")
+            _semear(ambientes, mesas_por_ambiente)
+            yield Config.DATABASE_URL
+        finally:
+            if db_manager.Session is not None:
+                db_manager.Session.remove()
+            if db_manager.engine is not None:
+                db_manager.engine.dispose()
+            db_manager.engine = db_manager.session_factory = db_manager.Session = None
+            Config.DATABASE_URL = url_original
@@ -0,0 +1,83 @@
+"""
+Escalabilidade da API com vários processos sobre o mesmo SQLite (WAL)
+
+Para cada número de processos arranca a API com utils.cluster (todos na
+mesma porta), executa o teste de carga de benchmarks.api_load e compara os
+pedidos por segundo com os de um só processo.
+
+Uso:
+    python -m benchmarks.multiprocess [--workers 1 2 4] [--threads N] [--iteracoes N] [--email EMAIL]
+"""
+
+import argparse
+import os
+import socket
+import sys
+from typing import List, Tuple
+from sqlalchemy import text
+from config import Config
+from benchmarks.api_load import ClienteHttp, executar
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def medir(contagens: List[int], threads: int, iteracoes: int, email: str) -> List[Tuple[int, int, float]]:
+    """Devolve linhas (processos, pedidos, pedidos/s)"""
+    from utils.cluster import iniciar_workers, parar_workers, aguardar_api
+
+    headers = {"X-API-Key": Config.API_KEY} if Config.API_KEY else {}
+    linhas = []
+    for workers in contagens:
+        porta = _porta_livre()
+        processos = iniciar_workers("api", workers, "127.0.0.1", porta)
+        try:
+            url = f"http://127.0.0.1:{porta}"
+            if not aguardar_api(url):
+                raise RuntimeError(f"A API com {workers} processo(s) não arrancou")
+            resultados, duracao_s = executar(ClienteHttp(url, headers), threads, iteracoes, email)
+            linhas.append((workers, resultados.total, resultados.total / duracao_s))
+        finally:
+            parar_workers(processos)
+    return linhas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Escalabilidade da API com vários processos")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="Números de processos a comparar (padrão: 1 2 4)")
+    parser.add_argument("--threads", type=int, default=16, help="Pedidos em paralelo (padrão: 16)")
+    parser.add_argument("--iteracoes", type=int, default=300, help="Ciclos consulta/reserva/cancelamento (padrão: 300)")
+    parser.add_argument("--email", default="teste.carga@gmail.com",
+                        help="Cliente usado nas reservas (criado se não existir)")
+    args = parser.parse_args(argv)
+
+    # Todas as reservas são do mesmo cliente: desativar o controlo de admissão nos processos da API
+    os.environ['ADMISSION_ENABLED'] = 'False'
+
+    from database.connection import db_manager
+    if not db_manager.initialize():
+        print("❌ Erro ao inicializar banco de dados!")
+        return 1
+    with db_manager.get_engine().connect() as conn:
+        modo = conn.execute(text("PRAGMA journal_mode")).scalar() if conn.dialect.name == 'sqlite' else '-'
+
+    print(f"🚀 {args.iteracoes} iterações, {args.threads} threads, journal_mode={modo}, {os.cpu_count()} CPU(s)")
+    try:
+        linhas = medir(args.workers, args.threads, args.iteracoes, args.email)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    base = linhas[0][2]
+    print(f"\n{'Processos':>10}{'pedidos':>10}{'pedidos/s':>12}{'ganho':>8}")
+    for workers, total, por_segundo in linhas:
+        print(f"{workers:>10}{total:>10}{por_segundo:>12.1f}{por_segundo / base:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Débito do envio de notificações
+
+Enfileira N notificações sintéticas e entrega-as com services.notifications
+através de um transporte simulado, que grava as mensagens em ficheiro e
+acrescenta uma latência por ligação e por mensagem (como um servidor SMTP
+remoto). Compara níveis de concorrência com a ligação reutilizada no lote
+e com uma ligação por mensagem. As notificações pendentes reais também
+seriam entregues pelo transporte simulado: usar uma cópia da base de dados.
+
+Uso:
+    python -m benchmarks.notifications [--mensagens N] [--concorrencia 1 4 8]
+                                       [--ligacao-ms MS] [--latencia-ms MS]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import delete
+from config import Config
+
+# Tipo das notificações sintéticas (removidas no fim de cada ronda)
+TIPO_BENCHMARK = 'benchmark'
+
+
+def _transporte_simulado(diretorio: str, ligacao_s: float, latencia_s: float, por_mensagem: bool):
+    from services.notifications import TransporteFicheiro
+
+    class TransporteSimulado(TransporteFicheiro):
+        def abrir(self):
+            super().abrir()
+            if not por_mensagem:
+                time.sleep(ligacao_s)
+
+        def enviar(self, mensagem):
+            time.sleep(latencia_s + (ligacao_s if por_mensagem else 0))
+            super().enviar(mensagem)
+
+    return lambda: TransporteSimulado(diretorio)
+
+
+def _enfileirar(n: int):
+    from database.connection import db_manager
+    from models import Notificacao
+
+    session = db_manager.get_session()
+    try:
+        agora = datetime.now()
+        session.add_all([
+            Notificacao(reserva_id=0, tipo=TIPO_BENCHMARK, destinatario=f"cliente{i}@exemplo.pt",
+                        assunto="Teste", corpo="Mensagem de teste", enviar_apos=agora)
+            for i in range(n)
+        ])
+        session.commit()
+    finally:
+        db_manager.close_session(session)
+
+
+def _limpar():
+    from database.connection import db_manager
+    from models import Notificacao
+
+    session = db_manager.get_session()
+    try:
+        session.execute(delete(Notificacao).where(Notificacao.tipo == TIPO_BENCHMARK))
+        session.commit()
+    finally:
+        db_manager.close_session(session)
+
+
+def executar(mensagens: int, concorrencias: List[int], ligacao_ms: float,
+             latencia_ms: float) -> List[Tuple[str, int, int, int, float]]:
+    """Devolve linhas (modo, concorrência, enviadas, ligações, duração em segundos)"""
+    from database.connection import db_manager
+    from services.notifications import NotificacaoService, TRANSPORTES
+
+    if not db_manager.initialize():
+        raise RuntimeError("Erro ao inicializar banco de dados")
+
+    linhas = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for modo, por_mensagem in (("reutiliza", False), ("por mensagem", True)):
+            TRANSPORTES['simulado'] = _transporte_simulado(
+                diretorio, ligacao_ms / 1000, latencia_ms / 1000, por_mensagem
+            )
+            for concorrencia in concorrencias:
+                _limpar()
+                _enfileirar(mensagens)
+                servico = NotificacaoService(transporte='simulado', concorrencia=concorrencia)
+                t0 = time.perf_counter()
+                while servico.entregar().enviadas:
+                    pass
+                duracao = time.perf_counter() - t0
+                metricas = servico.get_metricas()
+                ligacoes = metricas.enviadas if por_mensagem else metricas.ligacoes
+                linhas.append((modo, concorrencia, metricas.enviadas, ligacoes, duracao))
+        _limpar()
+    return linhas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Débito do envio de notificações")
+    parser.add_argument("--mensagens", type=int, default=500, help="Notificações por ronda (padrão: 500)")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 8],
+                        help="Ligações em paralelo (padrão: 1 4 8)")
+    parser.add_argument("--ligacao-ms", type=float, default=50, help="Custo de abrir uma ligação (padrão: 50)")
+    parser.add_argument("--latencia-ms", type=float, default=5, help="Latência por mensagem (padrão: 5)")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 {args.mensagens} mensagens, ligação {args.ligacao_ms:g} ms, "
+          f"mensagem {args.latencia_ms:g} ms ({Config.DATABASE_URL})")
+    try:
+        linhas = executar(args.mensagens, args.concorrencia, args.ligacao_ms, args.latencia_ms)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"\n{'Ligação':<14}{'paralelo':>9}{'enviadas':>10}{'ligações':>10}{'tempo (s)':>11}{'msg/s':>9}")
+    for modo, concorrencia, enviadas, ligacoes, duracao in linhas:
+        print(f"{modo:<14}{concorrencia:>9}{enviadas:>10}{ligacoes:>10}{duracao:>11.2f}{enviadas / duracao:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Hidratação de reservas: entidades ORM vs linhas de leitura
+
+Cria uma base de dados SQLite temporária com N reservas sintéticas e lê-as
+todas de duas formas: session.query(Reserva).all() (entidades ORM, como os
+métodos get_by_*) e database.read_models (ReservaRow a partir de um select()
+só com as colunas da linha, como os métodos get_rows_*). Mede o tempo de
+leitura (melhor de várias repetições) e, numa execução à parte com
+tracemalloc, o pico de memória e a memória retida pela lista depois de
+fechada a sessão. A base de dados configurada não é usada.
+
+Uso:
+    python -m benchmarks.read_models [--linhas N] [--repeticoes R]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+
+def _preparar(url: str, linhas: int):
+    from models import Base, Reserva
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    inicio = datetime(2025, 1, 1, 12, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(Reserva), [
+            {
+                'cliente_id': 1 + i % 500,
+                'mesa_id': 1 + i % 40,
+                'data_reserva': inicio + timedelta(hours=i),
+                'data_fim': inicio + timedelta(hours=i, minutes=90),
+                'numero_pessoas': 2 + i % 6,
+                'status': 'confirmada' if i % 5 else 'cancelada',
+                'observacoes': 'Aniversário' if i % 10 == 0 else None,
+                'data_criacao': inicio,
+                'data_atualizacao': inicio,
+            }
+            for i in range(linhas)
+        ])
+    return engine
+
+
+def _modos(fabrica) -> List[Tuple[str, Callable[[], list]]]:
+    from models import Reserva
+    from database.read_models import ReservaRow, select_row, fetch_rows
+
+    def orm():
+        session = fabrica()
+        try:
+            return session.query(Reserva).all()
+        finally:
+            session.close()
+
+    def linhas():
+        session = fabrica()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, Reserva))
+        finally:
+            session.close()
+
+    return [("ORM (Reserva)", orm), ("ReservaRow", linhas)]
+
+
+def executar(linhas: int, repeticoes: int) -> List[Tuple[str, int, float, float, float]]:
+    """Devolve linhas (modo, lidas, tempo em segundos, pico em MB, retida em MB)"""
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = _preparar(f"sqlite:///{os.path.join(diretorio, 'leitura.db')}", linhas)
+        fabrica = sessionmaker(bind=engine)
+        try:
+            for modo, carregar in _modos(fabrica):
+                melhor = float('inf')
+                for _ in range(repeticoes):
+                    gc.collect()
+                    t0 = time.perf_counter()
+                    lidas = len(carregar())
+                    melhor = min(melhor, time.perf_counter() - t0)
+
+                gc.collect()
+                tracemalloc.start()
+                resultado = carregar()
+                retida, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del resultado
+                resultados.append((modo, lidas, melhor, pico / 2**20, retida / 2**20))
+        finally:
+            engine.dispose()
+    return resultados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hidratação de reservas: entidades ORM vs linhas de leitura")
+    parser.add_argument("--linhas", type=int, default=100_000, help="Reservas sintéticas (padrão: 100000)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Leituras por modo (padrão: 3)")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 {args.linhas} reservas, {args.repeticoes} repetições (SQLite temporário)")
+    resultados = executar(args.linhas, args.repeticoes)
+
+    print(f"\n{'Modo':<16}{'lidas':>9}{'tempo (s)':>11}{'linhas/s':>12}{'pico (MB)':>11}{'retida (MB)':>13}")
+    for modo, lidas, duracao, pico, retida in resultados:
+        print(f"{modo:<16}{lidas:>9}{duracao:>11.3f}{lidas / duracao:>12.0f}{pico:>11.1f}{retida:>13.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
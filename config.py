@@ -25,4 +25,100 @@ class Config:
     TIME_SLOTS = [
         "12:00", "12:30", "13:00", "13:30", "14:00", "14:30",
         "19:00", "19:30", "20:00", "20:30", "21:00", "21:30", "22:00"
-    ]
\ No newline at end of file
+    ]
+    
+    # Duração das reservas (minutos), usada quando o restaurante não define a sua
+    RESERVATION_DURATION_MINUTES = int(os.getenv('RESERVATION_DURATION_MINUTES', '90'))
+    MAX_RESERVATION_DURATION_MINUTES = int(os.getenv('MAX_RESERVATION_DURATION_MINUTES', '360'))
+    
+    # Número máximo de mesas combinadas numa só reserva (grupos grandes)
+    MAX_TABLES_COMBINED = int(os.getenv('MAX_TABLES_COMBINED', '3'))
+    
+    # Bloqueio temporário das mesas durante a confirmação da reserva
+    # HOLD_BACKEND: 'memory' (um só processo) ou 'database' (vários processos)
+    HOLD_TTL_SECONDS = int(os.getenv('HOLD_TTL_SECONDS', '300'))
+    HOLD_BACKEND = os.getenv('HOLD_BACKEND', 'memory').lower()
+    
+    # Validade das chaves de idempotência (reservas e cancelamentos repetidos)
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+    
+    # Outbox de eventos de domínio (reservas e mesas), lido em lotes pelos consumidores;
+    # eventos já lidos por todos os consumidores são removidos após OUTBOX_RETENTION_DAYS
+    OUTBOX_ENABLED = os.getenv('OUTBOX_ENABLED', 'True').lower() == 'true'
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '500'))
+    OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+    
+    # Notificações aos clientes, enviadas em lotes por um worker em segundo plano
+    # NOTIFY_TRANSPORT: 'ficheiro' (mensagens .eml em NOTIFY_FILE_DIR) ou 'smtp'
+    NOTIFY_ENABLED = os.getenv('NOTIFY_ENABLED', 'True').lower() == 'true'
+    NOTIFY_TRANSPORT = os.getenv('NOTIFY_TRANSPORT', 'ficheiro').lower()
+    NOTIFY_FILE_DIR = os.getenv('NOTIFY_FILE_DIR', 'notificacoes_enviadas')
+    NOTIFY_FROM = os.getenv('NOTIFY_FROM', 'reservas@restaurante.local')
+    NOTIFY_INTERVAL_SECONDS = float(os.getenv('NOTIFY_INTERVAL_SECONDS', '10'))
+    NOTIFY_BATCH_SIZE = int(os.getenv('NOTIFY_BATCH_SIZE', '100'))
+    NOTIFY_CONCURRENCY = int(os.getenv('NOTIFY_CONCURRENCY', '4'))
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+    NOTIFY_RETRY_BASE_SECONDS = float(os.getenv('NOTIFY_RETRY_BASE_SECONDS', '30'))
+    NOTIFY_LEASE_SECONDS = float(os.getenv('NOTIFY_LEASE_SECONDS', '300'))
+    NOTIFY_REMINDER_HOURS = int(os.getenv('NOTIFY_REMINDER_HOURS', '24'))
+    SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', '1025'))
+    SMTP_USER = os.getenv('SMTP_USER', '')
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
+    SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', 'False').lower() == 'true'
+    
+    # SQLite partilhado por vários processos: WAL permite leituras em paralelo com uma escrita
+    SQLITE_WAL = os.getenv('SQLITE_WAL', 'True').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    
+    # Cache do catálogo (restaurantes, ambientes, mesas); a versão na base de dados
+    # é consultada no máximo uma vez por CACHE_CHECK_INTERVAL_SECONDS
+    CATALOG_CACHE_ENABLED = os.getenv('CATALOG_CACHE_ENABLED', 'True').lower() == 'true'
+    CACHE_CHECK_INTERVAL_SECONDS = float(os.getenv('CACHE_CHECK_INTERVAL_SECONDS', '1'))
+    
+    # Controlo de admissão: limite global de pedidos em curso (por processo) e
+    # limites por cliente (rajada e pedidos por minuto) para reservas, pesquisas e login
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', '8'))
+    ADMISSION_MAX_TRACKED_CLIENTS = int(os.getenv('ADMISSION_MAX_TRACKED_CLIENTS', '10000'))
+    RATE_LIMIT_BOOKING_BURST = int(os.getenv('RATE_LIMIT_BOOKING_BURST', '5'))
+    RATE_LIMIT_BOOKING_PER_MINUTE = float(os.getenv('RATE_LIMIT_BOOKING_PER_MINUTE', '10'))
+    RATE_LIMIT_SEARCH_BURST = int(os.getenv('RATE_LIMIT_SEARCH_BURST', '10'))
+    RATE_LIMIT_SEARCH_PER_MINUTE = float(os.getenv('RATE_LIMIT_SEARCH_PER_MINUTE', '30'))
+    RATE_LIMIT_LOGIN_BURST = int(os.getenv('RATE_LIMIT_LOGIN_BURST', '5'))
+    RATE_LIMIT_LOGIN_PER_MINUTE = float(os.getenv('RATE_LIMIT_LOGIN_PER_MINUTE', '10'))
+    
+    # Monitorização de desempenho
+    PERF_MONITOR_ENABLED = os.getenv('PERF_MONITOR_ENABLED', 'True').lower() == 'true'
+    PERF_BUFFER_SIZE = int(os.getenv('PERF_BUFFER_SIZE', '2000'))
+    # Aviso no log quando o session_state de uma sessão ultrapassa este tamanho (0 desativa)
+    SESSION_STATE_WARN_KB = float(os.getenv('SESSION_STATE_WARN_KB', '64'))
+    
+    # Carregamento paralelo das secções do dashboard (threads e limite por secção)
+    DASHBOARD_WORKERS = int(os.getenv('DASHBOARD_WORKERS', '4'))
+    DASHBOARD_TASK_TIMEOUT_SECONDS = float(os.getenv('DASHBOARD_TASK_TIMEOUT_SECONDS', '5'))
+    
+    # Arquivo de reservas antigas (canceladas/finalizadas)
+    ARCHIVE_HORIZON_DAYS = int(os.getenv('ARCHIVE_HORIZON_DAYS', '365'))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    
+    # Finalização automática de reservas passadas
+    BACKGROUND_JOBS_ENABLED = os.getenv('BACKGROUND_JOBS_ENABLED', 'True').lower() == 'true'
+    FINALIZE_INTERVAL_SECONDS = int(os.getenv('FINALIZE_INTERVAL_SECONDS', '300'))
+    FINALIZE_AFTER_MINUTES = int(os.getenv('FINALIZE_AFTER_MINUTES', '120'))
+    FINALIZE_BATCH_SIZE = int(os.getenv('FINALIZE_BATCH_SIZE', '1000'))
+    
+    # Snapshot analítico em Parquet (relatórios fora da base de dados transacional)
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'analytics_snapshot')
+    SNAPSHOT_BATCH_SIZE = int(os.getenv('SNAPSHOT_BATCH_SIZE', '10000'))
+    SNAPSHOT_ENABLED = os.getenv('SNAPSHOT_ENABLED', 'False').lower() == 'true'
+    
+    # Acesso assíncrono à base de dados (sqlalchemy.ext.asyncio; requer aiosqlite para SQLite)
+    ASYNC_POOL_SIZE = int(os.getenv('ASYNC_POOL_SIZE', '10'))
+    ASYNC_MAX_OVERFLOW = int(os.getenv('ASYNC_MAX_OVERFLOW', '10'))
+    
+    # API HTTP (JSON) para integrações, executada com: python -m api.server
+    # API_KEY vazio desativa a autenticação (cabeçalho X-API-Key)
+    API_HOST = os.getenv('API_HOST', '127.0.0.1')
+    API_PORT = int(os.getenv('API_PORT', '8000'))
+    API_KEY = os.getenv('API_KEY', '')
@@ -0,0 +1,101 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy.engine import make_url
+from database.connection import db_manager, configurar_sqlite
+from config import Config
+from utils.performance import perf_monitor
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import greenlet  # noqa: F401 - necessário para o sqlalchemy.ext.asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    ASYNC_AVAILABLE = True
+except ImportError:
+    ASYNC_AVAILABLE = False
+
+# Driver assíncrono usado para cada driver síncrono
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_url(url: str) -> str:
+    """Converte um DATABASE_URL síncrono no equivalente assíncrono (ex: sqlite:// -> sqlite+aiosqlite://)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername == backend and backend in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    return parsed.render_as_string(hide_password=False)
+
+
+class AsyncDatabaseManager:
+    """
+    Gerenciador de conexão assíncrona (sqlalchemy.ext.asyncio)
+
+    Partilha os modelos e o esquema com o DatabaseManager síncrono: a criação
+    de tabelas e as migrações continuam a cargo de db_manager.initialize().
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.session_factory = None
+
+    async def initialize(self) -> bool:
+        """Inicializa o engine assíncrono (e o esquema, através do gerenciador síncrono)"""
+        if not ASYNC_AVAILABLE:
+            logger.error("Async database support requires the 'greenlet' package and an async driver (e.g. aiosqlite)")
+            return False
+
+        if self.engine is not None:
+            return True
+
+        try:
+            if db_manager.engine is None and not db_manager.initialize():
+                return False
+
+            url = async_url(Config.DATABASE_URL)
+            opcoes = {}
+            if ':memory:' not in url:
+                opcoes = {'pool_size': Config.ASYNC_POOL_SIZE, 'max_overflow': Config.ASYNC_MAX_OVERFLOW}
+
+            self.engine = create_async_engine(url, echo=False, pool_pre_ping=True, **opcoes)
+            configurar_sqlite(self.engine.sync_engine)
+            perf_monitor.instrument_engine(self.engine.sync_engine)
+            self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+
+            logger.info("Async database initialized successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error initializing async database: {e}")
+            self.engine = None
+            return False
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator['AsyncSession']:
+        """Sessão assíncrona, fechada no fim do bloco async with"""
+        if self.session_factory is None:
+            await self.initialize()
+        session = self.session_factory()
+        try:
+            yield session
+        finally:
+            try:
+                await session.close()
+            except Exception as e:
+                logger.error(f"Error closing async session: {e}")
+
+    async def dispose(self):
+        """Fecha todas as conexões do engine assíncrono"""
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self.session_factory = None
+
+
+# Instância global do gerenciador assíncrono
+async_db_manager = AsyncDatabaseManager()
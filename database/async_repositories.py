@@ -0,0 +1,252 @@
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import select, func
+from models import Cliente, Restaurante, Ambiente, Mesa, Reserva
+from database.async_connection import async_db_manager
+from database.repositories import (
+    ReservaRepository, MesaBloqueada, mesas_disponiveis_stmt, _bloquear_mesas, _conflito_intervalo
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBaseRepository:
+    """Classe base para repositórios assíncronos (equivalente ao BaseRepository)"""
+
+    def __init__(self, model_class):
+        self.model_class = model_class
+
+    async def create(self, obj: Any) -> Optional[Any]:
+        """Cria um novo registro"""
+        async with async_db_manager.session() as session:
+            try:
+                session.add(obj)
+                await session.commit()
+                return obj
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error creating {self.model_class.__name__}: {e}")
+                return None
+
+    async def get_by_id(self, id: int) -> Optional[Any]:
+        """Busca um registro por ID"""
+        async with async_db_manager.session() as session:
+            try:
+                return await session.get(self.model_class, id)
+            except Exception as e:
+                logger.error(f"Error getting {self.model_class.__name__} by id {id}: {e}")
+                return None
+
+    async def get_all(self, active_only: bool = True) -> List[Any]:
+        """Busca todos os registros"""
+        async with async_db_manager.session() as session:
+            try:
+                stmt = select(self.model_class)
+                if active_only and hasattr(self.model_class, 'ativo'):
+                    stmt = stmt.where(self.model_class.ativo == True)
+                return (await session.execute(stmt)).scalars().all()
+            except Exception as e:
+                logger.error(f"Error getting all {self.model_class.__name__}: {e}")
+                return []
+
+    async def update(self, id: int, **kwargs) -> Optional[Any]:
+        """Atualiza um registro"""
+        async with async_db_manager.session() as session:
+            try:
+                obj = await session.get(self.model_class, id)
+                if obj is None:
+                    return None
+                for key, value in kwargs.items():
+                    if hasattr(obj, key):
+                        setattr(obj, key, value)
+                await session.commit()
+                await session.refresh(obj)
+                return obj
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error updating {self.model_class.__name__} {id}: {e}")
+                return None
+
+    async def count(self, active_only: bool = True) -> int:
+        """Conta o número de registros"""
+        async with async_db_manager.session() as session:
+            try:
+                stmt = select(func.count()).select_from(self.model_class)
+                if active_only and hasattr(self.model_class, 'ativo'):
+                    stmt = stmt.where(self.model_class.ativo == True)
+                return (await session.execute(stmt)).scalar() or 0
+            except Exception as e:
+                logger.error(f"Error counting {self.model_class.__name__}: {e}")
+                return 0
+
+
+class AsyncClienteRepository(AsyncBaseRepository):
+    """Repositório assíncrono para clientes"""
+
+    def __init__(self):
+        super().__init__(Cliente)
+
+    async def get_by_email(self, email: str) -> Optional[Cliente]:
+        """Busca cliente por email"""
+        async with async_db_manager.session() as session:
+            try:
+                return (await session.execute(select(Cliente).where(Cliente.email == email))).scalars().first()
+            except Exception as e:
+                logger.error(f"Error getting client by email {email}: {e}")
+                return None
+
+
+class AsyncAmbienteRepository(AsyncBaseRepository):
+    """Repositório assíncrono para ambientes"""
+
+    def __init__(self):
+        super().__init__(Ambiente)
+
+    async def get_duracao_reserva(self, ambiente_id: int) -> Optional[int]:
+        """Duração das reservas (minutos) definida pelo restaurante do ambiente"""
+        async with async_db_manager.session() as session:
+            try:
+                return (await session.execute(
+                    select(Restaurante.duracao_reserva_minutos)
+                    .join(Ambiente, Ambiente.restaurante_id == Restaurante.id)
+                    .where(Ambiente.id == ambiente_id)
+                )).scalar()
+            except Exception as e:
+                logger.error(f"Error getting reservation duration for environment {ambiente_id}: {e}")
+                return None
+
+
+class AsyncMesaRepository(AsyncBaseRepository):
+    """Repositório assíncrono para mesas"""
+
+    def __init__(self):
+        super().__init__(Mesa)
+
+    async def get_duracao_reserva(self, mesa_id: int) -> Optional[int]:
+        """Duração das reservas (minutos) definida pelo restaurante da mesa"""
+        async with async_db_manager.session() as session:
+            try:
+                return (await session.execute(
+                    select(Restaurante.duracao_reserva_minutos)
+                    .join(Ambiente, Ambiente.restaurante_id == Restaurante.id)
+                    .join(Mesa, Mesa.ambiente_id == Ambiente.id)
+                    .where(Mesa.id == mesa_id)
+                )).scalar()
+            except Exception as e:
+                logger.error(f"Error getting reservation duration for table {mesa_id}: {e}")
+                return None
+
+    async def get_available_tables(self, ambiente_id: int, data_reserva: datetime,
+                                   numero_pessoas: int, data_fim: datetime) -> List[Mesa]:
+        """Busca mesas sem reservas sobrepostas a [data_reserva, data_fim), da menor para a maior"""
+        async with async_db_manager.session() as session:
+            try:
+                return (await session.execute(
+                    mesas_disponiveis_stmt(ambiente_id, data_reserva, numero_pessoas, data_fim)
+                )).scalars().all()
+            except Exception as e:
+                logger.error(f"Error getting available tables: {e}")
+                return []
+
+
+class AsyncReservaRepository(AsyncBaseRepository):
+    """Repositório assíncrono para reservas"""
+
+    def __init__(self):
+        super().__init__(Reserva)
+
+    async def get_by_cliente(self, cliente_id: int) -> List[Reserva]:
+        """Busca reservas por cliente"""
+        async with async_db_manager.session() as session:
+            try:
+                return (await session.execute(
+                    select(Reserva).where(Reserva.cliente_id == cliente_id).order_by(Reserva.data_reserva.desc())
+                )).scalars().all()
+            except Exception as e:
+                logger.error(f"Error getting reservations by client {cliente_id}: {e}")
+                return []
+
+    async def has_conflict(self, mesa_id: int, data_reserva: datetime, data_fim: datetime,
+                           exclude_id: int = None) -> bool:
+        """Verifica se a mesa tem uma reserva confirmada sobreposta a [data_reserva, data_fim)"""
+        async with async_db_manager.session() as session:
+            stmt = select(Reserva.id).where(
+                Reserva.mesa_id == mesa_id,
+                _conflito_intervalo(data_reserva, data_fim)
+            )
+            if exclude_id is not None:
+                stmt = stmt.where(Reserva.id != exclude_id)
+            return (await session.execute(stmt.limit(1))).first() is not None
+
+    async def create_sem_conflito(self, reserva: Reserva) -> Tuple[Optional[Reserva], bool]:
+        """
+        Cria a reserva se a mesa estiver livre, verificando na mesma transação
+
+        A verificação corre depois de obter o bloqueio de escrita (ver
+        database.repositories._bloquear_mesas), para dois pedidos simultâneos
+        não poderem reservar a mesma mesa.
+
+        Returns:
+            (reserva criada, False), (None, True) se a mesa estiver ocupada ou (None, False) em caso de erro
+        """
+        async with async_db_manager.session() as session:
+            try:
+                await session.run_sync(_bloquear_mesas, {reserva.mesa_id})
+                conflito = (await session.execute(
+                    select(Reserva.id).where(
+                        Reserva.mesa_id == reserva.mesa_id,
+                        _conflito_intervalo(reserva.data_reserva, reserva.data_fim)
+                    ).limit(1)
+                )).first()
+                if conflito is not None:
+                    await session.rollback()
+                    return None, True
+
+                session.add(reserva)
+                await session.commit()
+                return reserva, False
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error creating reservation: {e}")
+                return None, False
+
+    async def cancel_with_promotion(self, reserva_id: int,
+                                    mesa_bloqueada: Optional[MesaBloqueada] = None) -> Tuple[bool, Optional[int]]:
+        """
+        Cancela uma reserva e promove a lista de espera na mesma transação
+
+        A promoção reutiliza a lógica síncrona através de AsyncSession.run_sync.
+        """
+        async with async_db_manager.session() as session:
+            try:
+                reserva = await session.get(Reserva, reserva_id)
+                if reserva is None:
+                    return False, None
+
+                libertou_mesa = reserva.status == 'confirmada' and reserva.data_reserva > datetime.now()
+                reserva.status = 'cancelada'
+                promovida_id = None
+
+                if libertou_mesa:
+                    await session.flush()
+                    promovida_id = await session.run_sync(
+                        ReservaRepository._promover_lista_espera,
+                        reserva.mesa_id, reserva.data_reserva, reserva.data_fim, mesa_bloqueada
+                    )
+
+                await session.commit()
+                if promovida_id:
+                    logger.info(f"Promoted waitlist entry to reservation {promovida_id} after cancelling {reserva_id}")
+                return True, promovida_id
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error cancelling reservation {reserva_id}: {e}")
+                return False, None
+
+
+# Instâncias globais dos repositórios assíncronos
+async_cliente_repo = AsyncClienteRepository()
+async_ambiente_repo = AsyncAmbienteRepository()
+async_mesa_repo = AsyncMesaRepository()
+async_reserva_repo = AsyncReservaRepository()
@@ -1,12 +1,129 @@
-from sqlalchemy import create_engine
+from datetime import timedelta
+from sqlalchemy import MetaData, Table, bindparam, create_engine, event, inspect, select, text
 from sqlalchemy.orm import sessionmaker, scoped_session
-from models import Base
+from models import Base, codificar_dia, codificar_slot
 from config import Config
+from utils.performance import perf_monitor
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Linhas lidas e atualizadas de cada vez nos preenchimentos calculados em Python
+_LOTE_BACKFILL = 1000
+
+
+def _preencher_por_lotes(conn, tabela: str, coluna: str, stmt, calcular):
+    """
+    Grava coluna = calcular(linha) nas linhas de stmt, por ordem de id e em lotes
+    
+    stmt é um select() que começa pela coluna id da tabela; o cálculo é
+    feito em Python para o preenchimento não depender de funções de datas
+    de um dialeto SQL.
+    """
+    t = Base.metadata.tables[tabela]
+    # text() e não update(t): update() acrescentaria os onupdate do modelo
+    # (data_atualizacao), que não devem mudar e podem ainda não existir
+    atualizar = text(f"UPDATE {tabela} SET {coluna} = :b_valor WHERE id = :b_id").bindparams(
+        bindparam('b_valor', type_=t.c[coluna].type),
+        bindparam('b_id', type_=t.c.id.type)
+    )
+    ultimo_id = None
+    while True:
+        lote = stmt if ultimo_id is None else stmt.where(t.c.id > ultimo_id)
+        linhas = conn.execute(lote.order_by(t.c.id).limit(_LOTE_BACKFILL)).all()
+        if not linhas:
+            return
+        conn.execute(atualizar, [{'b_id': linha.id, 'b_valor': calcular(linha)} for linha in linhas])
+        ultimo_id = linhas[-1].id
+
+
+def _data_fim_backfill(tabela: str):
+    """Fim da reserva = início + duração do restaurante (ou a duração padrão)"""
+    def preencher(conn):
+        t = Base.metadata.tables[tabela]
+        mesas, ambientes, restaurantes = (Base.metadata.tables[n] for n in ('mesas', 'ambientes', 'restaurantes'))
+        stmt = select(t.c.id, t.c.data_reserva, restaurantes.c.duracao_reserva_minutos.label('duracao')).select_from(
+            t.outerjoin(mesas, mesas.c.id == t.c.mesa_id)
+            .outerjoin(ambientes, ambientes.c.id == mesas.c.ambiente_id)
+            .outerjoin(restaurantes, restaurantes.c.id == ambientes.c.restaurante_id)
+        ).where(t.c.data_fim.is_(None))
+        _preencher_por_lotes(conn, tabela, 'data_fim', stmt, lambda linha: linha.data_reserva + timedelta(
+            minutes=linha.duracao or Config.RESERVATION_DURATION_MINUTES
+        ))
+    return preencher
+
+
+def _reserva_codificada_backfill(coluna: str, codificar):
+    """Codificação inteira de data_reserva (ver models.codificar_dia / codificar_slot)"""
+    def preencher(conn):
+        t = Base.metadata.tables['reservas']
+        stmt = select(t.c.id, t.c.data_reserva).where(t.c[coluna].is_(None))
+        _preencher_por_lotes(conn, 'reservas', coluna, stmt, lambda linha: codificar(linha.data_reserva))
+    return preencher
+
+
+# Preenchimento de colunas acrescentadas a tabelas existentes (executado só quando a coluna é criada):
+# SQL portável ou uma função que recebe a ligação
+COLUMN_BACKFILLS = {
+    ('mesas', 'combinavel'):
+        "UPDATE mesas SET combinavel = 0 WHERE combinavel IS NULL",
+    ('reservas', 'data_atualizacao'):
+        "UPDATE reservas SET data_atualizacao = data_criacao WHERE data_atualizacao IS NULL",
+    ('reservas', 'data_fim'):
+        _data_fim_backfill('reservas'),
+    ('reservas', 'dia_reserva'): _reserva_codificada_backfill('dia_reserva', codificar_dia),
+    ('reservas', 'slot_reserva'): _reserva_codificada_backfill('slot_reserva', codificar_slot),
+    ('reservas_arquivo', 'data_fim'):
+        _data_fim_backfill('reservas_arquivo'),
+}
+
+
+# Índices substituídos por outros, removidos das bases de dados existentes
+OBSOLETE_INDEXES = [
+    ('lista_espera', 'ix_lista_espera_promocao'),
+]
+
+
+def iniciar_escrita(conn):
+    """
+    Abre já a transação de escrita da ligação
+    
+    O pysqlite só começa a transação no primeiro INSERT/UPDATE/DELETE: as
+    leituras e o DDL anteriores ficam fora dela. BEGIN IMMEDIATE obtém logo
+    o lock de escrita do SQLite, pelo que o que se lê a seguir não muda até
+    ao commit. Nos outros dialetos a transação já está aberta (as leituras
+    que decidem uma escrita devem usar with_for_update).
+    """
+    if conn.dialect.name != 'sqlite':
+        return
+    # driver_connection: o sqlite3 ou o aiosqlite (o adaptador assíncrono não tem in_transaction)
+    if not conn.connection.driver_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def configurar_sqlite(engine):
+    """
+    PRAGMAs aplicados a cada ligação SQLite
+    
+    busy_timeout faz as escritas concorrentes (de outras threads ou processos)
+    esperarem em vez de falharem; em ficheiro, o modo WAL deixa as leituras
+    decorrerem em paralelo com a escrita em curso.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    wal = Config.SQLITE_WAL and engine.url.database not in (None, '', ':memory:')
+    
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {Config.SQLITE_BUSY_TIMEOUT_MS}")
+        if wal:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.close()
+
+
 class DatabaseManager:
     """Gerenciador de conexão com banco de dados"""
     
@@ -23,12 +140,15 @@ class DatabaseManager:
                 echo=False,  # Set to True for SQL debugging
                 pool_pre_ping=True
             )
+            configurar_sqlite(self.engine)
+            perf_monitor.instrument_engine(self.engine)
             
             self.session_factory = sessionmaker(bind=self.engine)
             self.Session = scoped_session(self.session_factory)
             
             # Criar todas as tabelas
             Base.metadata.create_all(self.engine)
+            self._run_migrations()
             
             logger.info("Database initialized successfully")
             return True
@@ -37,6 +157,63 @@ class DatabaseManager:
             logger.error(f"Error initializing database: {e}")
             return False
     
+    def _run_migrations(self):
+        """Aplica alterações de esquema a bases de dados já existentes"""
+        self._add_missing_columns()
+        self._drop_obsolete_indexes()
+        
+        # create_all não cria índices novos em tabelas que já existem
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+    
+    def _add_missing_columns(self):
+        """
+        Acrescenta colunas novas dos modelos e preenche-as quando necessário
+        
+        Todas as colunas são criadas antes dos preenchimentos (que podem ler
+        colunas acrescentadas depois da sua), numa só transação: se algo
+        falhar, nada fica alterado e a migração repete-se no arranque seguinte.
+        """
+        with self.engine.begin() as conn:
+            iniciar_escrita(conn)
+            inspector = inspect(conn)
+            backfills = []
+            for table in Base.metadata.sorted_tables:
+                existing = {c['name'] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    logger.info(f"Added column {table.name}.{column.name}")
+                    
+                    backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                    if backfill:
+                        backfills.append(backfill)
+            
+            for backfill in backfills:
+                if callable(backfill):
+                    backfill(conn)
+                else:
+                    conn.execute(text(backfill))
+    
+    def _drop_obsolete_indexes(self):
+        """Remove índices que deixaram de existir nos modelos"""
+        for tabela, nome in OBSOLETE_INDEXES:
+            if not inspect(self.engine).has_table(tabela):
+                continue
+            for index in Table(tabela, MetaData(), autoload_with=self.engine).indexes:
+                if index.name == nome:
+                    index.drop(self.engine)
+                    logger.info(f"Dropped index {nome}")
+    
+    def get_engine(self):
+        """Retorna o engine do banco de dados"""
+        if self.engine is None:
+            self.initialize()
+        return self.engine
+    
     def get_session(self):
         """Retorna uma sessão do banco de dados"""
         if self.Session is None:
@@ -0,0 +1,57 @@
+"""
+Modelos de leitura: linhas imutáveis (NamedTuple) para listagens
+
+Os repositórios devolvem entidades ORM, que ficam desligadas da sessão
+após close_session e guardam o estado de instância do SQLAlchemy. Para
+listagens só de leitura, as linhas abaixo são construídas a partir de um
+select() Core apenas com as colunas necessárias: sem identity map, sem
+estado por instância e com __slots__ vazios (tuplos).
+
+Os nomes dos campos são os atributos do modelo correspondente, por isso as
+linhas podem substituir as entidades em código que só lê atributos.
+"""
+
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Type
+from sqlalchemy import Select, select
+
+
+class ReservaRow(NamedTuple):
+    """Reserva (ou reserva arquivada) para listagens"""
+    id: int
+    cliente_id: int
+    mesa_id: int
+    data_reserva: datetime
+    data_fim: Optional[datetime]
+    numero_pessoas: int
+    status: str
+    observacoes: Optional[str]
+
+
+class MesaRow(NamedTuple):
+    """Mesa para listagens"""
+    id: int
+    numero: str
+    capacidade: int
+    ambiente_id: int
+    combinavel: bool
+    observacoes: Optional[str]
+
+
+class ClienteRow(NamedTuple):
+    """Cliente para listagens"""
+    id: int
+    nome: str
+    email: str
+    telefone: str
+    data_cadastro: Optional[datetime]
+
+
+def select_row(row_type: Type[NamedTuple], modelo) -> Select:
+    """select() das colunas do modelo com os nomes dos campos da linha"""
+    return select(*(getattr(modelo, campo) for campo in row_type._fields))
+
+
+def fetch_rows(session, row_type: Type[NamedTuple], stmt: Select) -> List[NamedTuple]:
+    """Executa o select e constrói as linhas diretamente dos tuplos do cursor"""
+    return list(map(row_type._make, session.execute(stmt)))
@@ -1,13 +1,70 @@
-from typing import List, Optional
-from datetime import datetime, date
-from models import Cliente, Restaurante, Ambiente, Mesa, Reserva
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, insert, update, delete, literal, and_, or_, func, union_all
+from sqlalchemy.exc import IntegrityError
+from models import (
+    Cliente, Restaurante, Ambiente, Mesa, Reserva, ReservaArquivo, ReservaRemovida, ListaEspera, BloqueioMesa, VersaoCache,
+    ChaveIdempotencia, EventoOutbox, CheckpointOutbox, Notificacao, codificar_dia
+)
 from database.base_repository import BaseRepository
-from database.connection import db_manager
+from database.read_models import ReservaRow, MesaRow, ClienteRow, select_row, fetch_rows
+from database.connection import db_manager, iniciar_escrita
+from utils.validators import ValidationError
+from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# (mesa_id, inicio, fim) -> True se a mesa estiver bloqueada nesse intervalo (ver services.holds)
+MesaBloqueada = Callable[[int, datetime, datetime], bool]
+
+
+def _bloquear_mesas(session, mesa_ids):
+    """
+    Serializa as escritas que dependem da ocupação das mesas
+    
+    Chamado antes de verificar conflitos: em SQLite obtém o bloqueio de escrita
+    (BEGIN IMMEDIATE), nos outros dialetos bloqueia as linhas das mesas. Outra
+    transação que queira reservar as mesmas mesas espera pelo commit desta.
+    """
+    iniciar_escrita(session.connection())
+    session.execute(
+        select(Mesa.id).where(Mesa.id.in_(set(mesa_ids))).order_by(Mesa.id).with_for_update()
+    ).all()
+
+
+def _conflito_intervalo(inicio: datetime, fim: datetime):
+    """
+    Condições de sobreposição de uma reserva confirmada com o intervalo [inicio, fim)
+
+    O limite inferior em data_reserva (duração máxima) mantém a pesquisa
+    num intervalo curto do índice (mesa_id, data_reserva, data_fim).
+    """
+    return and_(
+        Reserva.status == 'confirmada',
+        Reserva.data_reserva < fim,
+        Reserva.data_reserva > inicio - timedelta(minutes=Config.MAX_RESERVATION_DURATION_MINUTES),
+        Reserva.data_fim > inicio
+    )
+
+
+def mesas_disponiveis_stmt(ambiente_id: int, data_reserva: datetime,
+                           numero_pessoas: int, data_fim: datetime):
+    """SELECT das mesas ativas sem reservas sobrepostas a [data_reserva, data_fim), da menor para a maior"""
+    conflito = select(Reserva.id).where(
+        Reserva.mesa_id == Mesa.id,
+        _conflito_intervalo(data_reserva, data_fim)
+    ).exists()
+    
+    return select(Mesa).where(
+        Mesa.ambiente_id == ambiente_id,
+        Mesa.capacidade >= numero_pessoas,
+        Mesa.ativo == True,
+        ~conflito
+    ).order_by(Mesa.capacidade, Mesa.numero)
+
+
 class ClienteRepository(BaseRepository):
     """Repositório para operações com clientes"""
     
@@ -24,6 +81,17 @@ class ClienteRepository(BaseRepository):
             return None
         finally:
             db_manager.close_session(session)
+    
+    def get_rows(self) -> List[ClienteRow]:
+        """Clientes ativos como linhas de leitura (sem entidades ORM)"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ClienteRow, select_row(ClienteRow, Cliente).where(Cliente.ativo == True))
+        except Exception as e:
+            logger.error(f"Error getting client rows: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
 
 
 class RestauranteRepository(BaseRepository):
@@ -66,6 +134,21 @@ class AmbienteRepository(BaseRepository):
             return []
         finally:
             db_manager.close_session(session)
+    
+    def get_duracao_reserva(self, ambiente_id: int) -> Optional[int]:
+        """Duração das reservas (minutos) definida pelo restaurante do ambiente"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(
+                select(Restaurante.duracao_reserva_minutos)
+                .join(Ambiente, Ambiente.restaurante_id == Restaurante.id)
+                .where(Ambiente.id == ambiente_id)
+            ).scalar()
+        except Exception as e:
+            logger.error(f"Error getting reservation duration for environment {ambiente_id}: {e}")
+            return None
+        finally:
+            db_manager.close_session(session)
 
 
 class MesaRepository(BaseRepository):
@@ -74,45 +157,61 @@ class MesaRepository(BaseRepository):
     def __init__(self):
         super().__init__(Mesa)
     
-    def get_by_ambiente(self, ambiente_id: int) -> List[Mesa]:
-        """Busca mesas por ambiente"""
+    def get_rows_by_ambiente(self, ambiente_id: int) -> List[MesaRow]:
+        """Mesas ativas de um ambiente como linhas de leitura"""
         session = db_manager.get_session()
         try:
-            return session.query(Mesa).filter(
+            return fetch_rows(session, MesaRow, select_row(MesaRow, Mesa).where(
                 Mesa.ambiente_id == ambiente_id,
                 Mesa.ativo == True
-            ).all()
+            ))
         except Exception as e:
-            logger.error(f"Error getting tables by environment {ambiente_id}: {e}")
+            logger.error(f"Error getting table rows by environment {ambiente_id}: {e}")
             return []
         finally:
             db_manager.close_session(session)
     
-    def get_available_tables(self, ambiente_id: int, data_reserva: datetime, 
-                           numero_pessoas: int) -> List[Mesa]:
-        """Busca mesas disponíveis para uma data/hora específica"""
+    def get_duracao_reserva(self, mesa_id: int) -> Optional[int]:
+        """Duração das reservas (minutos) definida pelo restaurante da mesa"""
         session = db_manager.get_session()
         try:
-            # Buscar mesas do ambiente com capacidade suficiente
-            mesas_ambiente = session.query(Mesa).filter(
-                Mesa.ambiente_id == ambiente_id,
-                Mesa.capacidade >= numero_pessoas,
-                Mesa.ativo == True
+            return session.execute(
+                select(Restaurante.duracao_reserva_minutos)
+                .join(Ambiente, Ambiente.restaurante_id == Restaurante.id)
+                .join(Mesa, Mesa.ambiente_id == Ambiente.id)
+                .where(Mesa.id == mesa_id)
+            ).scalar()
+        except Exception as e:
+            logger.error(f"Error getting reservation duration for table {mesa_id}: {e}")
+            return None
+        finally:
+            db_manager.close_session(session)
+    
+    def get_with_duracao(self, mesa_ids: List[int]) -> Dict[int, Tuple[Mesa, Optional[int]]]:
+        """Mesas ativas (por ID) com a duração das reservas do respetivo restaurante, numa só consulta"""
+        session = db_manager.get_session()
+        try:
+            rows = session.execute(
+                select(Mesa, Restaurante.duracao_reserva_minutos)
+                .join(Ambiente, Mesa.ambiente_id == Ambiente.id)
+                .join(Restaurante, Ambiente.restaurante_id == Restaurante.id)
+                .where(Mesa.id.in_(mesa_ids), Mesa.ativo == True)
             ).all()
-            
-            # Verificar quais mesas não têm reserva no horário solicitado
-            mesas_disponiveis = []
-            for mesa in mesas_ambiente:
-                reserva_conflito = session.query(Reserva).filter(
-                    Reserva.mesa_id == mesa.id,
-                    Reserva.data_reserva == data_reserva,
-                    Reserva.status == 'confirmada'
-                ).first()
-                
-                if not reserva_conflito:
-                    mesas_disponiveis.append(mesa)
-            
-            return mesas_disponiveis
+            return {mesa.id: (mesa, duracao) for mesa, duracao in rows}
+        except Exception as e:
+            logger.error(f"Error getting tables {mesa_ids}: {e}")
+            return {}
+        finally:
+            db_manager.close_session(session)
+    
+    def get_available_tables(self, ambiente_id: int, data_reserva: datetime, 
+                           numero_pessoas: int, data_fim: datetime) -> List[Mesa]:
+        """Busca mesas sem reservas sobrepostas a [data_reserva, data_fim), da menor para a maior"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(
+                mesas_disponiveis_stmt(ambiente_id, data_reserva, numero_pessoas, data_fim)
+            ).scalars().all()
             
         except Exception as e:
             logger.error(f"Error getting available tables: {e}")
@@ -120,6 +219,91 @@ class MesaRepository(BaseRepository):
         finally:
             db_manager.close_session(session)
 
+    def get_free_tables(self, horarios: List[datetime], ambiente_id: int = None,
+                        texto: str = None, restaurante_id: int = None) -> Dict[datetime, list]:
+        """
+        Lista as mesas livres em cada horário numa única query
+
+        Cada horário ocupa a duração de reserva do restaurante; uma mesa está
+        ocupada se alguma reserva confirmada se sobrepuser a esse intervalo.
+
+        Args:
+            horarios: Horários (data e hora) a avaliar
+            ambiente_id: Limitar a um ambiente (None para todos os restaurantes)
+            texto: Filtro por nome, morada ou descrição do restaurante, ou nome do ambiente
+            restaurante_id: Limitar aos ambientes de um restaurante
+
+        Returns:
+            Dicionário {horário: linhas das mesas livres}, com id, numero,
+            capacidade, combinavel, ambiente_id, ambiente, restaurante_id,
+            restaurante e endereco
+        """
+        if not horarios:
+            return {}
+
+        session = db_manager.get_session()
+        try:
+            inicio = min(horarios)
+            fim = max(horarios) + timedelta(minutes=Config.MAX_RESERVATION_DURATION_MINUTES)
+
+            # Mesas elegíveis com as reservas confirmadas que tocam a janela (LEFT JOIN)
+            stmt = (
+                select(Mesa.id, Mesa.numero, Mesa.capacidade, Mesa.combinavel,
+                       Ambiente.id.label('ambiente_id'), Ambiente.nome.label('ambiente'),
+                       Restaurante.id.label('restaurante_id'), Restaurante.nome.label('restaurante'),
+                       Restaurante.endereco, Restaurante.duracao_reserva_minutos,
+                       Reserva.data_reserva, Reserva.data_fim)
+                .join(Ambiente, Ambiente.id == Mesa.ambiente_id)
+                .join(Restaurante, Restaurante.id == Ambiente.restaurante_id)
+                .outerjoin(Reserva, and_(
+                    Reserva.mesa_id == Mesa.id,
+                    _conflito_intervalo(inicio, fim)
+                ))
+                .where(
+                    Mesa.ativo == True,
+                    Ambiente.ativo == True,
+                    Restaurante.ativo == True
+                )
+                .order_by(Mesa.capacidade, Mesa.numero)
+            )
+            if ambiente_id is not None:
+                stmt = stmt.where(Mesa.ambiente_id == ambiente_id)
+            if restaurante_id is not None:
+                stmt = stmt.where(Ambiente.restaurante_id == restaurante_id)
+            if texto and texto.strip():
+                padrao = f"%{texto.strip()}%"
+                stmt = stmt.where(or_(
+                    Restaurante.nome.ilike(padrao),
+                    Restaurante.endereco.ilike(padrao),
+                    Restaurante.descricao.ilike(padrao),
+                    Ambiente.nome.ilike(padrao)
+                ))
+
+            mesas = {}
+            reservas: Dict[int, list] = {}
+            for row in session.execute(stmt):
+                mesas.setdefault(row.id, row)
+                if row.data_reserva is not None:
+                    reservas.setdefault(row.id, []).append((row.data_reserva, row.data_fim))
+
+            livres = {}
+            for h in horarios:
+                livres[h] = []
+                for mesa_id, mesa in mesas.items():
+                    duracao = timedelta(
+                        minutes=mesa.duracao_reserva_minutos or Config.RESERVATION_DURATION_MINUTES
+                    )
+                    if not any(r_inicio < h + duracao and r_fim > h
+                               for r_inicio, r_fim in reservas.get(mesa_id, ())):
+                        livres[h].append(mesa)
+            return livres
+
+        except Exception as e:
+            logger.error(f"Error getting free tables: {e}")
+            return {h: [] for h in horarios}
+        finally:
+            db_manager.close_session(session)
+
 
 class ReservaRepository(BaseRepository):
     """Repositório para operações com reservas"""
@@ -127,6 +311,24 @@ class ReservaRepository(BaseRepository):
     def __init__(self):
         super().__init__(Reserva)
     
+    def delete(self, id: int) -> bool:
+        """Remove uma reserva e regista a remoção (ReservaRemovida) na mesma transação"""
+        session = db_manager.get_session()
+        try:
+            reserva = session.get(Reserva, id)
+            if reserva is None:
+                return False
+            session.delete(reserva)
+            session.add(ReservaRemovida(reserva_id=id))
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error deleting reservation {id}: {e}")
+            return False
+        finally:
+            db_manager.close_session(session)
+    
     def get_by_cliente(self, cliente_id: int) -> List[Reserva]:
         """Busca reservas por cliente"""
         session = db_manager.get_session()
@@ -141,15 +343,14 @@ class ReservaRepository(BaseRepository):
             db_manager.close_session(session)
     
     def get_by_data(self, data_inicio: date, data_fim: date = None) -> List[Reserva]:
-        """Busca reservas por período"""
+        """Busca reservas por período (dias inclusive), pelo número inteiro do dia"""
         session = db_manager.get_session()
         try:
             if data_fim is None:
                 data_fim = data_inicio
             
             return session.query(Reserva).filter(
-                Reserva.data_reserva >= data_inicio,
-                Reserva.data_reserva <= data_fim
+                Reserva.dia_reserva.between(codificar_dia(data_inicio), codificar_dia(data_fim))
             ).order_by(Reserva.data_reserva).all()
         except Exception as e:
             logger.error(f"Error getting reservations by date: {e}")
@@ -157,6 +358,51 @@ class ReservaRepository(BaseRepository):
         finally:
             db_manager.close_session(session)
     
+    def get_by_slot(self, dia: date, slot: int = None, status: str = None) -> List[Reserva]:
+        """
+        Busca reservas de um dia (e, opcionalmente, de um horário) por igualdade inteira
+        
+        Args:
+            dia: Dia das reservas
+            slot: Índice do horário em Config.TIME_SLOTS (opcional)
+            status: Filtrar por estado (opcional)
+        """
+        session = db_manager.get_session()
+        try:
+            query = session.query(Reserva).filter(Reserva.dia_reserva == codificar_dia(dia))
+            if slot is not None:
+                query = query.filter(Reserva.slot_reserva == slot)
+            if status is not None:
+                query = query.filter(Reserva.status == status)
+            return query.order_by(Reserva.slot_reserva, Reserva.mesa_id).all()
+        except Exception as e:
+            logger.error(f"Error getting reservations for day {dia} slot {slot}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_codificadas(self, dia_inicio: date, dia_fim: date) -> List[Tuple[int, int, int, Optional[int], int]]:
+        """
+        Reservas confirmadas de um período como tuplos de inteiros
+        (id, mesa_id, dia_reserva, slot_reserva, numero_pessoas), prontos a carregar em arrays
+        """
+        session = db_manager.get_session()
+        try:
+            return [tuple(row) for row in session.execute(
+                select(Reserva.id, Reserva.mesa_id, Reserva.dia_reserva,
+                       Reserva.slot_reserva, Reserva.numero_pessoas)
+                .where(
+                    Reserva.dia_reserva.between(codificar_dia(dia_inicio), codificar_dia(dia_fim)),
+                    Reserva.status == 'confirmada'
+                )
+                .order_by(Reserva.dia_reserva, Reserva.slot_reserva)
+            )]
+        except Exception as e:
+            logger.error(f"Error getting encoded reservations: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
     def get_by_restaurante(self, restaurante_id: int) -> List[Reserva]:
         """Busca reservas por restaurante"""
         session = db_manager.get_session()
@@ -170,9 +416,1172 @@ class ReservaRepository(BaseRepository):
         finally:
             db_manager.close_session(session)
     
+    def get_by_periodo(self, data_inicio: datetime, data_fim: datetime) -> List[Reserva]:
+        """Busca reservas com data_inicio <= data_reserva < data_fim"""
+        session = db_manager.get_session()
+        try:
+            return session.query(Reserva).filter(
+                Reserva.data_reserva >= data_inicio,
+                Reserva.data_reserva < data_fim
+            ).order_by(Reserva.data_reserva).all()
+        except Exception as e:
+            logger.error(f"Error getting reservations by period: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_rows_by_cliente(self, cliente_id: int) -> List[ReservaRow]:
+        """Busca reservas por cliente como linhas de leitura"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, Reserva).where(
+                Reserva.cliente_id == cliente_id
+            ).order_by(Reserva.data_reserva.desc()))
+        except Exception as e:
+            logger.error(f"Error getting reservation rows by client {cliente_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_rows_by_restaurante(self, restaurante_id: int) -> List[ReservaRow]:
+        """Busca reservas por restaurante como linhas de leitura"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, Reserva).join(
+                Mesa, Mesa.id == Reserva.mesa_id
+            ).join(Ambiente).where(
+                Ambiente.restaurante_id == restaurante_id
+            ).order_by(Reserva.data_reserva.desc()))
+        except Exception as e:
+            logger.error(f"Error getting reservation rows by restaurant {restaurante_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_rows_by_periodo(self, data_inicio: datetime, data_fim: datetime) -> List[ReservaRow]:
+        """Busca reservas com data_inicio <= data_reserva < data_fim como linhas de leitura"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, Reserva).where(
+                Reserva.data_reserva >= data_inicio,
+                Reserva.data_reserva < data_fim
+            ).order_by(Reserva.data_reserva))
+        except Exception as e:
+            logger.error(f"Error getting reservation rows by period: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
     def cancel_reservation(self, reserva_id: int) -> bool:
         """Cancela uma reserva"""
         return self.update(reserva_id, status='cancelada')
+    
+    def create_idempotente(self, reserva: Reserva, chave: ChaveIdempotencia) -> Tuple[Optional[Reserva], bool]:
+        """
+        Cria a reserva e grava a chave de idempotência na mesma transação
+
+        Se a chave já tiver sido gravada por um pedido simultâneo, nada é
+        criado e é devolvida a reserva original.
+
+        Returns:
+            (reserva, True se a reserva devolvida é a original de um pedido repetido)
+
+        Raises:
+            ValidationError: A chave já foi usada por outro cliente
+        """
+        session = db_manager.get_session()
+        try:
+            ChaveIdempotenciaRepository.substituir_expirada(session, chave)
+            session.add(reserva)
+            session.flush()
+            chave.recurso_id = reserva.id
+            session.add(chave)
+            session.commit()
+            session.refresh(reserva)
+            return reserva, False
+        except IntegrityError:
+            session.rollback()
+            original = session.execute(
+                select(Reserva).join(ChaveIdempotencia, ChaveIdempotencia.recurso_id == Reserva.id).where(
+                    ChaveIdempotencia.chave == chave.chave,
+                    ChaveIdempotencia.operacao == chave.operacao,
+                    Reserva.cliente_id == reserva.cliente_id
+                )
+            ).scalars().first()
+            if original is None:
+                if ChaveIdempotenciaRepository.get_recurso_id(session, chave) is not None:
+                    logger.warning(f"Idempotency key {chave.chave} already used by another client")
+                    raise ValidationError("Chave de idempotência já usada noutro pedido")
+                logger.error(f"Error creating reservation with idempotency key {chave.chave}")
+            return original, original is not None
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error creating reservation: {e}")
+            return None, False
+        finally:
+            db_manager.close_session(session)
+    
+    def cancel_with_promotion(self, reserva_id: int, chave: Optional[ChaveIdempotencia] = None,
+                              mesa_bloqueada: Optional[MesaBloqueada] = None) -> Tuple[bool, Optional[int]]:
+        """
+        Cancela uma reserva e, na mesma transação, promove o primeiro pedido
+        compatível da lista de espera para a mesa libertada
+
+        O pedido é procurado pelo índice ix_lista_espera_lugares (ver
+        _promover_lista_espera), sem percorrer a lista de espera.
+        A chave de idempotência, se indicada, é gravada na mesma transação.
+        Com mesa_bloqueada, uma mesa bloqueada por outra sessão não é promovida.
+
+        Returns:
+            (cancelada, id da reserva criada para a lista de espera ou None)
+
+        Raises:
+            ValidationError: A chave já foi usada para cancelar outra reserva
+        """
+        session = db_manager.get_session()
+        try:
+            reserva = session.get(Reserva, reserva_id)
+            if reserva is None:
+                return False, None
+
+            libertou_mesa = reserva.status == 'confirmada' and reserva.data_reserva > datetime.now()
+            reserva.status = 'cancelada'
+            promovida_id = None
+
+            if libertou_mesa:
+                session.flush()
+                promovida_id = self._promover_lista_espera(
+                    session, reserva.mesa_id, reserva.data_reserva, reserva.data_fim, mesa_bloqueada
+                )
+
+            if chave is not None:
+                ChaveIdempotenciaRepository.substituir_expirada(session, chave)
+                session.add(chave)
+
+            session.commit()
+            if promovida_id:
+                logger.info(f"Promoted waitlist entry to reservation {promovida_id} after cancelling {reserva_id}")
+            return True, promovida_id
+        except IntegrityError as e:
+            session.rollback()
+            recurso_id = ChaveIdempotenciaRepository.get_recurso_id(session, chave) if chave is not None else None
+            if recurso_id == reserva_id:
+                # A mesma chave foi gravada por um pedido simultâneo, que já cancelou a reserva
+                logger.info(f"Repeated cancellation of reservation {reserva_id} with key {chave.chave}")
+                return True, None
+            if recurso_id is not None:
+                logger.warning(f"Idempotency key {chave.chave} already used for reservation {recurso_id}")
+                raise ValidationError("Chave de idempotência já usada noutro pedido")
+            logger.error(f"Error cancelling reservation {reserva_id}: {e}")
+            return False, None
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error cancelling reservation {reserva_id}: {e}")
+            return False, None
+        finally:
+            db_manager.close_session(session)
+    
+    @staticmethod
+    def _promover_lista_espera(session, mesa_id: int, data_reserva: datetime, data_fim: Optional[datetime],
+                               mesa_bloqueada: Optional[MesaBloqueada] = None) -> Optional[int]:
+        """
+        Atribui a mesa libertada em [data_reserva, data_fim) ao primeiro pedido compatível
+        da lista de espera, na transação da sessão indicada
+
+        Para cada número de pessoas até à capacidade da mesa, o pedido mais
+        antigo é lido com uma pesquisa LIMIT 1 no índice (ambiente_id,
+        data_reserva, status, numero_pessoas, data_criacao); o primeiro
+        pedido é o mais antigo desses. O custo depende da capacidade da
+        mesa e não do tamanho da lista. Uma mesa bloqueada (mesa_bloqueada)
+        fica para quem a bloqueou, como nas pesquisas de disponibilidade.
+
+        Returns:
+            ID da reserva criada para o pedido ou None
+        """
+        mesa = session.get(Mesa, mesa_id)
+        data_fim = data_fim or data_reserva + timedelta(minutes=Config.RESERVATION_DURATION_MINUTES)
+        if mesa_bloqueada is not None and mesa_bloqueada(mesa.id, data_reserva, data_fim):
+            return None
+        por_lugares = [
+            select(ListaEspera.id, ListaEspera.data_criacao)
+            .where(
+                ListaEspera.ambiente_id == mesa.ambiente_id,
+                ListaEspera.data_reserva == data_reserva,
+                ListaEspera.status == 'ativa',
+                ListaEspera.numero_pessoas == numero_pessoas
+            )
+            .order_by(ListaEspera.data_criacao, ListaEspera.id)
+            .limit(1)
+            .subquery()
+            for numero_pessoas in range(1, mesa.capacidade + 1)
+        ]
+        primeiro = session.execute(
+            union_all(*(select(sub.c.id, sub.c.data_criacao) for sub in por_lugares))
+            .order_by('data_criacao', 'id')
+            .limit(1)
+        ).first()
+        pedido = session.get(ListaEspera, primeiro.id, with_for_update=True) if primeiro else None
+
+        livre = pedido is not None and session.query(Reserva.id).filter(
+            Reserva.mesa_id == mesa.id,
+            _conflito_intervalo(data_reserva, data_fim)
+        ).first() is None
+        if not livre:
+            return None
+
+        nova = Reserva(
+            cliente_id=pedido.cliente_id,
+            mesa_id=mesa.id,
+            data_reserva=data_reserva,
+            data_fim=data_fim,
+            numero_pessoas=pedido.numero_pessoas,
+            observacoes=pedido.observacoes
+        )
+        session.add(nova)
+        session.flush()
+        pedido.status = 'promovida'
+        pedido.reserva_id = nova.id
+        pedido.data_promocao = datetime.now()
+        return nova.id
+
+    def move(self, reserva_id: int, mesa_id: int, data_reserva: datetime, data_fim: datetime,
+             mesa_bloqueada: Optional[MesaBloqueada] = None) -> Tuple[Optional[Reserva], Optional[Reserva]]:
+        """
+        Muda a mesa e/ou o horário de uma reserva confirmada numa única transação
+
+        O conflito no destino é verificado na mesma transação (índice
+        ix_reservas_mesa_intervalo, excluindo a própria reserva) e o lugar
+        libertado na origem é oferecido à lista de espera.
+
+        Returns:
+            (reserva alterada, None), (None, reserva em conflito no destino) ou (None, None) em caso de erro
+        """
+        session = db_manager.get_session()
+        try:
+            _bloquear_mesas(session, {mesa_id})
+            reserva = session.get(Reserva, reserva_id)
+            if reserva is None or reserva.status != 'confirmada':
+                session.rollback()
+                return None, None
+
+            conflito = session.execute(
+                select(Reserva).where(
+                    Reserva.mesa_id == mesa_id,
+                    Reserva.id != reserva_id,
+                    _conflito_intervalo(data_reserva, data_fim)
+                ).limit(1)
+            ).scalar()
+            if conflito is not None:
+                session.rollback()
+                return None, conflito
+
+            origem = (reserva.mesa_id, reserva.data_reserva, reserva.data_fim)
+            reserva.mesa_id = mesa_id
+            reserva.data_reserva = data_reserva
+            reserva.data_fim = data_fim
+            session.flush()
+
+            promovida_id = None
+            if origem[1] > datetime.now():
+                promovida_id = self._promover_lista_espera(session, *origem, mesa_bloqueada)
+
+            session.commit()
+            session.refresh(reserva)
+            logger.info(f"Moved reservation {reserva_id} to table {mesa_id} at {data_reserva}")
+            if promovida_id:
+                logger.info(f"Promoted waitlist entry to reservation {promovida_id} after moving {reserva_id}")
+            return reserva, None
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error moving reservation {reserva_id}: {e}")
+            return None, None
+        finally:
+            db_manager.close_session(session)
+
+    def has_conflict(self, mesa_id: int, data_reserva: datetime, data_fim: datetime,
+                     exclude_id: int = None) -> bool:
+        """Verifica se a mesa tem uma reserva confirmada sobreposta a [data_reserva, data_fim)"""
+        session = db_manager.get_session()
+        try:
+            query = session.query(Reserva.id).filter(
+                Reserva.mesa_id == mesa_id,
+                _conflito_intervalo(data_reserva, data_fim)
+            )
+            if exclude_id is not None:
+                query = query.filter(Reserva.id != exclude_id)
+            return query.first() is not None
+        finally:
+            db_manager.close_session(session)
+    
+    def get_conflicting_mesas(self, mesa_ids: List[int], data_reserva: datetime,
+                              data_fim: datetime) -> set:
+        """IDs das mesas (de mesa_ids) com reservas confirmadas sobrepostas a [data_reserva, data_fim)"""
+        session = db_manager.get_session()
+        try:
+            return set(session.execute(
+                select(Reserva.mesa_id).where(
+                    Reserva.mesa_id.in_(mesa_ids),
+                    _conflito_intervalo(data_reserva, data_fim)
+                )
+            ).scalars())
+        finally:
+            db_manager.close_session(session)
+    
+    def create_many(self, reservas: List[Reserva]) -> List[Reserva]:
+        """Cria várias reservas numa única transação (todas ou nenhuma)"""
+        session = db_manager.get_session()
+        try:
+            session.add_all(reservas)
+            session.commit()
+            for reserva in reservas:
+                session.refresh(reserva)
+            return reservas
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error creating {len(reservas)} reservations: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    @staticmethod
+    def _conflitos_lote(session, reservas: List[Reserva]) -> List[Tuple[int, Reserva]]:
+        """
+        Conflitos de um lote com reservas existentes, numa única consulta
+        
+        Procura as reservas das mesas do lote na janela entre o primeiro início
+        e o último fim e confirma a sobreposição em memória para cada pedido.
+        Cada pedido aparece no máximo uma vez (com a primeira reserva em conflito).
+        """
+        inicio = min(r.data_reserva for r in reservas)
+        fim = max(r.data_fim for r in reservas)
+        existentes = session.execute(
+            select(Reserva).where(
+                Reserva.mesa_id.in_({r.mesa_id for r in reservas}),
+                _conflito_intervalo(inicio, fim)
+            )
+        ).scalars().all()
+        
+        por_mesa: Dict[int, List[Reserva]] = {}
+        for existente in sorted(existentes, key=lambda r: r.data_reserva):
+            por_mesa.setdefault(existente.mesa_id, []).append(existente)
+        
+        conflitos = []
+        for i, reserva in enumerate(reservas):
+            existente = next((
+                e for e in por_mesa.get(reserva.mesa_id, ())
+                if e.data_reserva < reserva.data_fim and e.data_fim > reserva.data_reserva
+            ), None)
+            if existente is not None:
+                conflitos.append((i, existente))
+        return conflitos
+    
+    def get_batch_conflicts(self, reservas: List[Reserva]) -> List[Tuple[int, Reserva]]:
+        """Pares (índice no lote, reserva existente) em conflito com o lote"""
+        if not reservas:
+            return []
+        session = db_manager.get_session()
+        try:
+            return self._conflitos_lote(session, reservas)
+        finally:
+            db_manager.close_session(session)
+    
+    def create_batch(self, reservas: List[Reserva]) -> Tuple[List[Reserva], List[Tuple[int, Reserva]]]:
+        """
+        Verifica conflitos e cria um lote de reservas na mesma transação
+        
+        Args:
+            reservas: Reservas a criar (com data_fim preenchida)
+            
+        Returns:
+            (reservas criadas, []) ou ([], [(índice no lote, reserva existente em conflito)])
+        """
+        session = db_manager.get_session()
+        try:
+            _bloquear_mesas(session, {r.mesa_id for r in reservas})
+            conflitos = self._conflitos_lote(session, reservas)
+            if conflitos:
+                session.rollback()
+                return [], conflitos
+            
+            # Os valores já estão todos nos objetos: evita um SELECT por reserva depois do commit
+            session.expire_on_commit = False
+            session.add_all(reservas)
+            session.commit()
+            return reservas, []
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error creating batch of {len(reservas)} reservations: {e}")
+            return [], []
+        finally:
+            session.expire_on_commit = True
+            db_manager.close_session(session)
+    
+    def finalize_batch(self, data_limite: datetime, batch_size: int) -> int:
+        """
+        Marca como 'finalizada' um lote de reservas confirmadas já passadas
+        
+        Executa um único UPDATE por lote, limitado por uma subquery de IDs.
+        
+        Args:
+            data_limite: Finaliza reservas com data_fim anterior a esta data
+            batch_size: Número máximo de reservas por lote
+            
+        Returns:
+            Número de reservas atualizadas neste lote
+        """
+        session = db_manager.get_session()
+        try:
+            # data_reserva <= data_fim: o filtro por data_reserva só delimita a pesquisa pelo índice
+            ids = select(Reserva.id).where(
+                Reserva.status == 'confirmada',
+                Reserva.data_reserva < data_limite,
+                Reserva.data_fim < data_limite
+            ).order_by(Reserva.id).limit(batch_size).scalar_subquery()
+            
+            result = session.execute(
+                update(Reserva.__table__)
+                .where(Reserva.__table__.c.id.in_(ids))
+                .values(status='finalizada')
+            )
+            session.commit()
+            return result.rowcount or 0
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error finalizing reservations: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class ReservaArquivoRepository(BaseRepository):
+    """Repositório para o arquivo de reservas antigas"""
+    
+    # Estados que podem ser arquivados (nunca reservas confirmadas)
+    ARCHIVABLE_STATUS = ('cancelada', 'finalizada')
+    
+    def __init__(self):
+        super().__init__(ReservaArquivo)
+    
+    def get_by_cliente(self, cliente_id: int) -> List[ReservaArquivo]:
+        """Busca reservas arquivadas por cliente"""
+        session = db_manager.get_session()
+        try:
+            return session.query(ReservaArquivo).filter(
+                ReservaArquivo.cliente_id == cliente_id
+            ).order_by(ReservaArquivo.data_reserva.desc()).all()
+        except Exception as e:
+            logger.error(f"Error getting archived reservations by client {cliente_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_by_periodo(self, data_inicio: datetime, data_fim: datetime) -> List[ReservaArquivo]:
+        """Busca reservas arquivadas com data_inicio <= data_reserva < data_fim"""
+        session = db_manager.get_session()
+        try:
+            return session.query(ReservaArquivo).filter(
+                ReservaArquivo.data_reserva >= data_inicio,
+                ReservaArquivo.data_reserva < data_fim
+            ).order_by(ReservaArquivo.data_reserva).all()
+        except Exception as e:
+            logger.error(f"Error getting archived reservations by period: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_by_restaurante(self, restaurante_id: int) -> List[ReservaArquivo]:
+        """Busca reservas arquivadas por restaurante"""
+        session = db_manager.get_session()
+        try:
+            return session.query(ReservaArquivo).join(
+                Mesa, Mesa.id == ReservaArquivo.mesa_id
+            ).join(Ambiente).filter(
+                Ambiente.restaurante_id == restaurante_id
+            ).order_by(ReservaArquivo.data_reserva.desc()).all()
+        except Exception as e:
+            logger.error(f"Error getting archived reservations by restaurant {restaurante_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_rows_by_cliente(self, cliente_id: int) -> List[ReservaRow]:
+        """Busca reservas arquivadas por cliente como linhas de leitura"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, ReservaArquivo).where(
+                ReservaArquivo.cliente_id == cliente_id
+            ).order_by(ReservaArquivo.data_reserva.desc()))
+        except Exception as e:
+            logger.error(f"Error getting archived reservation rows by client {cliente_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_rows_by_restaurante(self, restaurante_id: int) -> List[ReservaRow]:
+        """Busca reservas arquivadas por restaurante como linhas de leitura"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, ReservaArquivo).join(
+                Mesa, Mesa.id == ReservaArquivo.mesa_id
+            ).join(Ambiente).where(
+                Ambiente.restaurante_id == restaurante_id
+            ).order_by(ReservaArquivo.data_reserva.desc()))
+        except Exception as e:
+            logger.error(f"Error getting archived reservation rows by restaurant {restaurante_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_rows_by_periodo(self, data_inicio: datetime, data_fim: datetime) -> List[ReservaRow]:
+        """Busca reservas arquivadas com data_inicio <= data_reserva < data_fim como linhas de leitura"""
+        session = db_manager.get_session()
+        try:
+            return fetch_rows(session, ReservaRow, select_row(ReservaRow, ReservaArquivo).where(
+                ReservaArquivo.data_reserva >= data_inicio,
+                ReservaArquivo.data_reserva < data_fim
+            ).order_by(ReservaArquivo.data_reserva))
+        except Exception as e:
+            logger.error(f"Error getting archived reservation rows by period: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def archive_batch(self, data_limite: datetime, batch_size: int) -> int:
+        """
+        Move um lote de reservas antigas de 'reservas' para 'reservas_arquivo'
+        
+        A cópia, a remoção e o registo das remoções (ReservaRemovida, para o
+        snapshot analítico) são feitos na mesma transação.
+        
+        Args:
+            data_limite: Arquiva reservas com data_reserva anterior a esta data
+            batch_size: Número máximo de reservas por lote
+            
+        Returns:
+            Número de reservas arquivadas neste lote
+        """
+        session = db_manager.get_session()
+        try:
+            ids = session.execute(
+                select(Reserva.id).where(
+                    Reserva.data_reserva < data_limite,
+                    Reserva.status.in_(self.ARCHIVABLE_STATUS)
+                ).order_by(Reserva.id).limit(batch_size)
+            ).scalars().all()
+            
+            if not ids:
+                return 0
+            
+            reservas = Reserva.__table__
+            arquivo = ReservaArquivo.__table__
+            colunas = [c.name for c in arquivo.columns if c.name in reservas.c]
+            
+            session.execute(
+                insert(arquivo).from_select(
+                    colunas + ['data_arquivo'],
+                    select(*[reservas.c[c] for c in colunas], literal(datetime.utcnow()))
+                    .where(reservas.c.id.in_(ids))
+                )
+            )
+            session.execute(delete(reservas).where(reservas.c.id.in_(ids)))
+            session.execute(insert(ReservaRemovida), [{'reserva_id': reserva_id} for reserva_id in ids])
+            session.commit()
+            return len(ids)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error archiving reservations: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class ReservaRemovidaRepository:
+    """Repositório das remoções de reservas, lidas pelo snapshot analítico"""
+    
+    def get_after(self, ultimo_id: int, limite: int) -> List[ReservaRemovida]:
+        """Remoções com id > ultimo_id, pela ordem em que foram registadas"""
+        session = db_manager.get_session()
+        try:
+            return session.query(ReservaRemovida).filter(
+                ReservaRemovida.id > ultimo_id
+            ).order_by(ReservaRemovida.id).limit(limite).all()
+        except Exception as e:
+            logger.error(f"Error reading removed reservations after {ultimo_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_ultimo_id(self) -> int:
+        """Id da remoção mais recente (0 se não houver)"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(select(func.max(ReservaRemovida.id))).scalar() or 0
+        except Exception as e:
+            logger.error(f"Error getting last removed reservation: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+    
+    def get_existentes(self, reserva_ids: List[int]) -> set:
+        """Ids (dos indicados) que ainda existem na tabela reservas"""
+        # Sem captura de erros: um conjunto vazio retiraria todas as linhas do snapshot
+        session = db_manager.get_session()
+        try:
+            return set(session.execute(
+                select(Reserva.id).where(Reserva.id.in_(reserva_ids))
+            ).scalars())
+        finally:
+            db_manager.close_session(session)
+    
+    def purge(self, ate_id: int) -> int:
+        """Remove as remoções já aplicadas (id <= ate_id)"""
+        session = db_manager.get_session()
+        try:
+            result = session.execute(delete(ReservaRemovida).where(ReservaRemovida.id <= ate_id))
+            session.commit()
+            return result.rowcount
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error purging removed reservations: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class ListaEsperaRepository(BaseRepository):
+    """Repositório para operações com a lista de espera"""
+    
+    def __init__(self):
+        super().__init__(ListaEspera)
+    
+    def get_ativas_by_cliente(self, cliente_id: int) -> List[ListaEspera]:
+        """Busca pedidos ativos de um cliente"""
+        session = db_manager.get_session()
+        try:
+            return session.query(ListaEspera).filter(
+                ListaEspera.cliente_id == cliente_id,
+                ListaEspera.status == 'ativa'
+            ).order_by(ListaEspera.data_reserva).all()
+        except Exception as e:
+            logger.error(f"Error getting waitlist entries for client {cliente_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_ativa(self, cliente_id: int, ambiente_id: int, data_reserva: datetime) -> Optional[ListaEspera]:
+        """Busca o pedido ativo de um cliente para um ambiente e horário"""
+        session = db_manager.get_session()
+        try:
+            return session.query(ListaEspera).filter(
+                ListaEspera.ambiente_id == ambiente_id,
+                ListaEspera.data_reserva == data_reserva,
+                ListaEspera.status == 'ativa',
+                ListaEspera.cliente_id == cliente_id
+            ).first()
+        except Exception as e:
+            logger.error(f"Error getting waitlist entry: {e}")
+            return None
+        finally:
+            db_manager.close_session(session)
+    
+    def count_ativas(self, ambiente_id: int, data_reserva: datetime) -> int:
+        """Conta os pedidos ativos para um ambiente e horário"""
+        session = db_manager.get_session()
+        try:
+            return session.query(func.count(ListaEspera.id)).filter(
+                ListaEspera.ambiente_id == ambiente_id,
+                ListaEspera.data_reserva == data_reserva,
+                ListaEspera.status == 'ativa'
+            ).scalar() or 0
+        except Exception as e:
+            logger.error(f"Error counting waitlist entries: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class BloqueioMesaRepository(BaseRepository):
+    """Repositório para bloqueios temporários de mesas (modo multi-processo)"""
+    
+    def __init__(self):
+        super().__init__(BloqueioMesa)
+    
+    @staticmethod
+    def _ativos(inicio: datetime, fim: datetime, agora: datetime, excluir_token: str = None):
+        """Condições de bloqueios não expirados sobrepostos a [inicio, fim)"""
+        condicoes = [
+            BloqueioMesa.data_reserva < fim,
+            BloqueioMesa.data_fim > inicio,
+            BloqueioMesa.expira_em > agora
+        ]
+        if excluir_token is not None:
+            condicoes.append(BloqueioMesa.token != excluir_token)
+        return and_(*condicoes)
+    
+    def acquire(self, bloqueios: List[BloqueioMesa], agora: datetime) -> bool:
+        """
+        Grava os bloqueios de um token, substituindo os anteriores, se nenhuma
+        das mesas estiver bloqueada por outro token (numa só transação)
+        
+        A verificação corre depois de a transação obter o bloqueio de escrita,
+        para dois processos não poderem bloquear a mesma mesa.
+        """
+        if not bloqueios:
+            return False
+        token = bloqueios[0].token
+        session = db_manager.get_session()
+        try:
+            # Em SQLite a transação só fica com o bloqueio de escrita no primeiro
+            # DELETE/INSERT: remover primeiro os bloqueios do próprio token serializa
+            # as aquisições. Nos outros dialetos, bloquear as linhas das mesas.
+            session.execute(delete(BloqueioMesa).where(BloqueioMesa.token == token))
+            session.execute(
+                select(Mesa.id)
+                .where(Mesa.id.in_({b.mesa_id for b in bloqueios}))
+                .order_by(Mesa.id)
+                .with_for_update()
+            ).all()
+            
+            for bloqueio in bloqueios:
+                conflito = session.query(BloqueioMesa.id).filter(
+                    BloqueioMesa.mesa_id == bloqueio.mesa_id,
+                    self._ativos(bloqueio.data_reserva, bloqueio.data_fim, agora, token)
+                ).first()
+                if conflito:
+                    session.rollback()
+                    return False
+            
+            session.add_all(bloqueios)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error acquiring table holds: {e}")
+            return False
+        finally:
+            db_manager.close_session(session)
+    
+    def release(self, token: str) -> int:
+        """Remove os bloqueios de um token"""
+        session = db_manager.get_session()
+        try:
+            result = session.execute(delete(BloqueioMesa).where(BloqueioMesa.token == token))
+            session.commit()
+            return result.rowcount
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error releasing table holds: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+    
+    def get_ativos(self, inicio: datetime, fim: datetime, agora: datetime,
+                   excluir_token: str = None) -> List[BloqueioMesa]:
+        """Bloqueios não expirados sobrepostos a [inicio, fim)"""
+        session = db_manager.get_session()
+        try:
+            return session.query(BloqueioMesa).filter(
+                self._ativos(inicio, fim, agora, excluir_token)
+            ).all()
+        except Exception as e:
+            logger.error(f"Error getting table holds: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def purge_expired(self, agora: datetime) -> int:
+        """Apaga os bloqueios expirados (pelo índice em expira_em)"""
+        session = db_manager.get_session()
+        try:
+            result = session.execute(delete(BloqueioMesa).where(BloqueioMesa.expira_em <= agora))
+            session.commit()
+            return result.rowcount
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error purging expired table holds: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class ChaveIdempotenciaRepository:
+    """Repositório das chaves de idempotência (PK (chave, operacao); expiram em expira_em)"""
+    
+    def get_reserva(self, chave: str, operacao: str, cliente_id: int, agora: datetime) -> Optional[Reserva]:
+        """Reserva associada a uma chave válida do cliente (uma só query)"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(
+                select(Reserva).join(ChaveIdempotencia, ChaveIdempotencia.recurso_id == Reserva.id).where(
+                    ChaveIdempotencia.chave == chave,
+                    ChaveIdempotencia.operacao == operacao,
+                    ChaveIdempotencia.expira_em > agora,
+                    Reserva.cliente_id == cliente_id
+                )
+            ).scalars().first()
+        except Exception as e:
+            logger.error(f"Error getting reservation for idempotency key {chave}: {e}")
+            return None
+        finally:
+            db_manager.close_session(session)
+    
+    def existe(self, chave: str, operacao: str, recurso_id: int, agora: datetime) -> bool:
+        """Verifica se a chave válida já foi usada para o recurso indicado"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(
+                select(ChaveIdempotencia.recurso_id).where(
+                    ChaveIdempotencia.chave == chave,
+                    ChaveIdempotencia.operacao == operacao,
+                    ChaveIdempotencia.recurso_id == recurso_id,
+                    ChaveIdempotencia.expira_em > agora
+                )
+            ).first() is not None
+        except Exception as e:
+            logger.error(f"Error checking idempotency key {chave}: {e}")
+            return False
+        finally:
+            db_manager.close_session(session)
+    
+    @staticmethod
+    def get_recurso_id(session, chave: ChaveIdempotencia) -> Optional[int]:
+        """Recurso associado à chave gravada (qualquer cliente), na sessão indicada"""
+        return session.execute(
+            select(ChaveIdempotencia.recurso_id).where(
+                ChaveIdempotencia.chave == chave.chave,
+                ChaveIdempotencia.operacao == chave.operacao
+            )
+        ).scalar()
+    
+    @staticmethod
+    def substituir_expirada(session, chave: ChaveIdempotencia):
+        """Remove, na transação indicada, uma chave igual já expirada (para poder ser reutilizada)"""
+        session.execute(delete(ChaveIdempotencia).where(
+            ChaveIdempotencia.chave == chave.chave,
+            ChaveIdempotencia.operacao == chave.operacao,
+            ChaveIdempotencia.expira_em <= datetime.now()
+        ))
+    
+    def purge_expired(self, agora: datetime) -> int:
+        """Remove as chaves expiradas"""
+        session = db_manager.get_session()
+        try:
+            result = session.execute(delete(ChaveIdempotencia).where(ChaveIdempotencia.expira_em <= agora))
+            session.commit()
+            return result.rowcount
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error purging expired idempotency keys: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class EventoOutboxRepository:
+    """Repositório do outbox de eventos de domínio e dos checkpoints dos consumidores"""
+    
+    @staticmethod
+    def registar(connection, eventos: List[Dict]):
+        """Grava os eventos na transação da ligação indicada (um INSERT com vários valores)"""
+        if eventos:
+            connection.execute(insert(EventoOutbox), eventos)
+    
+    def get_after(self, ultimo_id: int, limite: int, tipos: Optional[List[str]] = None) -> List[EventoOutbox]:
+        """Eventos com id > ultimo_id, pela ordem em que foram gravados (intervalo na chave primária)"""
+        session = db_manager.get_session()
+        try:
+            query = session.query(EventoOutbox).filter(EventoOutbox.id > ultimo_id)
+            if tipos:
+                query = query.filter(EventoOutbox.tipo.in_(tipos))
+            return query.order_by(EventoOutbox.id).limit(limite).all()
+        except Exception as e:
+            logger.error(f"Error reading outbox events after {ultimo_id}: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def get_ultimo_id(self) -> int:
+        """Id do evento mais recente (0 se o outbox estiver vazio)"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(select(func.max(EventoOutbox.id))).scalar() or 0
+        except Exception as e:
+            logger.error(f"Error getting last outbox event: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+    
+    def get_checkpoint(self, consumidor: str) -> int:
+        """Último evento confirmado pelo consumidor (0 se nunca leu)"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(
+                select(CheckpointOutbox.ultimo_evento_id).where(CheckpointOutbox.consumidor == consumidor)
+            ).scalar() or 0
+        except Exception as e:
+            logger.error(f"Error getting outbox checkpoint for {consumidor}: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+    
+    def set_checkpoint(self, consumidor: str, ultimo_evento_id: int) -> bool:
+        """Guarda o checkpoint do consumidor (nunca recua)"""
+        session = db_manager.get_session()
+        try:
+            checkpoint = session.get(CheckpointOutbox, consumidor)
+            if checkpoint is None:
+                session.add(CheckpointOutbox(consumidor=consumidor, ultimo_evento_id=ultimo_evento_id))
+            elif ultimo_evento_id > checkpoint.ultimo_evento_id:
+                checkpoint.ultimo_evento_id = ultimo_evento_id
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving outbox checkpoint for {consumidor}: {e}")
+            return False
+        finally:
+            db_manager.close_session(session)
+    
+    def get_checkpoints(self) -> List[CheckpointOutbox]:
+        """Checkpoints de todos os consumidores"""
+        session = db_manager.get_session()
+        try:
+            return session.query(CheckpointOutbox).order_by(CheckpointOutbox.consumidor).all()
+        except Exception as e:
+            logger.error(f"Error getting outbox checkpoints: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def purge(self, antes_de: datetime) -> int:
+        """
+        Remove eventos anteriores a antes_de já lidos por todos os consumidores
+        
+        O evento mais recente nunca é removido: em tabelas SQLite criadas sem
+        AUTOINCREMENT, uma tabela vazia voltaria a numerar os eventos a partir
+        de 1, abaixo dos checkpoints existentes.
+        """
+        session = db_manager.get_session()
+        try:
+            minimo = session.execute(select(func.min(CheckpointOutbox.ultimo_evento_id))).scalar()
+            ultimo_id = session.execute(select(func.max(EventoOutbox.id))).scalar()
+            if minimo is None or ultimo_id is None:
+                return 0
+            result = session.execute(delete(EventoOutbox).where(
+                EventoOutbox.id <= min(minimo, ultimo_id - 1),
+                EventoOutbox.criado_em < antes_de
+            ))
+            session.commit()
+            return result.rowcount
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error purging outbox events: {e}")
+            return 0
+        finally:
+            db_manager.close_session(session)
+
+
+class NotificacaoRepository(BaseRepository):
+    """Repositório da fila de notificações aos clientes"""
+    
+    def __init__(self):
+        super().__init__(Notificacao)
+    
+    def get_destinatarios(self, cliente_ids: List[int], mesa_ids: List[int]) -> Tuple[Dict[int, Tuple[str, str]],
+                                                                                   Dict[int, Tuple[str, str]]]:
+        """
+        Dados para compor as mensagens de um lote de eventos (duas consultas)
+        
+        Returns:
+            ({cliente_id: (nome, email)}, {mesa_id: (número da mesa, nome do restaurante)})
+        """
+        session = db_manager.get_session()
+        try:
+            clientes = {
+                id: (nome, email) for id, nome, email in session.execute(
+                    select(Cliente.id, Cliente.nome, Cliente.email).where(Cliente.id.in_(set(cliente_ids)))
+                )
+            }
+            mesas = {
+                id: (numero, restaurante) for id, numero, restaurante in session.execute(
+                    select(Mesa.id, Mesa.numero, Restaurante.nome)
+                    .join(Ambiente, Mesa.ambiente_id == Ambiente.id)
+                    .join(Restaurante, Ambiente.restaurante_id == Restaurante.id)
+                    .where(Mesa.id.in_(set(mesa_ids)))
+                )
+            }
+            return clientes, mesas
+        except Exception as e:
+            logger.error(f"Error loading notification recipients: {e}")
+            return {}, {}
+        finally:
+            db_manager.close_session(session)
+    
+    def enfileirar(self, notificacoes: List[Notificacao], cancelar_lembretes: List[int],
+                   consumidor: str, checkpoint_lido: int, ultimo_evento_id: int) -> bool:
+        """
+        Grava as notificações de um lote de eventos do outbox e avança o checkpoint
+        do consumidor na mesma transação (cada evento gera as mensagens uma só vez)
+        
+        O checkpoint só avança se ainda for checkpoint_lido; se outro processo
+        já tiver tratado o lote, nada é gravado.
+        
+        Args:
+            cancelar_lembretes: Reservas cujos lembretes pendentes deixam de ser enviados
+            checkpoint_lido: Checkpoint a partir do qual o lote foi lido
+            
+        Returns:
+            True se o lote foi gravado
+        """
+        session = db_manager.get_session()
+        try:
+            # Primeira escrita da transação: em SQLite obtém já o bloqueio de escrita
+            avancou = session.execute(
+                update(CheckpointOutbox)
+                .where(
+                    CheckpointOutbox.consumidor == consumidor,
+                    CheckpointOutbox.ultimo_evento_id == checkpoint_lido
+                )
+                .values(ultimo_evento_id=ultimo_evento_id, atualizado_em=datetime.utcnow())
+            ).rowcount
+            if not avancou:
+                if checkpoint_lido or session.get(CheckpointOutbox, consumidor) is not None:
+                    session.rollback()
+                    logger.info(f"Outbox batch after event {checkpoint_lido} already enqueued by another process")
+                    return False
+                session.add(CheckpointOutbox(consumidor=consumidor, ultimo_evento_id=ultimo_evento_id))
+            
+            if cancelar_lembretes:
+                session.execute(
+                    update(Notificacao)
+                    .where(
+                        Notificacao.reserva_id.in_(set(cancelar_lembretes)),
+                        Notificacao.tipo == 'lembrete',
+                        Notificacao.estado == 'pendente'
+                    )
+                    .values(estado='cancelada')
+                )
+            session.add_all(notificacoes)
+            session.commit()
+            return True
+        except IntegrityError:
+            # Checkpoint criado em simultâneo por outro processo
+            session.rollback()
+            logger.info(f"Outbox batch after event {checkpoint_lido} already enqueued by another process")
+            return False
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error enqueuing notifications: {e}")
+            return False
+        finally:
+            db_manager.close_session(session)
+    
+    def reservar_pendentes(self, agora: datetime, limite: int, envio: str,
+                           reservada_ate: datetime) -> List[Notificacao]:
+        """
+        Reserva para um envio as próximas notificações disponíveis e devolve-as
+        
+        Ficam em 'enviando' até reservada_ate; as de um envio interrompido
+        voltam a ser reservadas quando esse prazo passa. A condição de estado
+        é repetida no UPDATE para dois envios simultâneos não reservarem as
+        mesmas notificações.
+        """
+        disponiveis = or_(
+            and_(Notificacao.estado == 'pendente', Notificacao.enviar_apos <= agora),
+            and_(Notificacao.estado == 'enviando', Notificacao.enviar_apos <= agora)
+        )
+        session = db_manager.get_session()
+        try:
+            ids = select(Notificacao.id).where(disponiveis).order_by(
+                Notificacao.enviar_apos
+            ).limit(limite).scalar_subquery()
+            session.execute(
+                update(Notificacao.__table__)
+                .where(Notificacao.__table__.c.id.in_(ids), disponiveis)
+                .values(estado='enviando', enviar_apos=reservada_ate, reservada_por=envio)
+            )
+            session.commit()
+            return session.query(Notificacao).filter(
+                Notificacao.estado == 'enviando',
+                Notificacao.reservada_por == envio
+            ).order_by(Notificacao.id).all()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error reserving pending notifications: {e}")
+            return []
+        finally:
+            db_manager.close_session(session)
+    
+    def registar_envios(self, enviadas: List[int], falhas: List[Dict], agora: datetime, envio: str) -> bool:
+        """
+        Grava o resultado de um lote de envios numa transação
+        
+        Só são alteradas as notificações ainda reservadas pelo envio indicado.
+        
+        Args:
+            enviadas: IDs das notificações entregues
+            falhas: dicts com id, estado ('pendente' ou 'falhada'), tentativas,
+                    enviar_apos (próxima tentativa) e ultimo_erro
+        """
+        reservada = and_(Notificacao.estado == 'enviando', Notificacao.reservada_por == envio)
+        session = db_manager.get_session()
+        try:
+            if enviadas:
+                session.execute(
+                    update(Notificacao)
+                    .where(Notificacao.id.in_(enviadas), reservada)
+                    .values(estado='enviada', enviada_em=agora, tentativas=Notificacao.tentativas + 1)
+                )
+            for falha in falhas:
+                dados = {k: v for k, v in falha.items() if k != 'id'}
+                session.execute(update(Notificacao).where(Notificacao.id == falha['id'], reservada).values(**dados))
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving notification delivery results: {e}")
+            return False
+        finally:
+            db_manager.close_session(session)
+    
+    def count_by_estado(self) -> Dict[str, int]:
+        """Número de notificações por estado"""
+        session = db_manager.get_session()
+        try:
+            return dict(session.execute(
+                select(Notificacao.estado, func.count()).group_by(Notificacao.estado)
+            ).all())
+        except Exception as e:
+            logger.error(f"Error counting notifications: {e}")
+            return {}
+        finally:
+            db_manager.close_session(session)
+
+
+class VersaoCacheRepository:
+    """Repositório dos contadores de versão usados na invalidação de caches"""
+    
+    def get_versao(self, nome: str) -> Optional[int]:
+        """Versão atual do conjunto de dados (0 se nunca foi alterado, None em caso de erro)"""
+        session = db_manager.get_session()
+        try:
+            return session.execute(
+                select(VersaoCache.versao).where(VersaoCache.nome == nome)
+            ).scalar() or 0
+        except Exception as e:
+            logger.error(f"Error getting cache version {nome}: {e}")
+            return None
+        finally:
+            db_manager.close_session(session)
+    
+    @staticmethod
+    def incrementar(connection, nome: str):
+        """Incrementa a versão na transação da ligação indicada (cria o contador se não existir)"""
+        result = connection.execute(
+            update(VersaoCache).where(VersaoCache.nome == nome).values(versao=VersaoCache.versao + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(VersaoCache).values(nome=nome, versao=1))
 
 
 # Instâncias dos repositórios
@@ -180,4 +1589,12 @@ cliente_repo = ClienteRepository()
 restaurante_repo = RestauranteRepository()
 ambiente_repo = AmbienteRepository()
 mesa_repo = MesaRepository()
-reserva_repo = ReservaRepository()
\ No newline at end of file
+reserva_repo = ReservaRepository()
+reserva_arquivo_repo = ReservaArquivoRepository()
+reserva_removida_repo = ReservaRemovidaRepository()
+lista_espera_repo = ListaEsperaRepository()
+bloqueio_mesa_repo = BloqueioMesaRepository()
+chave_idempotencia_repo = ChaveIdempotenciaRepository()
+evento_outbox_repo = EventoOutboxRepository()
+notificacao_repo = NotificacaoRepository()
+versao_cache_repo = VersaoCacheRepository()
@@ -0,0 +1,171 @@
+"""
+Comandos de manutenção da aplicação
+
+Uso:
+    python manage.py arquivar [--dias N] [--lote N]
+    python manage.py finalizar [--lote N]
+    python manage.py worker [--intervalo SEGUNDOS]
+    python manage.py snapshot [--lote N]
+    python manage.py notificar [--continuo]
+    python manage.py servir [--tipo api|streamlit] [--workers N] [--host HOST] [--porta PORTA]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from database.connection import db_manager
+from config import Config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def cmd_arquivar(args):
+    """Move reservas antigas para o arquivo"""
+    from services.maintenance import arquivo_service
+
+    resultado = arquivo_service.arquivar(horizonte_dias=args.dias, batch_size=args.lote)
+    print(f"🗄️ {resultado.linhas} reserva(s) arquivada(s) em {resultado.lotes} lote(s) "
+          f"({resultado.duracao_s:.2f}s)")
+    return 0
+
+
+def cmd_finalizar(args):
+    """Marca reservas confirmadas já passadas como finalizadas"""
+    from services.maintenance import finalizacao_service
+
+    resultado = finalizacao_service.finalizar(batch_size=args.lote)
+    print(f"✅ {resultado.linhas} reserva(s) finalizada(s) em {resultado.lotes} lote(s) "
+          f"({resultado.duracao_s:.2f}s)")
+    return 0
+
+
+def cmd_worker(args):
+    """Executa as tarefas de manutenção periodicamente até Ctrl+C"""
+    from services.maintenance import maintenance_scheduler
+
+    if args.intervalo:
+        maintenance_scheduler.interval_s = args.intervalo
+    maintenance_scheduler.start()
+    print(f"🔄 Worker de manutenção a correr (a cada {maintenance_scheduler.interval_s}s). Ctrl+C para parar.")
+    try:
+        while maintenance_scheduler.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        maintenance_scheduler.stop()
+    return 0
+
+
+def cmd_snapshot(args):
+    """Exporta reservas novas/alteradas para o snapshot Parquet"""
+    from services.snapshot import snapshot_service, SnapshotError
+
+    try:
+        resultado = snapshot_service.export(batch_size=args.lote)
+    except SnapshotError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"📦 {resultado.linhas} reserva(s) exportada(s) para {snapshot_service.base_dir} "
+          f"em {resultado.lotes} lote(s) ({resultado.duracao_s:.2f}s)")
+    return 0
+
+
+def cmd_notificar(args):
+    """Envia as notificações pendentes (uma vez ou continuamente até Ctrl+C)"""
+    from services.notifications import notificacao_service, notificacao_worker
+
+    if args.continuo:
+        notificacao_worker.start()
+        print(f"✉️ Envio de notificações a correr (a cada {notificacao_worker.interval_s}s, "
+              f"transporte {notificacao_service.transporte}). Ctrl+C para parar.")
+        try:
+            while notificacao_worker.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            notificacao_worker.stop()
+        return 0
+
+    resultado = notificacao_service.processar()
+    metricas = notificacao_service.get_metricas()
+    print(f"✉️ {resultado.enviadas} notificação(ões) enviada(s), {resultado.falhas} falha(s) "
+          f"({resultado.duracao_s:.2f}s, {metricas.mensagens_por_s:.1f} mensagens/s)")
+    return 0 if not resultado.desistencias else 1
+
+
+def cmd_servir(args):
+    """Arranca vários processos da API ou do Streamlit sobre a mesma base de dados"""
+    from utils.cluster import iniciar_workers, parar_workers, ClusterError
+
+    porta = args.porta or (Config.API_PORT if args.tipo == 'api' else 8501)
+    try:
+        processos = iniciar_workers(args.tipo, args.workers, args.host, porta)
+    except ClusterError as e:
+        print(f"❌ {e}")
+        return 1
+
+    portas = str(porta) if args.tipo == 'api' else f"{porta}-{porta + args.workers - 1}"
+    print(f"🚀 {args.workers} processo(s) {args.tipo} em {args.host}:{portas}. Ctrl+C para parar.")
+    try:
+        while all(p.poll() is None for p in processos):
+            time.sleep(1)
+        print("⚠️ Um dos processos terminou; a parar os restantes.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        parar_workers(processos)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Comandos de manutenção do sistema de reservas")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    arquivar = subparsers.add_parser("arquivar", help="Arquiva reservas canceladas/finalizadas antigas")
+    arquivar.add_argument("--dias", type=int, default=None, help="Horizonte em dias (padrão: ARCHIVE_HORIZON_DAYS)")
+    arquivar.add_argument("--lote", type=int, default=None, help="Reservas por transação (padrão: ARCHIVE_BATCH_SIZE)")
+    arquivar.set_defaults(func=cmd_arquivar)
+
+    finalizar = subparsers.add_parser("finalizar", help="Finaliza reservas confirmadas já passadas")
+    finalizar.add_argument("--lote", type=int, default=None, help="Reservas por UPDATE (padrão: FINALIZE_BATCH_SIZE)")
+    finalizar.set_defaults(func=cmd_finalizar)
+
+    worker = subparsers.add_parser("worker", help="Executa as tarefas de manutenção periodicamente")
+    worker.add_argument("--intervalo", type=int, default=None, help="Segundos entre execuções (padrão: FINALIZE_INTERVAL_SECONDS)")
+    worker.set_defaults(func=cmd_worker)
+
+    snapshot = subparsers.add_parser("snapshot", help="Exporta o snapshot analítico em Parquet")
+    snapshot.add_argument("--lote", type=int, default=None, help="Reservas por query (padrão: SNAPSHOT_BATCH_SIZE)")
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    notificar = subparsers.add_parser("notificar", help="Envia as notificações pendentes aos clientes")
+    notificar.add_argument("--continuo", action="store_true",
+                           help="Continua a enviar a cada NOTIFY_INTERVAL_SECONDS até Ctrl+C")
+    notificar.set_defaults(func=cmd_notificar)
+
+    servir = subparsers.add_parser("servir", help="Arranca vários processos sobre a mesma base de dados")
+    servir.add_argument("--tipo", choices=["api", "streamlit"], default="api", help="Processos a arrancar (padrão: api)")
+    servir.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Número de processos (padrão: núcleos)")
+    servir.add_argument("--host", default=Config.API_HOST, help="Endereço (padrão: API_HOST)")
+    servir.add_argument("--porta", type=int, default=None,
+                        help="Porta da API, ou primeira porta do Streamlit (padrão: API_PORT / 8501)")
+    servir.set_defaults(func=cmd_servir)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if not db_manager.initialize():
+        print("❌ Erro ao inicializar banco de dados!")
+        return 1
+
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,35 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.orm import relationship, validates
+from datetime import datetime, date, timedelta
+from typing import Optional
+from config import Config
 
 Base = declarative_base()
 
+# Origem da numeração dos dias (dia_reserva = dias desde esta data)
+DIA_ORIGEM = date(1970, 1, 1)
+
+# Índice de cada horário de Config.TIME_SLOTS
+SLOT_INDICE = {slot: i for i, slot in enumerate(Config.TIME_SLOTS)}
+
+
+def codificar_dia(dia: date) -> int:
+    """Número inteiro do dia (dias desde 1970-01-01)"""
+    if isinstance(dia, datetime):
+        dia = dia.date()
+    return (dia - DIA_ORIGEM).days
+
+
+def codificar_slot(data_hora: datetime) -> Optional[int]:
+    """Índice do horário em Config.TIME_SLOTS (None se estiver fora da grelha)"""
+    return SLOT_INDICE.get(data_hora.strftime("%H:%M"))
+
+
+def descodificar_dia(dia_reserva: int) -> date:
+    """Data correspondente a um número de dia"""
+    return DIA_ORIGEM + timedelta(days=dia_reserva)
+
 
 class Cliente(Base):
     """Modelo para clientes do sistema"""
@@ -50,18 +75,21 @@ class Restaurante(Base):
     telefone = Column(String(20), nullable=False)
     email = Column(String(100))
     descricao = Column(Text)
+    duracao_reserva_minutos = Column(Integer)  # None usa Config.RESERVATION_DURATION_MINUTES
     ativo = Column(Boolean, default=True)
     data_cadastro = Column(DateTime, default=datetime.utcnow)
     
     # Relacionamentos
     ambientes = relationship("Ambiente", back_populates="restaurante", cascade="all, delete-orphan")
     
-    def __init__(self, nome: str, endereco: str, telefone: str, email: str = None, descricao: str = None):
+    def __init__(self, nome: str, endereco: str, telefone: str, email: str = None, descricao: str = None,
+                 duracao_reserva_minutos: int = None):
         self.nome = nome
         self.endereco = endereco
         self.telefone = telefone
         self.email = email
         self.descricao = descricao
+        self.duracao_reserva_minutos = duracao_reserva_minutos
     
     def __repr__(self):
         return f"<Restaurante(id={self.id}, nome='{self.nome}')>"
@@ -74,6 +102,7 @@ class Restaurante(Base):
             'telefone': self.telefone,
             'email': self.email,
             'descricao': self.descricao,
+            'duracao_reserva_minutos': self.duracao_reserva_minutos,
             'ativo': self.ativo,
             'data_cadastro': self.data_cadastro
         }
@@ -120,17 +149,20 @@ class Mesa(Base):
     capacidade = Column(Integer, nullable=False)
     ambiente_id = Column(Integer, ForeignKey('ambientes.id'), nullable=False)
     ativo = Column(Boolean, default=True)
+    combinavel = Column(Boolean, default=False)  # pode ser juntada a outras mesas do ambiente
     observacoes = Column(Text)
     
     # Relacionamentos
     ambiente = relationship("Ambiente", back_populates="mesas")
     reservas = relationship("Reserva", back_populates="mesa")
     
-    def __init__(self, numero: str, capacidade: int, ambiente_id: int, observacoes: str = None):
+    def __init__(self, numero: str, capacidade: int, ambiente_id: int, observacoes: str = None,
+                 combinavel: bool = False):
         self.numero = numero
         self.capacidade = capacidade
         self.ambiente_id = ambiente_id
         self.observacoes = observacoes
+        self.combinavel = combinavel
     
     def __repr__(self):
         return f"<Mesa(id={self.id}, numero='{self.numero}', capacidade={self.capacidade})>"
@@ -142,6 +174,7 @@ class Mesa(Base):
             'capacidade': self.capacidade,
             'ambiente_id': self.ambiente_id,
             'ativo': self.ativo,
+            'combinavel': self.combinavel,
             'observacoes': self.observacoes
         }
 
@@ -149,28 +182,56 @@ class Mesa(Base):
 class Reserva(Base):
     """Modelo para reservas de mesas"""
     __tablename__ = 'reservas'
+    __table_args__ = (
+        Index('ix_reservas_mesa_intervalo', 'mesa_id', 'data_reserva', 'data_fim', 'status'),
+        Index('ix_reservas_cliente_data', 'cliente_id', 'data_reserva'),
+        Index('ix_reservas_data_status', 'data_reserva', 'status'),
+        Index('ix_reservas_dia_slot', 'dia_reserva', 'slot_reserva', 'status'),
+        Index('ix_reservas_mesa_dia_slot', 'mesa_id', 'dia_reserva', 'slot_reserva'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     cliente_id = Column(Integer, ForeignKey('clientes.id'), nullable=False)
     mesa_id = Column(Integer, ForeignKey('mesas.id'), nullable=False)
     data_reserva = Column(DateTime, nullable=False)
+    data_fim = Column(DateTime)
+    # Codificação inteira de data_reserva (preenchida automaticamente)
+    dia_reserva = Column(Integer)  # dias desde 1970-01-01
+    slot_reserva = Column(Integer)  # índice em Config.TIME_SLOTS (NULL fora da grelha)
     numero_pessoas = Column(Integer, nullable=False)
     observacoes = Column(Text)
     status = Column(String(20), default='confirmada')  # confirmada, cancelada, finalizada
     data_criacao = Column(DateTime, default=datetime.utcnow)
+    data_atualizacao = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamentos
     cliente = relationship("Cliente", back_populates="reservas")
     mesa = relationship("Mesa", back_populates="reservas")
     
     def __init__(self, cliente_id: int, mesa_id: int, data_reserva: datetime, 
-                 numero_pessoas: int, observacoes: str = None):
+                 numero_pessoas: int, observacoes: str = None, data_fim: datetime = None):
         self.cliente_id = cliente_id
         self.mesa_id = mesa_id
         self.data_reserva = data_reserva
+        self.data_fim = data_fim
         self.numero_pessoas = numero_pessoas
         self.observacoes = observacoes
     
+    @validates('data_reserva')
+    def _codificar_data_reserva(self, key, data_reserva: datetime) -> datetime:
+        """Mantém dia_reserva e slot_reserva em sincronia com data_reserva"""
+        if data_reserva is not None:
+            self.dia_reserva = codificar_dia(data_reserva)
+            self.slot_reserva = codificar_slot(data_reserva)
+        return data_reserva
+    
+    @property
+    def duracao_minutos(self) -> Optional[int]:
+        """Duração da reserva em minutos"""
+        if self.data_fim is None:
+            return None
+        return int((self.data_fim - self.data_reserva).total_seconds() // 60)
+    
     def __repr__(self):
         return f"<Reserva(id={self.id}, cliente_id={self.cliente_id}, mesa_id={self.mesa_id}, data={self.data_reserva})>"
     
@@ -180,8 +241,233 @@ class Reserva(Base):
             'cliente_id': self.cliente_id,
             'mesa_id': self.mesa_id,
             'data_reserva': self.data_reserva,
+            'data_fim': self.data_fim,
+            'dia_reserva': self.dia_reserva,
+            'slot_reserva': self.slot_reserva,
+            'numero_pessoas': self.numero_pessoas,
+            'observacoes': self.observacoes,
+            'status': self.status,
+            'data_criacao': self.data_criacao,
+            'data_atualizacao': self.data_atualizacao
+        }
+
+
+class ReservaArquivo(Base):
+    """Modelo para reservas antigas (canceladas/finalizadas) movidas para o arquivo"""
+    __tablename__ = 'reservas_arquivo'
+    __table_args__ = (
+        Index('ix_reservas_arquivo_cliente_data', 'cliente_id', 'data_reserva'),
+        Index('ix_reservas_arquivo_data', 'data_reserva'),
+        Index('ix_reservas_arquivo_mesa', 'mesa_id'),
+    )
+    
+    # Mantém o ID original da reserva
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    cliente_id = Column(Integer, ForeignKey('clientes.id'), nullable=False)
+    mesa_id = Column(Integer, ForeignKey('mesas.id'), nullable=False)
+    data_reserva = Column(DateTime, nullable=False)
+    data_fim = Column(DateTime)
+    numero_pessoas = Column(Integer, nullable=False)
+    observacoes = Column(Text)
+    status = Column(String(20))
+    data_criacao = Column(DateTime)
+    data_atualizacao = Column(DateTime)
+    data_arquivo = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ReservaArquivo(id={self.id}, cliente_id={self.cliente_id}, mesa_id={self.mesa_id}, data={self.data_reserva})>"
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cliente_id': self.cliente_id,
+            'mesa_id': self.mesa_id,
+            'data_reserva': self.data_reserva,
+            'data_fim': self.data_fim,
+            'numero_pessoas': self.numero_pessoas,
+            'observacoes': self.observacoes,
+            'status': self.status,
+            'data_criacao': self.data_criacao,
+            'data_atualizacao': self.data_atualizacao,
+            'data_arquivo': self.data_arquivo
+        }
+
+
+class ReservaRemovida(Base):
+    """Reserva retirada da tabela reservas (apagada ou arquivada), a retirar também do snapshot analítico"""
+    __tablename__ = 'reservas_removidas'
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)  # ordem das remoções
+    reserva_id = Column(Integer, nullable=False)
+    removida_em = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<ReservaRemovida(id={self.id}, reserva_id={self.reserva_id})>"
+
+
+class ListaEspera(Base):
+    """Modelo para pedidos em lista de espera por um horário esgotado"""
+    __tablename__ = 'lista_espera'
+    __table_args__ = (
+        # Promoção: pedido ativo mais antigo de cada número de pessoas que caiba na mesa libertada
+        Index('ix_lista_espera_lugares', 'ambiente_id', 'data_reserva', 'status', 'numero_pessoas', 'data_criacao'),
+        Index('ix_lista_espera_cliente', 'cliente_id', 'status'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cliente_id = Column(Integer, ForeignKey('clientes.id'), nullable=False)
+    ambiente_id = Column(Integer, ForeignKey('ambientes.id'), nullable=False)
+    data_reserva = Column(DateTime, nullable=False)
+    numero_pessoas = Column(Integer, nullable=False)
+    observacoes = Column(Text)
+    status = Column(String(20), default='ativa')  # ativa, promovida, cancelada
+    reserva_id = Column(Integer)  # reserva criada na promoção
+    data_criacao = Column(DateTime, default=datetime.utcnow)
+    data_promocao = Column(DateTime)
+    
+    # Relacionamentos
+    cliente = relationship("Cliente")
+    ambiente = relationship("Ambiente")
+    
+    def __init__(self, cliente_id: int, ambiente_id: int, data_reserva: datetime,
+                 numero_pessoas: int, observacoes: str = None):
+        self.cliente_id = cliente_id
+        self.ambiente_id = ambiente_id
+        self.data_reserva = data_reserva
+        self.numero_pessoas = numero_pessoas
+        self.observacoes = observacoes
+    
+    def __repr__(self):
+        return f"<ListaEspera(id={self.id}, cliente_id={self.cliente_id}, ambiente_id={self.ambiente_id}, data={self.data_reserva})>"
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cliente_id': self.cliente_id,
+            'ambiente_id': self.ambiente_id,
+            'data_reserva': self.data_reserva,
             'numero_pessoas': self.numero_pessoas,
             'observacoes': self.observacoes,
             'status': self.status,
-            'data_criacao': self.data_criacao
-        }
\ No newline at end of file
+            'reserva_id': self.reserva_id,
+            'data_criacao': self.data_criacao,
+            'data_promocao': self.data_promocao
+        }
+
+
+class BloqueioMesa(Base):
+    """Modelo para bloqueios temporários de mesas durante a confirmação de uma reserva"""
+    __tablename__ = 'bloqueios_mesa'
+    __table_args__ = (
+        Index('ix_bloqueios_mesa_intervalo', 'mesa_id', 'data_reserva', 'data_fim'),
+        Index('ix_bloqueios_mesa_expira', 'expira_em'),
+        Index('ix_bloqueios_mesa_token', 'token'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    mesa_id = Column(Integer, ForeignKey('mesas.id'), nullable=False)
+    data_reserva = Column(DateTime, nullable=False)
+    data_fim = Column(DateTime, nullable=False)
+    token = Column(String(64), nullable=False)  # identifica a sessão que fez o bloqueio
+    expira_em = Column(DateTime, nullable=False)
+    
+    def __init__(self, mesa_id: int, data_reserva: datetime, data_fim: datetime,
+                 token: str, expira_em: datetime):
+        self.mesa_id = mesa_id
+        self.data_reserva = data_reserva
+        self.data_fim = data_fim
+        self.token = token
+        self.expira_em = expira_em
+    
+    def __repr__(self):
+        return f"<BloqueioMesa(id={self.id}, mesa_id={self.mesa_id}, data={self.data_reserva}, expira_em={self.expira_em})>"
+
+
+class VersaoCache(Base):
+    """Contador de versão por conjunto de dados, usado para invalidar caches entre processos"""
+    __tablename__ = 'versoes_cache'
+    
+    nome = Column(String(50), primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<VersaoCache(nome='{self.nome}', versao={self.versao})>"
+
+
+class ChaveIdempotencia(Base):
+    """Resultado de um pedido com chave de idempotência, guardado até expira_em"""
+    __tablename__ = 'chaves_idempotencia'
+    __table_args__ = (
+        Index('ix_chaves_idempotencia_expira', 'expira_em'),
+    )
+    
+    chave = Column(String(64), primary_key=True)
+    operacao = Column(String(20), primary_key=True)  # 'criar_reserva' ou 'cancelar_reserva'
+    recurso_id = Column(Integer, nullable=False)  # reserva criada ou cancelada
+    expira_em = Column(DateTime, nullable=False)
+    
+    def __init__(self, chave: str, operacao: str, recurso_id: int, expira_em: datetime):
+        self.chave = chave
+        self.operacao = operacao
+        self.recurso_id = recurso_id
+        self.expira_em = expira_em
+    
+    def __repr__(self):
+        return f"<ChaveIdempotencia(chave='{self.chave}', operacao='{self.operacao}', recurso_id={self.recurso_id})>"
+
+
+class EventoOutbox(Base):
+    """Evento de domínio gravado na mesma transação que a alteração que o originou"""
+    __tablename__ = 'eventos_outbox'
+    # Em SQLite, sem AUTOINCREMENT os ids de eventos removidos podiam ser reutilizados
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)  # posição no fluxo de eventos
+    tipo = Column(String(40), nullable=False)
+    agregado = Column(String(20), nullable=False)  # 'reserva' ou 'mesa'
+    agregado_id = Column(Integer, nullable=False)
+    dados = Column(Text, nullable=False)  # JSON
+    criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<EventoOutbox(id={self.id}, tipo='{self.tipo}', {self.agregado}={self.agregado_id})>"
+
+
+class CheckpointOutbox(Base):
+    """Último evento processado por cada consumidor do outbox"""
+    __tablename__ = 'checkpoints_outbox'
+    
+    consumidor = Column(String(50), primary_key=True)
+    ultimo_evento_id = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CheckpointOutbox(consumidor='{self.consumidor}', ultimo_evento_id={self.ultimo_evento_id})>"
+
+
+class Notificacao(Base):
+    """Mensagem a enviar ao cliente (confirmação, cancelamento, alteração ou lembrete)"""
+    __tablename__ = 'notificacoes'
+    __table_args__ = (
+        # Entrega: mensagens pendentes pela ordem em que ficam disponíveis
+        Index('ix_notificacoes_entrega', 'estado', 'enviar_apos'),
+        Index('ix_notificacoes_reserva', 'reserva_id', 'tipo', 'estado'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    reserva_id = Column(Integer, nullable=False)
+    tipo = Column(String(20), nullable=False)  # confirmacao, cancelamento, alteracao, lembrete
+    destinatario = Column(String(100), nullable=False)
+    assunto = Column(String(200), nullable=False)
+    corpo = Column(Text, nullable=False)
+    estado = Column(String(20), default='pendente', nullable=False)  # pendente, enviando, enviada, falhada, cancelada
+    enviar_apos = Column(DateTime, nullable=False)  # em 'enviando': fim da reserva do envio
+    reservada_por = Column(String(32))  # envio que reservou a notificação
+    tentativas = Column(Integer, default=0, nullable=False)
+    ultimo_erro = Column(Text)
+    criada_em = Column(DateTime, default=datetime.utcnow)
+    enviada_em = Column(DateTime)
+    
+    def __repr__(self):
+        return f"<Notificacao(id={self.id}, tipo='{self.tipo}', reserva_id={self.reserva_id}, estado='{self.estado}')>"
@@ -1,23 +1,41 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from models import Restaurante, Ambiente, Mesa, Reserva, Cliente
+from database.read_models import MesaRow
 from services import (
     restaurante_service, ambiente_service, mesa_service, 
-    reserva_service, cliente_service
+    reserva_service, cliente_service, arquivo_service, maintenance_scheduler,
+    PedidoReserva, LoteReservaError, admission_controller
 )
+from services.allocation import distribuir_pessoas
 from utils.validators import ValidationError
 from utils.streamlit_utils import StreamlitUtils
+from utils.performance import timed, perf_monitor
+from utils.parallel import ParallelLoader
+from utils.session_state import medidor_sessoes
+from services.reports import reporting_engine, SOURCE_DB, SOURCE_SNAPSHOT
+from services.snapshot import snapshot_service, SnapshotError, PARQUET_AVAILABLE
+from services.notifications import notificacao_service, notificacao_worker
 from config import Config
 
 
+# Rótulos de apresentação dos estados de reserva
+STATUS_LABELS = {
+    'confirmada': "✅ Confirmada",
+    'finalizada': "🏁 Finalizada",
+    'cancelada': "❌ Cancelada"
+}
+
+
 class AdminPage:
     """Página administrativa do sistema"""
     
     def __init__(self):
         self.utils = StreamlitUtils()
     
+    @timed("admin.render")
     def render(self):
         """Renderiza a página do administrador com sidebar personalizada"""
         # CSS para página admin
@@ -109,7 +127,8 @@ class AdminPage:
             ("📅", "Reservas"),
             ("👤", "Clientes"),
             ("👥", "Utilizadores"),
-            ("📈", "Relatórios")
+            ("📈", "Relatórios"),
+            ("⏱️", "Desempenho")
         ]
         
         # Estado do menu (usar session_state para persistir)
@@ -163,47 +182,93 @@ class AdminPage:
             self._render_users()
         elif menu == "Relatórios":
             self._render_reports()
+        elif menu == "Desempenho":
+            self._render_performance()
         else:
             st.info(f"Seção {menu} em desenvolvimento")
     
+    @timed("admin.dashboard")
     def _render_dashboard(self):
         """Renderiza o dashboard principal"""
         st.subheader("📊 Dashboard")
         
+        # As secções são independentes: carregadas em paralelo, cada uma com o seu limite de tempo
+        resultados = (
+            ParallelLoader("admin.dashboard")
+            .add("restaurantes", self._dashboard_total_restaurantes)
+            .add("clientes", self._dashboard_total_clientes)
+            .add("reservas_hoje", self._dashboard_reservas_hoje)
+            .add("mesas", self._dashboard_total_mesas)
+            .add("proximas", self._dashboard_proximas_reservas)
+            .run()
+        )
+        
+        def valor(nome: str) -> str:
+            resultado = resultados[nome]
+            return str(resultado.valor) if resultado.ok else "—"
+        
         # Métricas principais
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_restaurants = len(restaurante_service.get_all_restaurantes())
-            st.metric("🏢 Restaurantes", str(total_restaurants))
+            st.metric("🏢 Restaurantes", valor("restaurantes"))
         
         with col2:
-            total_clients = len(cliente_service.get_all_clientes())
-            st.metric("👤 Clientes", str(total_clients))
+            st.metric("👤 Clientes", valor("clientes"))
         
         with col3:
-            # Reservas hoje
-            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            reservas_hoje = reserva_service.get_reservas_by_data(today)
-            active_reservas = [r for r in reservas_hoje if r.status == 'confirmada']
-            st.metric("📅 Reservas Hoje", str(len(active_reservas)))
+            st.metric("📅 Reservas Hoje", valor("reservas_hoje"))
         
         with col4:
-            # Total de mesas
-            total_tables = 0
-            for restaurant in restaurante_service.get_all_restaurantes():
-                for ambiente in ambiente_service.get_ambientes_by_restaurante(restaurant.id):
-                    total_tables += len(mesa_service.get_mesas_by_ambiente(ambiente.id))
-            st.metric("🪑 Total de Mesas", str(total_tables))
+            st.metric("🪑 Total de Mesas", valor("mesas"))
+        
+        indisponiveis = [r.nome for r in resultados.values() if not r.ok]
+        if indisponiveis:
+            st.warning(f"⏳ Algumas secções não carregaram a tempo ({', '.join(indisponiveis)}). Atualize a página para tentar novamente.")
         
         st.divider()
         
         # Reservas próximas
         st.subheader("📅 Próximas Reservas")
         
-        # Buscar reservas dos próximos 7 dias (incluindo hoje)
+        proximas = resultados["proximas"]
+        if not proximas.ok:
+            self.utils.show_info("Próximas reservas indisponíveis de momento.")
+        elif proximas.valor is None:
+            self.utils.show_info("Nenhuma reserva nos próximos 7 dias.")
+        elif proximas.valor:
+            df = pd.DataFrame(proximas.valor)
+            st.dataframe(df, width='stretch')
+        else:
+            self.utils.show_info("Nenhuma reserva encontrada.")
+    
+    @staticmethod
+    def _dashboard_total_restaurantes() -> int:
+        return len(restaurante_service.get_all_restaurantes())
+    
+    @staticmethod
+    def _dashboard_total_clientes() -> int:
+        return len(cliente_service.get_all_clientes())
+    
+    @staticmethod
+    def _dashboard_reservas_hoje() -> int:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        reservas_hoje = reserva_service.get_reservas_by_data(today)
+        # Reservas de hoje já finalizadas continuam a contar
+        return len([r for r in reservas_hoje if r.status in ('confirmada', 'finalizada')])
+    
+    @staticmethod
+    def _dashboard_total_mesas() -> int:
+        total_tables = 0
+        for restaurant in restaurante_service.get_all_restaurantes():
+            for ambiente in ambiente_service.get_ambientes_by_restaurante(restaurant.id):
+                total_tables += len(mesa_service.get_mesas_by_ambiente(ambiente.id))
+        return total_tables
+    
+    @staticmethod
+    def _dashboard_proximas_reservas() -> Optional[List[Dict[str, Any]]]:
+        """Linhas das últimas 10 reservas de hoje e dos próximos 7 dias (None se não houver reservas)"""
         start_date = date.today()
-        end_date = start_date + timedelta(days=7)
         
         reservas_recentes = []
         for i in range(8):  # Hoje + próximos 7 dias
@@ -213,35 +278,31 @@ class AdminPage:
             daily_reservas = reserva_service.get_reservas_by_data(current_datetime)
             reservas_recentes.extend(daily_reservas)
         
-        if reservas_recentes:
-            # Preparar dados para tabela
-            reservas_data = []
-            for reserva in reservas_recentes[-10:]:  # Últimas 10 reservas
-                try:
-                    cliente = cliente_service.get_cliente_by_id(reserva.cliente_id)
-                    mesa = mesa_service.get_mesa_by_id(reserva.mesa_id)
-                    ambiente = ambiente_service.get_ambiente_by_id(mesa.ambiente_id)
-                    restaurante = restaurante_service.get_restaurante_by_id(ambiente.restaurante_id)
-                    
-                    reservas_data.append({
-                        "Data/Hora": reserva.data_reserva.strftime("%d/%m/%Y %H:%M"),
-                        "Cliente": cliente.nome,
-                        "Restaurante": restaurante.nome,
-                        "Mesa": mesa.numero,
-                        "Pessoas": reserva.numero_pessoas,
-                        "Status": reserva.status.capitalize()
-                    })
-                except:
-                    continue
-            
-            if reservas_data:
-                df = pd.DataFrame(reservas_data)
-                st.dataframe(df, width='stretch')
-            else:
-                self.utils.show_info("Nenhuma reserva encontrada.")
-        else:
-            self.utils.show_info("Nenhuma reserva nos próximos 7 dias.")
+        if not reservas_recentes:
+            return None
+        
+        # Preparar dados para tabela
+        reservas_data = []
+        for reserva in reservas_recentes[-10:]:  # Últimas 10 reservas
+            try:
+                cliente = cliente_service.get_cliente_by_id(reserva.cliente_id)
+                mesa = mesa_service.get_mesa_by_id(reserva.mesa_id)
+                ambiente = ambiente_service.get_ambiente_by_id(mesa.ambiente_id)
+                restaurante = restaurante_service.get_restaurante_by_id(ambiente.restaurante_id)
+                
+                reservas_data.append({
+                    "Data/Hora": reserva.data_reserva.strftime("%d/%m/%Y %H:%M"),
+                    "Cliente": cliente.nome,
+                    "Restaurante": restaurante.nome,
+                    "Mesa": mesa.numero,
+                    "Pessoas": reserva.numero_pessoas,
+                    "Status": reserva.status.capitalize()
+                })
+            except:
+                continue
+        return reservas_data
     
+    @timed("admin.restaurantes")
     def _render_restaurants(self):
         """Renderiza gerenciamento de restaurantes"""
         st.subheader("🏪 Gerenciamento de Restaurantes")
@@ -312,6 +373,13 @@ class AdminPage:
             telefone = st.text_input("Telemóvel*", placeholder="213 456 789")
             email = st.text_input("Email", placeholder="contato@restaurante.com")
             descricao = st.text_area("Descrição", placeholder="Descrição do restaurante")
+            duracao = st.number_input(
+                "Duração das reservas (minutos)*",
+                min_value=15,
+                max_value=Config.MAX_RESERVATION_DURATION_MINUTES,
+                value=Config.RESERVATION_DURATION_MINUTES,
+                step=15
+            )
             
             submitted = st.form_submit_button("Registar Restaurante", type="primary")
             
@@ -323,7 +391,8 @@ class AdminPage:
                             endereco=endereco,
                             telefone=telefone,
                             email=email if email else None,
-                            descricao=descricao if descricao else None
+                            descricao=descricao if descricao else None,
+                            duracao_reserva_minutos=int(duracao)
                         )
                         
                         if restaurant:
@@ -347,6 +416,13 @@ class AdminPage:
             telefone = st.text_input("Telemóvel*", value=restaurant.telefone)
             email = st.text_input("Email", value=restaurant.email or "")
             descricao = st.text_area("Descrição", value=restaurant.descricao or "")
+            duracao = st.number_input(
+                "Duração das reservas (minutos)*",
+                min_value=15,
+                max_value=Config.MAX_RESERVATION_DURATION_MINUTES,
+                value=restaurant.duracao_reserva_minutos or Config.RESERVATION_DURATION_MINUTES,
+                step=15
+            )
             
             col1, col2 = st.columns(2)
             with col1:
@@ -362,7 +438,8 @@ class AdminPage:
                         endereco=endereco,
                         telefone=telefone,
                         email=email if email else None,
-                        descricao=descricao if descricao else None
+                        descricao=descricao if descricao else None,
+                        duracao_reserva_minutos=int(duracao)
                     )
                     
                     if updated_restaurant:
@@ -379,6 +456,7 @@ class AdminPage:
                 del st.session_state[f"editing_restaurant_{restaurant.id}"]
                 st.rerun()
     
+    @timed("admin.ambientes")
     def _render_environments(self):
         """Renderiza gerenciamento de ambientes"""
         st.subheader("🏠 Gerenciamento de Ambientes")
@@ -517,6 +595,7 @@ class AdminPage:
                 del st.session_state[f"editing_env_{environment.id}"]
                 st.rerun()
     
+    @timed("admin.mesas")
     def _render_tables(self):
         """Renderiza gerenciamento de mesas"""
         st.subheader("🪑 Gerenciamento de Mesas")
@@ -582,6 +661,7 @@ class AdminPage:
                 table_data.append({
                     "Mesa": table.numero,
                     "Capacidade": f"{table.capacidade} pessoas",
+                    "Combinável": "Sim" if table.combinavel else "Não",
                     "Observações": table.observacoes or "-",
                     "ID": table.id
                 })
@@ -639,6 +719,7 @@ class AdminPage:
             
             numero = st.text_input("Número da Mesa*", placeholder="Ex: 01, A1, etc.")
             capacidade = st.number_input("Capacidade*", min_value=1, max_value=20, value=4)
+            combinavel = st.checkbox("Pode ser combinada com outras mesas (grupos grandes)")
             observacoes = st.text_area("Observações", placeholder="Ex: Mesa próxima à janela")
             
             submitted = st.form_submit_button("Cadastrar Mesa", type="primary")
@@ -650,7 +731,8 @@ class AdminPage:
                             numero=numero,
                             capacidade=capacidade,
                             ambiente_id=environment_id,
-                            observacoes=observacoes if observacoes else None
+                            observacoes=observacoes if observacoes else None,
+                            combinavel=combinavel
                         )
                         
                         if table:
@@ -668,13 +750,16 @@ class AdminPage:
                     # Debug: mostrar traceback no log
                     print(f"Error in _render_new_table_form: {traceback.format_exc()}")
     
-    def _render_edit_table_form(self, table: Mesa):
+    def _render_edit_table_form(self, table: MesaRow):
         """Renderiza formulário de edição de mesa"""
         with st.form(f"edit_table_{table.id}"):
             st.write("**Editar Mesa**")
             
             numero = st.text_input("Número da Mesa*", value=table.numero)
             capacidade = st.number_input("Capacidade*", min_value=1, max_value=20, value=table.capacidade)
+            combinavel = st.checkbox(
+                "Pode ser combinada com outras mesas (grupos grandes)", value=bool(table.combinavel)
+            )
             observacoes = st.text_area("Observações", value=table.observacoes or "")
             
             col1, col2 = st.columns(2)
@@ -689,6 +774,7 @@ class AdminPage:
                         table.id,
                         numero=numero,
                         capacidade=capacidade,
+                        combinavel=combinavel,
                         observacoes=observacoes if observacoes else None
                     )
                     
@@ -706,10 +792,14 @@ class AdminPage:
                 del st.session_state[f"editing_table_{table.id}"]
                 st.rerun()
     
+    @timed("admin.reservas")
     def _render_reservations(self):
         """Renderiza gerenciamento de reservas"""
         st.subheader("📅 Gerenciamento de Reservas")
         
+        self._render_archive_panel()
+        self._render_batch_booking_panel()
+        
         # Filtros
         st.write("**Filtros de Pesquisa**")
         col1, col2 = st.columns(2)
@@ -740,7 +830,7 @@ class AdminPage:
         col3, col4 = st.columns(2)
         
         with col3:
-            status_options = ["Todas", "Confirmadas", "Canceladas"]
+            status_options = ["Todas", "Confirmadas", "Finalizadas", "Canceladas"]
             status_filter = st.selectbox(
                 "Status:",
                 options=status_options,
@@ -756,16 +846,17 @@ class AdminPage:
                 key="reservation_restaurant_filter"
             )
         
-        # Buscar reservas no período selecionado
-        reservations = []
-        current_date = start_date
+        include_archive = st.checkbox(
+            "🗄️ Incluir reservas arquivadas",
+            value=False,
+            key="reservation_include_archive"
+        )
         
+        # Buscar reservas no período selecionado
         with st.spinner(f"🔍 Buscando reservas de {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}..."):
-            while current_date <= end_date:
-                current_datetime = datetime.combine(current_date, datetime.min.time())
-                daily_reservations = reserva_service.get_reservas_by_data(current_datetime)
-                reservations.extend(daily_reservations)
-                current_date += timedelta(days=1)
+            reservations = reserva_service.get_reservas_periodo(
+                start_date, end_date, include_archive=include_archive
+            )
         
         # Aplicar filtros
         if status_filter != "Todas":
@@ -774,8 +865,10 @@ class AdminPage:
         
         if restaurant_filter != "Todos":
             restaurant_id = next(r.id for r in restaurants if r.nome == restaurant_filter)
-            restaurant_reservations = reserva_service.get_reservas_by_restaurante(restaurant_id)
-            reservation_ids = [r.id for r in restaurant_reservations]
+            restaurant_reservations = reserva_service.get_reservas_by_restaurante(
+                restaurant_id, include_archive=include_archive
+            )
+            reservation_ids = {r.id for r in restaurant_reservations}
             reservations = [r for r in reservations if r.id in reservation_ids]
         
         # Exibir reservas
@@ -785,18 +878,21 @@ class AdminPage:
         
         # Estatísticas do período
         confirmadas = [r for r in reservations if r.status == 'confirmada']
+        finalizadas = [r for r in reservations if r.status == 'finalizada']
         canceladas = [r for r in reservations if r.status == 'cancelada']
-        total_pessoas = sum(r.numero_pessoas for r in confirmadas)
+        total_pessoas = sum(r.numero_pessoas for r in confirmadas + finalizadas)
         
         # Métricas
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
             st.metric("Total Reservas", len(reservations))
         with col2:
             st.metric("Confirmadas", len(confirmadas))
         with col3:
-            st.metric("Canceladas", len(canceladas))
+            st.metric("Finalizadas", len(finalizadas))
         with col4:
+            st.metric("Canceladas", len(canceladas))
+        with col5:
             st.metric("Total Pessoas", total_pessoas)
         
         st.divider()
@@ -820,7 +916,7 @@ class AdminPage:
                     "Restaurante": restaurante.nome,
                     "Mesa": mesa.numero,
                     "Pessoas": reservation.numero_pessoas,
-                    "Status": "✅ Confirmada" if reservation.status == 'confirmada' else "❌ Cancelada"
+                    "Status": STATUS_LABELS.get(reservation.status, reservation.status)
                 })
             except:
                 continue
@@ -845,7 +941,7 @@ class AdminPage:
                 ambiente = ambiente_service.get_ambiente_by_id(mesa.ambiente_id)
                 restaurante = restaurante_service.get_restaurante_by_id(ambiente.restaurante_id)
                 
-                status_emoji = "✅" if reservation.status == "confirmada" else "❌"
+                status_emoji = STATUS_LABELS.get(reservation.status, "❔").split()[0]
                 
                 with st.expander(
                     f"{status_emoji} {reservation.data_reserva.strftime('%H:%M')} - {cliente.nome} - {restaurante.nome}",
@@ -876,6 +972,127 @@ class AdminPage:
             except Exception as e:
                 continue
     
+    def _render_archive_panel(self):
+        """Renderiza o painel de manutenção (finalização e arquivo de reservas)"""
+        with st.expander("🛠️ Manutenção de Reservas", expanded=False):
+            st.markdown("**🏁 Finalização automática**")
+            estado = "a correr" if maintenance_scheduler.running else "parada"
+            st.caption(
+                f"Reservas confirmadas terminadas há mais de {Config.FINALIZE_AFTER_MINUTES} minutos "
+                f"passam a 'finalizada' (tarefa {estado}, a cada {maintenance_scheduler.interval_s}s)."
+            )
+            
+            if st.button("🏁 Finalizar Agora", key="run_finalize"):
+                resultado = maintenance_scheduler.run_once()
+                self.utils.show_success(
+                    f"{resultado.linhas} reserva(s) finalizada(s) em {resultado.duracao_s:.2f}s."
+                )
+            
+            historico = maintenance_scheduler.get_historico()
+            if historico:
+                st.dataframe(pd.DataFrame([{
+                    "Executado em": r.executado_em.strftime("%d/%m/%Y %H:%M:%S"),
+                    "Tarefa": r.tarefa,
+                    "Reservas": r.linhas,
+                    "Lotes": r.lotes,
+                    "Duração (s)": round(r.duracao_s, 3)
+                } for r in historico[:10]]), width='stretch', hide_index=True)
+            
+            st.divider()
+            st.markdown("**🗄️ Arquivo**")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Reservas Ativas (tabela principal)", reserva_service.count_reservas())
+            with col2:
+                st.metric("Reservas Arquivadas", arquivo_service.count_arquivadas())
+            
+            st.caption(
+                f"Reservas canceladas ou finalizadas com mais de {Config.ARCHIVE_HORIZON_DAYS} dias "
+                f"são movidas para o arquivo em lotes de {Config.ARCHIVE_BATCH_SIZE}."
+            )
+            
+            if st.button("🗄️ Arquivar Agora", key="run_archive"):
+                with st.spinner("A arquivar reservas..."):
+                    resultado = arquivo_service.arquivar()
+                self.utils.show_success(
+                    f"{resultado.linhas} reserva(s) arquivada(s) em {resultado.lotes} lote(s) "
+                    f"({resultado.duracao_s:.2f}s)."
+                )
+    
+    def _render_batch_booking_panel(self):
+        """Renderiza a reserva de grupos e eventos (várias mesas e horários de uma só vez)"""
+        with st.expander("🎉 Reserva de Grupo / Evento", expanded=False):
+            clientes = cliente_service.get_all_clientes()
+            restaurantes = restaurante_service.get_all_restaurantes()
+            if not clientes or not restaurantes:
+                self.utils.show_info("É necessário ter clientes e restaurantes registados.")
+                return
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                cliente = st.selectbox(
+                    "Cliente:", options=clientes,
+                    format_func=lambda c: f"{c.nome} ({c.email})", key="batch_client"
+                )
+                restaurante = st.selectbox(
+                    "Restaurante:", options=restaurantes,
+                    format_func=lambda r: r.nome, key="batch_restaurant"
+                )
+            with col2:
+                dia = st.date_input(
+                    "Data:", min_value=date.today(),
+                    max_value=date.today() + timedelta(days=90), key="batch_date"
+                )
+                horarios = st.multiselect("Horários:", options=Config.TIME_SLOTS, key="batch_slots")
+            
+            mesas = [
+                m for a in ambiente_service.get_ambientes_by_restaurante(restaurante.id)
+                for m in mesa_service.get_mesas_by_ambiente(a.id)
+            ]
+            selecionadas = st.multiselect(
+                "Mesas:", options=mesas,
+                format_func=lambda m: f"Mesa {m.numero} ({m.capacidade} lugares)", key="batch_tables"
+            )
+            capacidade = sum(m.capacidade for m in selecionadas)
+            numero_pessoas = st.number_input(
+                "Pessoas por horário:", min_value=1, max_value=max(capacidade, 1),
+                value=max(capacidade, 1), key="batch_people"
+            )
+            observacoes = st.text_input("Observações (opcional):", key="batch_notes")
+            
+            if st.button("✅ Reservar Lote", type="primary", key="btn_batch_booking"):
+                if not selecionadas or not horarios:
+                    st.error("❌ Escolha pelo menos uma mesa e um horário.")
+                    return
+                
+                pedidos = [
+                    PedidoReserva(
+                        mesa_id=mesa.id,
+                        data_reserva=datetime.combine(dia, datetime.strptime(horario, "%H:%M").time()),
+                        numero_pessoas=pessoas,
+                        observacoes=observacoes
+                    )
+                    for horario in horarios
+                    for mesa, pessoas in zip(selecionadas, distribuir_pessoas(selecionadas, int(numero_pessoas)))
+                ]
+                try:
+                    reservas = reserva_service.create_batch(cliente.id, pedidos)
+                    if reservas:
+                        self.utils.show_success(f"{len(reservas)} reserva(s) criada(s) para {cliente.nome}.")
+                    else:
+                        self.utils.show_error("Erro ao criar o lote de reservas.")
+                except LoteReservaError as e:
+                    st.error(f"❌ Nenhuma reserva criada: {len(e.conflitos)} pedido(s) em conflito.")
+                    st.dataframe(pd.DataFrame([{
+                        "Pedido": c.indice + 1,
+                        "Mesa": next(m.numero for m in selecionadas if m.id == c.pedido.mesa_id),
+                        "Horário": c.pedido.data_reserva.strftime("%H:%M"),
+                        "Motivo": c.motivo
+                    } for c in e.conflitos]), width='stretch', hide_index=True)
+                except ValidationError as e:
+                    st.error(f"❌ {str(e)}")
+    
+    @timed("admin.clientes")
     def _render_clients(self):
         """Renderiza gerenciamento de clientes"""
         st.subheader("👥 Gerenciamento de Clientes")
@@ -955,6 +1172,7 @@ class AdminPage:
                                 st.session_state[f"editing_client_{client.id}"] = False
                                 st.rerun()
     
+    @timed("admin.relatorios")
     def _render_reports(self):
         """Renderiza relatórios"""
         st.subheader("📊 Relatórios")
@@ -964,16 +1182,64 @@ class AdminPage:
             [
                 "Reservas por Período",
                 "Ocupação por Restaurante",
-                "Clientes Mais Ativos"
+                "Clientes Mais Ativos",
+                "Mapa de Horários"
             ]
         )
         
+        self._render_report_source_selector()
+        
+        try:
+            self._render_selected_report(report_type)
+        except SnapshotError as e:
+            self.utils.show_error(str(e))
+    
+    def _render_report_source_selector(self):
+        """Permite escolher entre a base de dados e o snapshot analítico"""
+        source_labels = {
+            SOURCE_DB: "🗄️ Base de dados (tempo real)",
+            SOURCE_SNAPSHOT: "📦 Snapshot analítico (Parquet)"
+        }
+        source = st.radio(
+            "Fonte de dados:",
+            options=list(source_labels.keys()),
+            format_func=source_labels.get,
+            horizontal=True,
+            key="report_source"
+        )
+        
+        if source == SOURCE_SNAPSHOT:
+            if not PARQUET_AVAILABLE:
+                self.utils.show_warning("Instale o pacote 'pyarrow' para usar o snapshot analítico.")
+                return
+            
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                watermark = snapshot_service.get_watermark()
+                if watermark:
+                    st.caption(f"Snapshot atualizado até {watermark[0].strftime('%d/%m/%Y %H:%M:%S')} (UTC)")
+                else:
+                    st.caption("Snapshot ainda não exportado.")
+            with col2:
+                if st.button("🔄 Atualizar Snapshot", key="refresh_snapshot"):
+                    with st.spinner("A exportar reservas..."):
+                        resultado = snapshot_service.export()
+                    self.utils.show_success(f"{resultado.linhas} reserva(s) exportada(s).")
+    
+    def _report_source(self) -> str:
+        """Fonte de dados selecionada para os relatórios"""
+        return st.session_state.get("report_source", SOURCE_DB)
+    
+    def _render_selected_report(self, report_type: str):
+        """Renderiza o relatório escolhido"""
         if report_type == "Reservas por Período":
             self._render_reservations_report()
         elif report_type == "Ocupação por Restaurante":
             self._render_occupancy_report()
         elif report_type == "Clientes Mais Ativos":
             self._render_top_clients_report()
+        elif report_type == "Mapa de Horários":
+            self._render_slot_heatmap_report()
     
     def _render_reservations_report(self):
         """Relatório de reservas por período"""
@@ -986,44 +1252,28 @@ class AdminPage:
             end_date = st.date_input("Data final:", value=date.today())
         
         if start_date <= end_date:
-            # Buscar reservas no período
-            all_reservations = []
-            current_date = start_date
+            # Buscar reservas no período (incluindo o arquivo)
+            df = reporting_engine.load_reservas(start_date, end_date, source=self._report_source())
             
-            while current_date <= end_date:
-                current_datetime = datetime.combine(current_date, datetime.min.time())
-                daily_reservations = reserva_service.get_reservas_by_data(current_datetime)
-                all_reservations.extend(daily_reservations)
-                current_date += timedelta(days=1)
-            
-            if all_reservations:
-                # Preparar dados para gráfico
-                reservations_by_date = {}
-                reservations_by_status = {"confirmada": 0, "cancelada": 0}
-                
-                for reservation in all_reservations:
-                    date_key = reservation.data_reserva.date()
-                    if date_key not in reservations_by_date:
-                        reservations_by_date[date_key] = 0
-                    reservations_by_date[date_key] += 1
-                    reservations_by_status[reservation.status] += 1
+            if not df.empty:
+                status_counts = reporting_engine.status_counts(df)
+                daily = reporting_engine.daily_counts(df)
                 
                 # Métricas
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Total de Reservas", len(all_reservations))
+                    st.metric("Total de Reservas", len(df))
                 with col2:
-                    st.metric("Confirmadas", reservations_by_status["confirmada"])
+                    st.metric("Confirmadas", int(status_counts["confirmada"]))
                 with col3:
-                    st.metric("Canceladas", reservations_by_status["cancelada"])
+                    st.metric("Finalizadas", int(status_counts["finalizada"]))
+                with col4:
+                    st.metric("Canceladas", int(status_counts["cancelada"]))
                 
-                # Gráfico de linha
-                if reservations_by_date:
-                    chart_data = pd.DataFrame(
-                        list(reservations_by_date.items()),
-                        columns=['Data', 'Reservas']
-                    )
-                    st.line_chart(chart_data.set_index('Data'))
+                # Gráficos de linha
+                st.line_chart(daily[["total"]].rename(columns={"total": "Reservas"}))
+                st.write("**Taxa de confirmação diária (%)**")
+                st.line_chart(daily[["taxa_confirmacao"]].rename(columns={"taxa_confirmacao": "Taxa (%)"}))
             else:
                 self.utils.show_info("Nenhuma reserva encontrada no período selecionado.")
         else:
@@ -1033,70 +1283,32 @@ class AdminPage:
         """Relatório de ocupação por restaurante"""
         st.subheader("Ocupação por Restaurante")
         
-        restaurants = restaurante_service.get_all_restaurantes()
-        
-        if not restaurants:
-            self.utils.show_info("Nenhum restaurante cadastrado.")
-            return
-        
         # Data para análise
         analysis_date = st.date_input("Data para análise:", value=date.today())
         
-        # Converter date para datetime
-        analysis_datetime = datetime.combine(analysis_date, datetime.min.time())
-        reservations = reserva_service.get_reservas_by_data(analysis_datetime)
-        active_reservations = [r for r in reservations if r.status == 'confirmada']
+        df = reporting_engine.load_reservas(analysis_date, analysis_date, source=self._report_source())
+        occupancy = reporting_engine.occupancy_by_restaurant(df, source=self._report_source())
         
-        occupancy_data = []
+        if occupancy.empty:
+            self.utils.show_info("Nenhum restaurante cadastrado.")
+            return
         
-        for restaurant in restaurants:
-            # Contar mesas e capacidade total
-            environments = ambiente_service.get_ambientes_by_restaurante(restaurant.id)
-            total_tables = 0
-            total_capacity = 0
-            
-            for env in environments:
-                tables = mesa_service.get_mesas_by_ambiente(env.id)
-                total_tables += len(tables)
-                total_capacity += sum(table.capacidade for table in tables)
-            
-            # Contar reservas
-            restaurant_reservations = []
-            for reservation in active_reservations:
-                mesa = mesa_service.get_mesa_by_id(reservation.mesa_id)
-                ambiente = ambiente_service.get_ambiente_by_id(mesa.ambiente_id)
-                if ambiente.restaurante_id == restaurant.id:
-                    restaurant_reservations.append(reservation)
-            
-            occupied_tables = len(restaurant_reservations)
-            occupied_capacity = sum(r.numero_pessoas for r in restaurant_reservations)
-            
-            occupancy_data.append({
-                "Restaurante": restaurant.nome,
-                "Total de Mesas": total_tables,
-                "Mesas Ocupadas": occupied_tables,
-                "% Ocupação Mesas": f"{(occupied_tables/total_tables*100):.1f}%" if total_tables > 0 else "0%",
-                "Capacidade Total": total_capacity,
-                "Pessoas": occupied_capacity,
-                "% Ocupação Pessoas": f"{(occupied_capacity/total_capacity*100):.1f}%" if total_capacity > 0 else "0%"
-            })
-        
-        if occupancy_data:
-            df = pd.DataFrame(occupancy_data)
-            st.dataframe(df, width='stretch')
-        else:
-            self.utils.show_info("Nenhum dado de ocupação disponível.")
+        occupancy_df = pd.DataFrame({
+            "Restaurante": occupancy["restaurante"],
+            "Total de Mesas": occupancy["total_mesas"],
+            "Mesas Ocupadas": occupancy["mesas_ocupadas"],
+            "% Ocupação Mesas": occupancy["pct_mesas"].map("{:.1f}%".format),
+            "Capacidade Total": occupancy["capacidade_total"],
+            "Pessoas": occupancy["pessoas"],
+            "% Ocupação Pessoas": occupancy["pct_pessoas"].map("{:.1f}%".format)
+        })
+        st.dataframe(occupancy_df, width='stretch', hide_index=True)
+        st.bar_chart(occupancy.set_index("restaurante")[["pessoas"]].rename(columns={"pessoas": "Pessoas"}))
     
     def _render_top_clients_report(self):
         """Relatório de clientes mais ativos"""
         st.subheader("Clientes Mais Ativos")
         
-        clients = cliente_service.get_all_clientes()
-        
-        if not clients:
-            self.utils.show_info("Nenhum cliente cadastrado.")
-            return
-        
         # Período para análise
         col1, col2 = st.columns(2)
         with col1:
@@ -1105,42 +1317,236 @@ class AdminPage:
             end_date = st.date_input("Data final:", value=date.today())
         
         if start_date <= end_date:
-            client_data = []
-            
-            for client in clients:
-                reservations = reserva_service.get_reservas_by_cliente(client.id)
-                
-                # Filtrar por período
-                period_reservations = [
-                    r for r in reservations
-                    if start_date <= r.data_reserva.date() <= end_date
-                ]
-                
-                confirmed_reservations = [r for r in period_reservations if r.status == 'confirmada']
-                canceled_reservations = [r for r in period_reservations if r.status == 'cancelada']
-                
-                if period_reservations:  # Apenas clientes com reservas no período
-                    client_data.append({
-                        "Cliente": client.nome,
-                        "Email": client.email,
-                        "Total Reservas": len(period_reservations),
-                        "Confirmadas": len(confirmed_reservations),
-                        "Canceladas": len(canceled_reservations),
-                        "Taxa Confirmação": f"{(len(confirmed_reservations)/len(period_reservations)*100):.1f}%"
-                    })
+            df = reporting_engine.load_reservas(start_date, end_date, source=self._report_source())
+            top = reporting_engine.top_clients(df, limit=10)
             
-            if client_data:
-                # Ordenar por total de reservas
-                client_data.sort(key=lambda x: x["Total Reservas"], reverse=True)
-                
-                # Mostrar top 10
-                df = pd.DataFrame(client_data[:10])
-                st.dataframe(df, width='stretch')
+            if not top.empty:
+                st.dataframe(pd.DataFrame({
+                    "Cliente": top["cliente"],
+                    "Email": top["email"],
+                    "Total Reservas": top["total"],
+                    "Confirmadas": top["confirmadas"],
+                    "Canceladas": top["canceladas"],
+                    "Taxa Confirmação": top["taxa_confirmacao"].map("{:.1f}%".format)
+                }), width='stretch', hide_index=True)
             else:
                 self.utils.show_info("Nenhum cliente com reservas no período selecionado.")
         else:
             self.utils.show_error("Data inicial deve ser anterior à data final.")
+    
+    def _render_slot_heatmap_report(self):
+        """Relatório de reservas por dia da semana e horário"""
+        st.subheader("Mapa de Horários")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("Data inicial:", value=date.today() - timedelta(days=90), key="heatmap_start")
+        with col2:
+            end_date = st.date_input("Data final:", value=date.today(), key="heatmap_end")
+        
+        if start_date > end_date:
+            self.utils.show_error("Data inicial deve ser anterior à data final.")
+            return
+        
+        df = reporting_engine.load_reservas(start_date, end_date, source=self._report_source())
+        heatmap = reporting_engine.slot_heatmap(df) if not df.empty else None
+        # Só com reservas canceladas o mapa não tem colunas
+        if heatmap is None or heatmap.size == 0:
+            self.utils.show_info("Nenhuma reserva encontrada no período selecionado.")
+            return
+        
+        heatmap.index = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+        st.dataframe(
+            heatmap,
+            width='stretch',
+            column_config={
+                slot: st.column_config.ProgressColumn(
+                    slot, format="%d", min_value=0, max_value=int(heatmap.values.max()) or 1
+                )
+                for slot in heatmap.columns
+            }
+        )
+    
+    def _render_performance(self):
+        """Renderiza a consola de desempenho com os tempos das secções"""
+        st.subheader("⏱️ Desempenho")
+
+        self._render_admission_counters()
+        self._render_notification_metrics()
+        self._render_session_state_sizes()
+
+        if not perf_monitor.enabled:
+            self.utils.show_info("Monitorização desativada (PERF_MONITOR_ENABLED=False).")
+            return
+
+        records = perf_monitor.get_records()
+        if not records:
+            self.utils.show_info("Ainda não existem medições registadas.")
+            return
+
+        df = pd.DataFrame([{
+            "Início": r.inicio,
+            "Secção": r.nome,
+            "Duração (ms)": r.duracao_ms,
+            "Queries": r.queries,
+            "Memória (KB)": r.memoria_kb,
+            "Rerun": r.rerun_id,
+            "Raiz": r.raiz,
+            "Erro": r.erro
+        } for r in records])
+
+        # Medições raiz das páginas correspondem a reruns completos
+        reruns = df[df["Raiz"] & df["Secção"].str.endswith(".render")]
+
+        # Métricas
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Medições", len(df))
+        with col2:
+            st.metric("Reruns", len(reruns))
+        with col3:
+            p95 = reruns["Duração (ms)"].quantile(0.95) if not reruns.empty else 0
+            st.metric("Rerun p95", f"{p95:.0f} ms")
+        with col4:
+            st.metric("Erros", int(df["Erro"].sum()))
+
+        if st.button("🗑️ Limpar Medições", key="perf_clear"):
+            perf_monitor.clear()
+            st.rerun()
+
+        st.divider()
+
+        # Reruns recentes com as secções executadas em cada um
+        st.subheader("🔄 Reruns Recentes")
+        if not reruns.empty:
+            sections = df[~df["Raiz"]].groupby("Rerun")["Secção"].agg(lambda s: ", ".join(dict.fromkeys(s)))
+            recent = reruns.tail(20).iloc[::-1].copy()
+            recent["Secções"] = recent["Rerun"].map(sections).fillna("-")
+            recent["Início"] = recent["Início"].dt.strftime("%d/%m/%Y %H:%M:%S")
+            st.dataframe(
+                recent[["Início", "Secção", "Secções", "Duração (ms)", "Queries", "Memória (KB)"]].round(1),
+                width='stretch', hide_index=True
+            )
+            st.line_chart(reruns.set_index("Início")["Duração (ms)"])
+        else:
+            self.utils.show_info("Nenhum rerun completo registado.")
+
+        st.divider()
+
+        # Secções mais lentas por percentil
+        st.subheader("🐢 Secções Mais Lentas")
+        grouped = df.groupby("Secção")
+        summary = pd.DataFrame({
+            "Execuções": grouped.size(),
+            "p50 (ms)": grouped["Duração (ms)"].quantile(0.50),
+            "p95 (ms)": grouped["Duração (ms)"].quantile(0.95),
+            "p99 (ms)": grouped["Duração (ms)"].quantile(0.99),
+            "Máx (ms)": grouped["Duração (ms)"].max(),
+            "Queries (média)": grouped["Queries"].mean(),
+            "Memória (KB, média)": grouped["Memória (KB)"].mean()
+        }).sort_values("p95 (ms)", ascending=False).round(1)
+
+        st.dataframe(summary, width='stretch')
+        st.bar_chart(summary[["p50 (ms)", "p95 (ms)", "p99 (ms)"]].head(15))
+
+    def _render_admission_counters(self):
+        """Contadores do controlo de admissão (para afinar os limites)"""
+        with st.expander("🚦 Controlo de Admissão", expanded=False):
+            if not admission_controller.ativo:
+                self.utils.show_info("Controlo de admissão desativado (ADMISSION_ENABLED=False).")
+                return
+
+            st.caption(
+                f"Pedidos em curso: {admission_controller.em_curso} / {admission_controller.max_concorrentes} "
+                f"(ADMISSION_MAX_CONCURRENT)"
+            )
+            contadores = admission_controller.get_contadores()
+            if not contadores:
+                self.utils.show_info("Ainda não passaram pedidos pelo controlo de admissão.")
+                return
+
+            df = pd.DataFrame([{
+                "Operação": operacao,
+                "Limite (rajada / min)": (
+                    f"{admission_controller.limites[operacao].rajada} / "
+                    f"{admission_controller.limites[operacao].por_minuto:g}"
+                ) if operacao in admission_controller.limites else "-",
+                "Admitidos": c['admitidos'],
+                "Recusados (cliente)": c['recusados_limite'],
+                "Recusados (sobrecarga)": c['recusados_sobrecarga'],
+                "Em curso": c['em_curso'],
+                "Pico em curso": c['pico_em_curso']
+            } for operacao, c in contadores.items()])
+            st.dataframe(df, width='stretch', hide_index=True)
+
+            if st.button("🔄 Repor Contadores", key="admission_reset"):
+                admission_controller.reset()
+                st.rerun()
+
+    def _render_notification_metrics(self):
+        """Fila e débito do envio de notificações aos clientes"""
+        with st.expander("✉️ Notificações", expanded=False):
+            estado = "a correr" if notificacao_worker.running else "parado"
+            st.caption(
+                f"Envio {estado} (transporte {notificacao_service.transporte}, a cada "
+                f"{notificacao_worker.interval_s:g}s, lotes de {notificacao_service.lote}, "
+                f"{notificacao_service.concorrencia} ligações em paralelo)"
+            )
+
+            por_estado = notificacao_service.count_by_estado()
+            metricas = notificacao_service.get_metricas()
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Pendentes", por_estado.get('pendente', 0))
+            with col2:
+                st.metric("Enviadas", por_estado.get('enviada', 0))
+            with col3:
+                st.metric("Falhadas", por_estado.get('falhada', 0))
+            with col4:
+                st.metric("Mensagens/s", f"{metricas.mensagens_por_s:.1f}")
+
+            st.caption(
+                f"Neste processo: {metricas.enfileiradas} enfileirada(s), {metricas.enviadas} enviada(s), "
+                f"{metricas.falhas} falha(s), {metricas.desistencias} desistência(s), "
+                f"{metricas.lotes} lote(s), {metricas.ligacoes} ligação(ões)"
+            )
+
+            if st.button("✉️ Enviar Agora", key="notify_run"):
+                resultado = notificacao_service.processar()
+                self.utils.show_success(
+                    f"{resultado.enviadas} notificação(ões) enviada(s), {resultado.falhas} falha(s) "
+                    f"({resultado.duracao_s:.2f}s)."
+                )
+
+    def _render_session_state_sizes(self):
+        """Tamanho do session_state das sessões de clientes ligadas a este processo"""
+        with st.expander("🧠 Memória por Sessão", expanded=False):
+            resumo = medidor_sessoes.get_resumo()
+            if not resumo['sessoes']:
+                self.utils.show_info("Ainda não há sessões de clientes medidas neste processo.")
+                return
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Sessões", resumo['sessoes'])
+            with col2:
+                st.metric("Total", f"{resumo['total_kb']:.1f} KB")
+            with col3:
+                st.metric("Média", f"{resumo['media_kb']:.1f} KB")
+            with col4:
+                st.metric("Máximo", f"{resumo['maximo_kb']:.1f} KB")
+            st.caption(f"Aviso no log acima de {Config.SESSION_STATE_WARN_KB:g} KB por sessão (SESSION_STATE_WARN_KB).")
+
+            # Chaves que mais ocupam nas maiores sessões
+            st.dataframe(pd.DataFrame([{
+                "Sessão": m.sessao[:8],
+                "Chave": chave,
+                "KB": round(tamanho / 1024, 2)
+            } for m in medidor_sessoes.get_sessoes()[:5]
+                for chave, tamanho in sorted(m.por_chave.items(), key=lambda c: c[1], reverse=True)[:5]]),
+                width='stretch', hide_index=True)
 
+    @timed("admin.utilizadores")
     def _render_users(self):
         """Renderiza a gestão de utilizadores"""
         st.subheader("👥 Gestão de Utilizadores")
@@ -1,10 +1,18 @@
 import streamlit as st
+import uuid
 from datetime import datetime, date, timedelta
 from typing import List, Optional
-from models import Cliente, Mesa, Reserva
-from services import cliente_service, restaurante_service, ambiente_service, mesa_service, reserva_service
+from models import Cliente, Mesa
+from database.read_models import ReservaRow
+from services import (
+    cliente_service, restaurante_service, ambiente_service, mesa_service, reserva_service,
+    lista_espera_service, admission_controller, AdmissaoRecusada
+)
 from utils.validators import ValidationError
 from utils.streamlit_utils import StreamlitUtils
+from utils.performance import timed
+from utils.session_state import EstadoReserva, medidor_sessoes
+from services.allocation import Alocacao, OpcaoReserva
 from config import Config
 
 
@@ -14,6 +22,7 @@ class ClientePage:
     def __init__(self):
         self.utils = StreamlitUtils()
     
+    @timed("client.render")
     def render(self):
         """Renderiza a página do cliente"""
         # CSS para página de cliente
@@ -96,6 +105,9 @@ class ClientePage:
                         del st.session_state[key]
                     st.success("✅ Sessão terminada com sucesso!")
                     st.rerun()
+        
+        # Tamanho do estado desta sessão (consola de Desempenho da área administrativa)
+        medidor_sessoes.registar(self._hold_token(), {k: st.session_state[k] for k in st.session_state.keys()})
     
     def _render_client_login(self):
         """Renderiza o sistema de login/cadastro do cliente"""
@@ -117,7 +129,12 @@ class ClientePage:
             
             if submitted:
                 if email:
-                    cliente = cliente_service.get_cliente_by_email(email)
+                    try:
+                        with admission_controller.admitir('login', email.strip().lower()):
+                            cliente = cliente_service.get_cliente_by_email(email)
+                    except AdmissaoRecusada as e:
+                        self.utils.show_warning(str(e))
+                        return
                     if cliente:
                         st.session_state.cliente_id = cliente.id
                         st.session_state.cliente_nome = cliente.nome
@@ -163,14 +180,18 @@ class ClientePage:
         st.divider()
         
         # Separadores principais
-        tab1, tab2 = st.tabs(["Nova Reserva", "As Minhas Reservas"])
+        tab1, tab2, tab3 = st.tabs(["Nova Reserva", "Pesquisar em Todos os Restaurantes", "As Minhas Reservas"])
         
         with tab1:
             self._render_new_reservation()
         
         with tab2:
+            self._render_availability_search()
+        
+        with tab3:
             self._render_my_reservations()
     
+    @timed("client.nova_reserva")
     def _render_new_reservation(self):
         """Renderiza formulário de nova reserva"""
         st.subheader("Nova Reserva")
@@ -209,9 +230,9 @@ class ClientePage:
             if ambiente_selected:
                 ambiente_id = ambiente_options[ambiente_selected]
                 
-                # Passo 3: Selecionar data e horário
+                # Passo 3: Selecionar data e número de pessoas
                 col1, col2 = st.columns(2)
-                
+
                 with col1:
                     data_reserva = st.date_input(
                         "Data da reserva:",
@@ -219,46 +240,80 @@ class ClientePage:
                         max_value=date.today() + timedelta(days=90),
                         key="reservation_date"
                     )
-                
+
                 with col2:
-                    horario = st.selectbox(
-                        "Horário:",
-                        options=Config.TIME_SLOTS,
-                        key="reservation_time"
+                    numero_pessoas = st.number_input(
+                        "Número de pessoas:",
+                        min_value=1,
+                        max_value=20,
+                        value=2,
+                        key="number_people"
                     )
+
+                # Pedido de outro ambiente ou dia: resultados, seleção e bloqueio deixam de valer
+                estado = self._estado_reserva()
+                if estado.ativo and not estado.corresponde(ambiente_id, data_reserva):
+                    if estado.bloqueio_expira_em:
+                        mesa_service.libertar_mesas(self._hold_token())
+                    estado.limpar()
                 
-                # Passo 4: Número de pessoas
-                numero_pessoas = st.number_input(
-                    "Número de pessoas:",
-                    min_value=1,
-                    max_value=20,
-                    value=2,
-                    key="number_people"
+                # Passo 4: Disponibilidade do dia inteiro e escolha do horário
+                disponibilidade = mesa_service.get_availability_grid(
+                    ambiente_id, data_reserva, numero_pessoas, token=self._hold_token()
                 )
-                
+                self._render_availability_grid(disponibilidade)
+
+                horarios_livres = [slot for slot, livres in disponibilidade.items() if livres > 0]
+                if not horarios_livres:
+                    # Dia cheio: sugerir dias vizinhos e outros ambientes
+                    meio_do_dia = Config.TIME_SLOTS[len(Config.TIME_SLOTS) // 2]
+                    self._render_alternatives(
+                        ambiente_id,
+                        datetime.combine(data_reserva, datetime.strptime(meio_do_dia, "%H:%M").time()),
+                        numero_pessoas
+                    )
+                    self._render_waitlist_offer(ambiente_id, data_reserva, numero_pessoas, Config.TIME_SLOTS)
+                    return
+
+                horario = st.selectbox(
+                    "Horário:",
+                    options=horarios_livres,
+                    format_func=lambda slot: f"{slot} ({disponibilidade[slot]} mesa(s) livre(s))",
+                    key="reservation_time"
+                )
+
                 # Passo 5: Buscar mesas disponíveis
                 if st.button("Buscar Mesas Disponíveis", type="primary"):
-                    data_hora_reserva = datetime.combine(data_reserva, datetime.strptime(horario, "%H:%M").time())
-                    
-                    mesas_disponiveis = mesa_service.get_available_tables(
-                        ambiente_id, data_hora_reserva, numero_pessoas
-                    )
-                    
-                    if mesas_disponiveis:
-                        st.session_state.mesas_disponiveis = mesas_disponiveis
-                        st.session_state.data_hora_reserva = data_hora_reserva
-                        self.utils.show_success(f"Encontradas {len(mesas_disponiveis)} mesa(s) disponível(is)!")
+                    try:
+                        with admission_controller.admitir('pesquisa', st.session_state.cliente_id):
+                            self._buscar_mesas(ambiente_id, data_reserva, horario, numero_pessoas)
+                    except AdmissaoRecusada as e:
+                        self.utils.show_warning(str(e))
+                
+                if estado.mesas_combinadas:
+                    self._render_combined_reservation()
+                
+                if estado.alternativas:
+                    pedido_data_hora = estado.data_hora
+                    if self._render_alternatives(estado.ambiente_id, pedido_data_hora, estado.numero_pessoas):
+                        estado.alternativas = False
                     else:
-                        self.utils.show_warning("Nenhuma mesa disponível para os critérios selecionados.")
+                        self._render_waitlist_offer(
+                            estado.ambiente_id, pedido_data_hora.date(), estado.numero_pessoas,
+                            [pedido_data_hora.strftime("%H:%M")]
+                        )
                 
                 # Passo 6: Selecionar mesa e confirmar reserva
-                if 'mesas_disponiveis' in st.session_state and st.session_state.mesas_disponiveis:
+                mesas_disponiveis = [
+                    m for m in (mesa_service.get_mesa_by_id(mesa_id) for mesa_id in estado.mesas_disponiveis) if m
+                ]
+                if mesas_disponiveis:
                     st.subheader("Mesas Disponíveis")
                     
                     # Exibir mesas em cards
-                    cols = st.columns(min(len(st.session_state.mesas_disponiveis), 3))
+                    cols = st.columns(min(len(mesas_disponiveis), 3))
                     
-                    for i, mesa in enumerate(st.session_state.mesas_disponiveis):
+                    for i, mesa in enumerate(mesas_disponiveis):
                         col_index = i % 3
                         with cols[col_index]:
                             with st.container():
@@ -271,27 +326,344 @@ class ClientePage:
                                 """, unsafe_allow_html=True)
                                 
                                 if st.button(f"Seleccionar Mesa {mesa.numero}", key=f"select_table_{mesa.id}"):
-                                    st.session_state.mesa_selecionada = mesa.id
-                                    st.session_state.numero_pessoas_reserva = numero_pessoas
-                                    st.rerun()
+                                    # Guardar a mesa enquanto o cliente confirma
+                                    expira_em = mesa_service.bloquear_mesas(
+                                        [mesa.id], estado.data_hora, self._hold_token()
+                                    )
+                                    if expira_em:
+                                        estado.mesa_selecionada = mesa.id
+                                        estado.numero_pessoas = numero_pessoas
+                                        estado.bloqueio(expira_em)
+                                        st.rerun()
+                                    else:
+                                        st.error(f"❌ A mesa {mesa.numero} acabou de ser escolhida por outro cliente. Escolha outra mesa.")
                 
                 # Passo 7: Confirmar reserva da mesa selecionada
-                if 'mesa_selecionada' in st.session_state:
+                if estado.mesa_selecionada:
                     self._render_reservation_confirmation()
     
+    def _buscar_mesas(self, ambiente_id: int, data_reserva: date, horario: str, numero_pessoas: int):
+        """Procura mesas livres para o horário (ou uma combinação de mesas, ou alternativas)"""
+        data_hora_reserva = datetime.combine(data_reserva, datetime.strptime(horario, "%H:%M").time())
+        
+        mesas_disponiveis = mesa_service.get_available_tables(
+            ambiente_id, data_hora_reserva, numero_pessoas, token=self._hold_token()
+        )
+        estado = self._estado_reserva()
+        if estado.bloqueio_expira_em:
+            mesa_service.libertar_mesas(self._hold_token())
+        estado.novo_pedido(ambiente_id, data_hora_reserva, numero_pessoas)
+        
+        if mesas_disponiveis:
+            estado.mesas_disponiveis = tuple(m.id for m in mesas_disponiveis)
+            self.utils.show_success(f"Encontradas {len(mesas_disponiveis)} mesa(s) disponível(is)!")
+        else:
+            # Grupo maior que qualquer mesa livre: tentar juntar mesas
+            alocacao = mesa_service.alocar_mesas(
+                ambiente_id, data_hora_reserva, numero_pessoas, token=self._hold_token()
+            )
+            expira_em = alocacao and alocacao.combinada and mesa_service.bloquear_mesas(
+                [m.id for m in alocacao.mesas], data_hora_reserva, self._hold_token()
+            )
+            if expira_em:
+                estado.mesas_combinadas = tuple(m.id for m in alocacao.mesas)
+                estado.bloqueio(expira_em)
+            else:
+                estado.alternativas = True
+    
+    @timed("client.pesquisa")
+    def _render_availability_search(self):
+        """Renderiza a pesquisa de disponibilidade em todos os restaurantes"""
+        st.subheader("Pesquisar Disponibilidade")
+        
+        with st.form("availability_search"):
+            col1, col2 = st.columns(2)
+            with col1:
+                dia = st.date_input(
+                    "Data:",
+                    min_value=date.today(),
+                    max_value=date.today() + timedelta(days=90)
+                )
+                numero_pessoas = st.number_input("Número de pessoas:", min_value=1, max_value=20, value=2)
+            with col2:
+                janela = st.select_slider(
+                    "Horário (intervalo):",
+                    options=Config.TIME_SLOTS,
+                    value=(Config.TIME_SLOTS[0], Config.TIME_SLOTS[-1])
+                )
+                texto = st.text_input("Localidade ou restaurante (opcional):", placeholder="Ex: Lisboa")
+            
+            submitted = st.form_submit_button("🔎 Pesquisar", type="primary")
+        
+        if submitted:
+            try:
+                with admission_controller.admitir('pesquisa', st.session_state.cliente_id):
+                    opcoes = mesa_service.pesquisar_disponibilidade(
+                        dia, int(numero_pessoas), janela[0], janela[1], texto=texto, token=self._hold_token()
+                    )
+                st.session_state.pesquisa_opcoes = self._compactar_opcoes(opcoes)
+                st.session_state.pesquisa_pessoas = int(numero_pessoas)
+            except AdmissaoRecusada as e:
+                self.utils.show_warning(str(e))
+        
+        if st.session_state.get('pesquisa_opcoes') is None:
+            return
+        opcoes = self._expandir_opcoes(st.session_state.pesquisa_opcoes, st.session_state.pesquisa_pessoas)
+        if not opcoes:
+            self.utils.show_warning("Nenhuma disponibilidade encontrada para os critérios indicados.")
+            return
+        
+        st.write(f"**{len(opcoes)} opção(ões) encontrada(s)**, da mais adequada para a menos adequada:")
+        if self._render_opcoes(opcoes, st.session_state.pesquisa_pessoas, "search"):
+            del st.session_state.pesquisa_opcoes
+    
+    @staticmethod
+    def _compactar_opcoes(opcoes: List[OpcaoReserva]) -> tuple:
+        """Opções da pesquisa guardadas na sessão: (ambiente_id, horário em timestamp, ids das mesas, mesas livres)"""
+        return tuple(
+            (o.ambiente_id, int(o.horario.timestamp()), tuple(m.id for m in o.alocacao.mesas), o.mesas_livres)
+            for o in opcoes
+        )
+    
+    @staticmethod
+    def _expandir_opcoes(compactas: tuple, numero_pessoas: int) -> List[OpcaoReserva]:
+        """Reconstrói as opções para apresentação a partir da cache do catálogo"""
+        opcoes = []
+        for ambiente_id, horario, mesa_ids, mesas_livres in compactas:
+            ambiente = ambiente_service.get_ambiente_by_id(ambiente_id)
+            restaurante = ambiente and restaurante_service.get_restaurante_by_id(ambiente.restaurante_id)
+            mesas = [mesa_service.get_mesa_by_id(mesa_id) for mesa_id in mesa_ids]
+            if not restaurante or not all(mesas):
+                continue
+            opcoes.append(OpcaoReserva(
+                restaurante.id, restaurante.nome, restaurante.endereco, ambiente.id, ambiente.nome,
+                datetime.fromtimestamp(horario), Alocacao(mesas, numero_pessoas), mesas_livres
+            ))
+        return opcoes
+    
+    def _render_alternatives(self, ambiente_id: int, data_hora_reserva: datetime, numero_pessoas: int) -> bool:
+        """
+        Renderiza os horários livres mais próximos quando o pedido não tem mesa
+        
+        Returns:
+            True se uma das alternativas foi reservada
+        """
+        alternativas = mesa_service.sugerir_alternativas(
+            ambiente_id, data_hora_reserva, numero_pessoas, token=self._hold_token()
+        )
+        if not alternativas:
+            self.utils.show_warning("Nenhuma mesa disponível para os critérios selecionados.")
+            return False
+        
+        self.utils.show_warning("Sem mesas para o pedido. Alternativas mais próximas:")
+        return self._render_opcoes(alternativas, numero_pessoas, "alternative")
+    
+    def _render_waitlist_offer(self, ambiente_id: int, dia: date, numero_pessoas: int, horarios: List[str]):
+        """Renderiza a inscrição na lista de espera de um horário esgotado"""
+        with st.expander("⏳ Entrar na lista de espera", expanded=len(horarios) == 1):
+            st.caption("Se uma reserva for cancelada, a mesa é-lhe atribuída automaticamente.")
+            horario = horarios[0] if len(horarios) == 1 else st.selectbox(
+                "Horário pretendido:", options=horarios, key="waitlist_time"
+            )
+            data_hora = datetime.combine(dia, datetime.strptime(horario, "%H:%M").time())
+            
+            em_espera = lista_espera_service.count_pedidos(ambiente_id, data_hora)
+            if em_espera:
+                st.write(f"{em_espera} pedido(s) à sua frente.")
+            
+            if st.button(f"Entrar na lista de espera ({horario})", key="btn_waitlist"):
+                try:
+                    pedido = lista_espera_service.inscrever(
+                        st.session_state.cliente_id, ambiente_id, data_hora, numero_pessoas
+                    )
+                    if pedido:
+                        self.utils.show_success("Está na lista de espera. Verá a reserva em 'As Minhas Reservas' se uma mesa ficar livre.")
+                    else:
+                        st.error("❌ Erro ao entrar na lista de espera. Tente novamente.")
+                except ValidationError as e:
+                    st.error(f"❌ {str(e)}")
+    
+    def _render_opcoes(self, opcoes: list, numero_pessoas: int, key_prefix: str) -> bool:
+        """
+        Renderiza opções de reserva com botão de reserva imediata
+        
+        Returns:
+            True se uma reserva foi criada
+        """
+        for i, opcao in enumerate(opcoes):
+            mesas = " + ".join(m.numero for m in opcao.alocacao.mesas)
+            with st.container():
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.markdown(
+                        f"**{opcao.restaurante}** — {opcao.ambiente}  \n"
+                        f"🕐 {opcao.horario.strftime('%d/%m/%Y às %H:%M')} · "
+                        f"🪑 Mesa(s) {mesas} ({opcao.alocacao.capacidade} lugares)  \n"
+                        f"<small>{opcao.endereco}</small>",
+                        unsafe_allow_html=True
+                    )
+                with col2:
+                    if st.button("Reservar", key=f"{key_prefix}_book_{i}"):
+                        try:
+                            if opcao.alocacao.combinada:
+                                reservas = reserva_service.create_reserva_combinada(
+                                    cliente_id=st.session_state.cliente_id,
+                                    mesa_ids=[m.id for m in opcao.alocacao.mesas],
+                                    data_reserva=opcao.horario,
+                                    numero_pessoas=numero_pessoas,
+                                    token=self._hold_token()
+                                )
+                            else:
+                                reserva = reserva_service.create_reserva(
+                                    cliente_id=st.session_state.cliente_id,
+                                    mesa_id=opcao.alocacao.mesas[0].id,
+                                    data_reserva=opcao.horario,
+                                    numero_pessoas=numero_pessoas,
+                                    token=self._hold_token()
+                                )
+                                reservas = [reserva] if reserva else []
+                            
+                            if reservas:
+                                self.utils.show_success(
+                                    f"Reserva criada em {opcao.restaurante} às {opcao.horario.strftime('%H:%M')}!"
+                                )
+                                st.balloons()
+                                return True
+                            st.error("❌ Erro ao criar reserva. Tente novamente.")
+                        except ValidationError as e:
+                            st.error(f"❌ {str(e)}")
+                st.divider()
+        return False
+    
+    def _render_combined_reservation(self):
+        """Renderiza a proposta de mesas combinadas para grupos grandes"""
+        estado = self._estado_reserva()
+        mesas = [mesa_service.get_mesa_by_id(mesa_id) for mesa_id in estado.mesas_combinadas]
+        if not all(mesas):
+            st.error("❌ Uma das mesas deixou de estar disponível. Pesquise novamente.")
+            return
+        numero_pessoas = estado.numero_pessoas
+        numeros = " + ".join(m.numero for m in mesas)
+        capacidade = sum(m.capacidade for m in mesas)
+        
+        st.subheader("🪑 Mesas Combinadas")
+        st.info(
+            f"Nenhuma mesa individual comporta {numero_pessoas} pessoas, mas podemos juntar "
+            f"as mesas **{numeros}** ({capacidade} lugares)."
+        )
+        st.write(f"**Data/Hora:** {estado.data_hora.strftime('%d/%m/%Y às %H:%M')}")
+        self._render_hold_expiry()
+        
+        observacoes = st.text_area(
+            "Observações (opcional):",
+            placeholder="Alguma observação especial para a sua reserva?",
+            key="obs_reserva_combinada"
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("✅ Confirmar Mesas Combinadas", type="primary", key="btn_confirmar_combinada"):
+                try:
+                    reservas = reserva_service.create_reserva_combinada(
+                        cliente_id=st.session_state.cliente_id,
+                        mesa_ids=list(estado.mesas_combinadas),
+                        data_reserva=estado.data_hora,
+                        numero_pessoas=numero_pessoas,
+                        observacoes=observacoes,
+                        token=self._hold_token()
+                    )
+                    if reservas:
+                        estado.limpar()
+                        self.utils.show_success(f"Reserva criada com sucesso nas mesas {numeros}!")
+                        st.balloons()
+                    else:
+                        st.error("❌ Erro ao criar reserva. Tente novamente.")
+                except ValidationError as e:
+                    st.error(f"❌ Erro de validação: {str(e)}")
+        with col2:
+            if st.button("❌ Cancelar", type="secondary", key="cancel_combined_reservation"):
+                mesa_service.libertar_mesas(self._hold_token())
+                estado.mesas_combinadas = ()
+                estado.bloqueio(None)
+                st.rerun()
+    
+    def _estado_reserva(self) -> EstadoReserva:
+        """Pedido em curso no separador de nova reserva"""
+        if 'estado_reserva' not in st.session_state:
+            st.session_state.estado_reserva = EstadoReserva()
+        return st.session_state.estado_reserva
+    
+    def _hold_token(self) -> str:
+        """Identificador da sessão usado nos bloqueios temporários de mesas"""
+        if 'hold_token' not in st.session_state:
+            st.session_state.hold_token = uuid.uuid4().hex
+        return st.session_state.hold_token
+    
+    def _chave_idempotencia(self, pedido: str) -> str:
+        """Chave do pedido em curso: reruns e cliques repetidos reutilizam-na e obtêm o resultado original"""
+        chaves = st.session_state.setdefault('chaves_idempotencia', {})
+        if pedido not in chaves:
+            chaves[pedido] = uuid.uuid4().hex
+        return chaves[pedido]
+    
+    def _nova_chave_idempotencia(self, pedido: str):
+        """Descarta a chave depois de o pedido terminar (o pedido seguinte é um pedido novo)"""
+        st.session_state.get('chaves_idempotencia', {}).pop(pedido, None)
+    
+    def _render_hold_expiry(self):
+        """Mostra até quando a(s) mesa(s) escolhida(s) ficam guardadas"""
+        expira_em = self._estado_reserva().expira_em
+        if not expira_em:
+            return
+        if expira_em > datetime.now():
+            st.caption(f"⏱️ Mesa guardada para si até às {expira_em.strftime('%H:%M')}.")
+        else:
+            st.warning("⏱️ O tempo para confirmar terminou; a mesa pode já ter sido reservada por outro cliente.")
+    
+    def _render_availability_grid(self, disponibilidade: dict):
+        """Renderiza o mapa de disponibilidade (mesas livres por horário)"""
+        maximo = max(disponibilidade.values(), default=0) or 1
+
+        celulas = []
+        for slot, livres in disponibilidade.items():
+            if livres == 0:
+                cor = "#f8d7da"
+            elif livres / maximo < 0.34:
+                cor = "#fff3cd"
+            elif livres / maximo < 0.67:
+                cor = "#d4edda"
+            else:
+                cor = "#a3d9a5"
+            celulas.append(
+                f"<div style='background-color: {cor}; padding: 0.5rem; border-radius: 6px; "
+                f"text-align: center; min-width: 4.5rem;'>"
+                f"<strong>{slot}</strong><br><small>{livres} livre(s)</small></div>"
+            )
+
+        st.markdown("**Disponibilidade do dia:**")
+        st.markdown(
+            "<div style='display: flex; flex-wrap: wrap; gap: 0.4rem; margin-bottom: 1rem;'>"
+            + "".join(celulas) + "</div>",
+            unsafe_allow_html=True
+        )
+
     def _render_reservation_confirmation(self):
         """Renderiza o formulário de confirmação da reserva"""
         # Verificar se temos todos os dados necessários
-        if 'mesa_selecionada' not in st.session_state or 'numero_pessoas_reserva' not in st.session_state:
+        estado = self._estado_reserva()
+        if not estado.mesa_selecionada or not estado.ativo:
             st.error("❌ Dados da reserva perdidos. Tente novamente.")
             return
         
-        if 'data_hora_reserva' not in st.session_state or 'cliente_id' not in st.session_state:
+        if 'cliente_id' not in st.session_state:
             st.error("❌ Dados da sessão perdidos. Faça login novamente.")
             return
         
-        mesa_id = st.session_state.mesa_selecionada
-        numero_pessoas = st.session_state.numero_pessoas_reserva
+        mesa_id = estado.mesa_selecionada
+        numero_pessoas = estado.numero_pessoas
+        data_hora_reserva = estado.data_hora
+        # Identifica o pedido: confirmações repetidas da mesma mesa e horário usam a mesma chave
+        pedido_reserva = f"reserva_{mesa_id}_{data_hora_reserva:%Y%m%d%H%M}"
         
         # Obter informações da mesa selecionada com verificação de erros
         try:
@@ -329,19 +701,19 @@ class ClientePage:
                 st.write(f"**Ambiente:** {ambiente.nome}")
                 st.write(f"**Mesa:** {mesa.numero}")
             with col2:
-                st.write(f"**Data/Hora:** {st.session_state.data_hora_reserva.strftime('%d/%m/%Y às %H:%M')}")
+                st.write(f"**Data/Hora:** {data_hora_reserva.strftime('%d/%m/%Y às %H:%M')}")
                 st.write(f"**Pessoas:** {numero_pessoas}")
                 st.write(f"**Capacidade da Mesa:** {mesa.capacidade}")
+            self._render_hold_expiry()
         
         # Botão de cancelar (fora do formulário)
         col1, col2, col3 = st.columns([1, 1, 1])
         with col1:
             if st.button("❌ Cancelar", type="secondary", key="cancel_reservation"):
-                # Limpar seleção
-                if 'mesa_selecionada' in st.session_state:
-                    del st.session_state.mesa_selecionada
-                if 'numero_pessoas_reserva' in st.session_state:
-                    del st.session_state.numero_pessoas_reserva
+                # Libertar a mesa e limpar seleção
+                mesa_service.libertar_mesas(self._hold_token())
+                estado.mesa_selecionada = 0
+                estado.bloqueio(None)
                 st.rerun()
         
         # Formulário de confirmação simplificado
@@ -364,9 +736,11 @@ class ClientePage:
                     reserva = reserva_service.create_reserva(
                         cliente_id=st.session_state.cliente_id,
                         mesa_id=mesa_id,
-                        data_reserva=st.session_state.data_hora_reserva,
+                        data_reserva=data_hora_reserva,
                         numero_pessoas=numero_pessoas,
-                        observacoes=observacoes.strip() if observacoes and observacoes.strip() else None
+                        observacoes=observacoes.strip() if observacoes and observacoes.strip() else None,
+                        token=self._hold_token(),
+                        chave_idempotencia=self._chave_idempotencia(pedido_reserva)
                     )
                     
                     if reserva:
@@ -386,13 +760,8 @@ class ClientePage:
                                 st.write(f"**Observações:** {reserva.observacoes}")
                         
                         # Limpar dados da sessão após mostrar sucesso
-                        keys_to_clear = [
-                            'mesas_disponiveis', 'data_hora_reserva', 
-                            'mesa_selecionada', 'numero_pessoas_reserva'
-                        ]
-                        for key in keys_to_clear:
-                            if key in st.session_state:
-                                del st.session_state[key]
+                        estado.limpar()
+                        self._nova_chave_idempotencia(pedido_reserva)
                         
                         st.info("💡 Pode gerir as suas reservas na aba 'Minhas Reservas'")
                         
@@ -411,10 +780,34 @@ class ClientePage:
                     st.exception(e)
 
     
+    def _render_my_waitlist(self):
+        """Renderiza os pedidos ativos do cliente na lista de espera"""
+        pedidos = lista_espera_service.get_pedidos_by_cliente(st.session_state.cliente_id)
+        if not pedidos:
+            return
+        
+        st.write("**⏳ Em lista de espera**")
+        for pedido in pedidos:
+            ambiente = ambiente_service.get_ambiente_by_id(pedido.ambiente_id)
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(
+                    f"{ambiente.nome if ambiente else '-'} · "
+                    f"{pedido.data_reserva.strftime('%d/%m/%Y às %H:%M')} · {pedido.numero_pessoas} pessoa(s)"
+                )
+            with col2:
+                if st.button("Sair da lista", key=f"leave_waitlist_{pedido.id}"):
+                    if lista_espera_service.sair(pedido.id):
+                        st.rerun()
+        st.divider()
+    
+    @timed("client.minhas_reservas")
     def _render_my_reservations(self):
         """Renderiza as reservas do cliente"""
         st.subheader("Minhas Reservas")
         
+        self._render_my_waitlist()
+        
         reservas = reserva_service.get_reservas_by_cliente(st.session_state.cliente_id)
         
         if not reservas:
@@ -424,13 +817,15 @@ class ClientePage:
         # Filtrar por status
         status_filter = st.selectbox(
             "Filtrar por status:",
-            options=["Todas", "Confirmadas", "Canceladas"],
+            options=["Todas", "Confirmadas", "Finalizadas", "Canceladas"],
             key="reservation_filter"
         )
         
         # Aplicar filtro
         if status_filter == "Confirmadas":
             reservas = [r for r in reservas if r.status == 'confirmada']
+        elif status_filter == "Finalizadas":
+            reservas = [r for r in reservas if r.status == 'finalizada']
         elif status_filter == "Canceladas":
             reservas = [r for r in reservas if r.status == 'cancelada']
         
@@ -456,6 +851,9 @@ class ClientePage:
                     st.write(f"**Status:** {reserva.status.upper()}")
                     if reserva.observacoes:
                         st.write(f"**Observações:** {reserva.observacoes}")
+                    
+                    if reserva.status == 'confirmada' and reserva.data_reserva > datetime.now():
+                        self._render_reschedule(reserva, mesa)
                 
                 with col2:
                     # Permitir cancelamento apenas para reservas confirmadas e futuras
@@ -467,12 +865,64 @@ class ClientePage:
                             "Tem certeza que deseja cancelar esta reserva?",
                             f"cancel_{reserva.id}"
                         ):
-                            if reserva_service.cancel_reserva(reserva.id):
+                            if reserva_service.cancel_reserva(
+                                reserva.id, chave_idempotencia=self._chave_idempotencia(f"cancelar_{reserva.id}")
+                            ):
                                 self.utils.show_success("Reserva cancelada com sucesso!")
                                 st.rerun()
                             else:
                                 self.utils.show_error("Erro ao cancelar reserva.")
 
+    def _render_reschedule(self, reserva: ReservaRow, mesa: Mesa):
+        """Renderiza a alteração de horário de uma reserva (mesma mesa ou outra do ambiente)"""
+        if not st.checkbox("🔁 Alterar horário", key=f"move_toggle_{reserva.id}"):
+            return
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            novo_dia = st.date_input(
+                "Nova data:",
+                value=reserva.data_reserva.date(),
+                min_value=date.today(),
+                max_value=date.today() + timedelta(days=90),
+                key=f"move_date_{reserva.id}"
+            )
+        with col2:
+            atual = reserva.data_reserva.strftime("%H:%M")
+            novo_horario = st.selectbox(
+                "Novo horário:",
+                options=Config.TIME_SLOTS,
+                index=Config.TIME_SLOTS.index(atual) if atual in Config.TIME_SLOTS else 0,
+                key=f"move_time_{reserva.id}"
+            )
+        
+        if st.button("Confirmar alteração", key=f"move_{reserva.id}"):
+            nova_data = datetime.combine(novo_dia, datetime.strptime(novo_horario, "%H:%M").time())
+            try:
+                try:
+                    movida = reserva_service.move_reserva(reserva.id, nova_data, token=self._hold_token())
+                except ValidationError:
+                    # Mesa ocupada no novo horário: tentar outra mesa do mesmo ambiente
+                    livres = mesa_service.get_available_tables(
+                        mesa.ambiente_id, nova_data, reserva.numero_pessoas, token=self._hold_token()
+                    )
+                    if not livres:
+                        raise
+                    movida = reserva_service.move_reserva(
+                        reserva.id, nova_data, mesa_id=livres[0].id, token=self._hold_token()
+                    )
+                
+                if movida:
+                    self.utils.show_success(
+                        f"Reserva alterada para {movida.data_reserva.strftime('%d/%m/%Y às %H:%M')}."
+                    )
+                    st.rerun()
+                else:
+                    st.error("❌ Erro ao alterar a reserva. Tente novamente.")
+            except ValidationError as e:
+                st.error(f"❌ {str(e)}")
+
+    @timed("client.perfil")
     def _render_client_profile(self):
         """Renderiza a seção de perfil do cliente para atualização de dados"""
         st.markdown("### 👤 Meus Dados")
@@ -535,7 +985,7 @@ class ClientePage:
         st.markdown("---")
         st.markdown("### 📋 Histórico de Reservas")
         
-        reservas = reserva_service.get_reservas_by_cliente(cliente_id)
+        reservas = reserva_service.get_reservas_by_cliente(cliente_id, include_archive=True)
         
         if reservas:
             for reserva in reservas:
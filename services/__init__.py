@@ -1,12 +1,22 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
-from datetime import datetime
-from models import Cliente, Restaurante, Ambiente, Mesa, Reserva
+from datetime import datetime, date, timedelta
+from models import Cliente, Restaurante, Ambiente, Mesa, Reserva, ListaEspera, ChaveIdempotencia
 from database.repositories import (
-    cliente_repo, restaurante_repo, ambiente_repo, mesa_repo, reserva_repo
+    cliente_repo, restaurante_repo, ambiente_repo, mesa_repo, reserva_repo,
+    reserva_arquivo_repo, lista_espera_repo, chave_idempotencia_repo
 )
 from database.connection import db_manager
+from database.read_models import ReservaRow, MesaRow, ClienteRow
 from utils.validators import DataValidator, ValidationError
+from utils.performance import timed
+from services.allocation import Alocacao, OpcaoReserva, alocar
+from services.holds import bloqueio_service
+from services.cache import catalogo_cache
+from services.outbox import outbox_service
+from services.admission import admission_controller, AdmissaoRecusada
+from services.batch import PedidoReserva, ConflitoLote, LoteReservaError
+from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +29,116 @@ class BaseService(ABC):
         self.repository = repository
 
 
+# Operações com chave de idempotência
+OPERACAO_CRIAR_RESERVA = 'criar_reserva'
+OPERACAO_CANCELAR_RESERVA = 'cancelar_reserva'
+
+
+def _expiracao_idempotencia() -> datetime:
+    """Validade de uma chave de idempotência gravada agora"""
+    return datetime.now() + timedelta(seconds=Config.IDEMPOTENCY_TTL_SECONDS)
+
+
+def _duracao_reserva(duracao_minutos: Optional[int]) -> timedelta:
+    """Duração de uma reserva (a do restaurante ou a padrão da aplicação)"""
+    return timedelta(minutes=duracao_minutos or Config.RESERVATION_DURATION_MINUTES)
+
+
+def _validar_dados_cliente(nome: str, email: str, telefone: str):
+    """Validações dos dados de um cliente (sem acesso à base de dados)"""
+    is_valid, message = DataValidator.validate_name(nome)
+    if not is_valid:
+        raise ValidationError(message)
+    
+    is_valid, message = DataValidator.validate_email(email)
+    if not is_valid:
+        raise ValidationError(message)
+    
+    is_valid, message = DataValidator.validate_phone(telefone)
+    if not is_valid:
+        raise ValidationError(message)
+
+
+def _validar_dados_reserva(cliente_id: int, mesa_id: int, data_reserva: datetime,
+                           numero_pessoas: int, duracao_minutos: int = None):
+    """Validações de uma nova reserva (sem acesso à base de dados)"""
+    if not cliente_id:
+        raise ValidationError("Cliente é obrigatório")
+    
+    if not mesa_id:
+        raise ValidationError("Mesa é obrigatória")
+    
+    is_valid, message = DataValidator.validate_reservation_date(data_reserva)
+    if not is_valid:
+        raise ValidationError(message)
+    
+    is_valid, message = DataValidator.validate_capacity(numero_pessoas)
+    if not is_valid:
+        raise ValidationError(message)
+    
+    if duracao_minutos is not None:
+        is_valid, message = DataValidator.validate_duration(
+            duracao_minutos, max_duration=Config.MAX_RESERVATION_DURATION_MINUTES
+        )
+        if not is_valid:
+            raise ValidationError(message)
+
+
+def _mesa_bloqueada(mesa_id: int, inicio: datetime, fim: datetime) -> bool:
+    """Indica se a mesa está bloqueada no intervalo (a lista de espera não a pode receber)"""
+    return mesa_id in bloqueio_service.mesas_bloqueadas(inicio, fim)
+
+
+def _sem_bloqueios(livres: Dict[datetime, list], token: Optional[str]) -> Dict[datetime, list]:
+    """Retira das mesas livres por horário as que estão bloqueadas por outras sessões"""
+    if not livres:
+        return livres
+    inicio = min(livres)
+    fim = max(livres) + timedelta(minutes=Config.MAX_RESERVATION_DURATION_MINUTES)
+    bloqueios = bloqueio_service.get_bloqueios(inicio, fim, excluir_token=token)
+    if not bloqueios:
+        return livres
+
+    por_mesa: Dict[int, list] = {}
+    for bloqueio in bloqueios:
+        por_mesa.setdefault(bloqueio.mesa_id, []).append(bloqueio)
+
+    return {
+        horario: [
+            m for m in mesas
+            if not any(b.sobrepoe(horario, horario + _duracao_reserva(m.duracao_reserva_minutos))
+                       for b in por_mesa.get(m.id, ()))
+        ]
+        for horario, mesas in livres.items()
+    }
+
+
+def _opcoes_reserva(livres: Dict[datetime, list], numero_pessoas: int) -> List[OpcaoReserva]:
+    """Converte mesas livres por horário em opções de reserva (uma por horário e ambiente)"""
+    opcoes = []
+    for horario, mesas in livres.items():
+        por_ambiente: Dict[int, list] = {}
+        for mesa in mesas:
+            por_ambiente.setdefault(mesa.ambiente_id, []).append(mesa)
+
+        for ambiente_mesas in por_ambiente.values():
+            alocacao = alocar(ambiente_mesas, numero_pessoas, Config.MAX_TABLES_COMBINED)
+            if alocacao is None:
+                continue
+            mesa = ambiente_mesas[0]
+            opcoes.append(OpcaoReserva(
+                restaurante_id=mesa.restaurante_id,
+                restaurante=mesa.restaurante,
+                endereco=mesa.endereco,
+                ambiente_id=mesa.ambiente_id,
+                ambiente=mesa.ambiente,
+                horario=horario,
+                alocacao=alocacao,
+                mesas_livres=sum(1 for m in ambiente_mesas if m.capacidade >= numero_pessoas)
+            ))
+    return opcoes
+
+
 class ClienteService(BaseService):
     """Serviço para operações com clientes"""
     
@@ -39,17 +159,7 @@ class ClienteService(BaseService):
         """
         try:
             # Validações
-            is_valid, message = DataValidator.validate_name(nome)
-            if not is_valid:
-                raise ValidationError(message)
-            
-            is_valid, message = DataValidator.validate_email(email)
-            if not is_valid:
-                raise ValidationError(message)
-            
-            is_valid, message = DataValidator.validate_phone(telefone)
-            if not is_valid:
-                raise ValidationError(message)
+            _validar_dados_cliente(nome, email, telefone)
             
             # Verificar se email já existe
             existing_client = self.repository.get_by_email(email)
@@ -67,6 +177,7 @@ class ClienteService(BaseService):
             logger.error(f"Error creating client: {e}")
             return None
     
+    @timed("service.cliente.get_by_email")
     def get_cliente_by_email(self, email: str) -> Optional[Cliente]:
         """Busca cliente por email"""
         return self.repository.get_by_email(email.strip().lower())
@@ -75,9 +186,9 @@ class ClienteService(BaseService):
         """Busca cliente por ID"""
         return self.repository.get_by_id(cliente_id)
     
-    def get_all_clientes(self) -> List[Cliente]:
-        """Retorna todos os clientes ativos"""
-        return self.repository.get_all()
+    def get_all_clientes(self) -> List[ClienteRow]:
+        """Retorna todos os clientes ativos (linhas de leitura)"""
+        return self.repository.get_rows()
     
     def update_cliente(self, cliente_id: int, **kwargs) -> Optional[Cliente]:
         """Atualiza dados do cliente"""
@@ -142,7 +253,8 @@ class RestauranteService(BaseService):
         super().__init__(restaurante_repo)
     
     def create_restaurante(self, nome: str, endereco: str, telefone: str, 
-                          email: str = None, descricao: str = None) -> Optional[Restaurante]:
+                          email: str = None, descricao: str = None,
+                          duracao_reserva_minutos: int = None) -> Optional[Restaurante]:
         """
         Cria um novo restaurante
         
@@ -152,6 +264,7 @@ class RestauranteService(BaseService):
             telefone: Telefone do restaurante
             email: Email do restaurante (opcional)
             descricao: Descrição do restaurante (opcional)
+            duracao_reserva_minutos: Duração das reservas (opcional, padrão da aplicação)
             
         Returns:
             Restaurante criado ou None se houver erro
@@ -175,13 +288,21 @@ class RestauranteService(BaseService):
                     raise ValidationError(message)
                 email = email.strip().lower()
             
+            if duracao_reserva_minutos is not None:
+                is_valid, message = DataValidator.validate_duration(
+                    duracao_reserva_minutos, max_duration=Config.MAX_RESERVATION_DURATION_MINUTES
+                )
+                if not is_valid:
+                    raise ValidationError(message)
+            
             # Criar restaurante
             restaurante = Restaurante(
                 nome=nome.strip(),
                 endereco=endereco.strip(),
                 telefone=telefone.strip(),
                 email=email,
-                descricao=descricao.strip() if descricao else None
+                descricao=descricao.strip() if descricao else None,
+                duracao_reserva_minutos=duracao_reserva_minutos
             )
             return self.repository.create(restaurante)
             
@@ -192,10 +313,13 @@ class RestauranteService(BaseService):
             logger.error(f"Error creating restaurant: {e}")
             return None
     
+    @timed("service.restaurante.get_all")
+    @catalogo_cache.cached("restaurante.get_all")
     def get_all_restaurantes(self) -> List[Restaurante]:
         """Retorna todos os restaurantes ativos"""
         return self.repository.get_all()
     
+    @catalogo_cache.cached("restaurante.get_by_id")
     def get_restaurante_by_id(self, restaurante_id: int) -> Optional[Restaurante]:
         """Busca restaurante por ID"""
         return self.repository.get_by_id(restaurante_id)
@@ -222,6 +346,13 @@ class RestauranteService(BaseService):
                     raise ValidationError(message)
                 kwargs['email'] = kwargs['email'].strip().lower()
             
+            if kwargs.get('duracao_reserva_minutos') is not None:
+                is_valid, message = DataValidator.validate_duration(
+                    kwargs['duracao_reserva_minutos'], max_duration=Config.MAX_RESERVATION_DURATION_MINUTES
+                )
+                if not is_valid:
+                    raise ValidationError(message)
+            
             return self.repository.update(restaurante_id, **kwargs)
             
         except ValidationError as e:
@@ -282,10 +413,12 @@ class AmbienteService(BaseService):
             logger.error(f"Error creating environment: {e}")
             return None
     
+    @catalogo_cache.cached("ambiente.get_by_restaurante")
     def get_ambientes_by_restaurante(self, restaurante_id: int) -> List[Ambiente]:
         """Busca ambientes por restaurante"""
         return self.repository.get_by_restaurante(restaurante_id)
     
+    @catalogo_cache.cached("ambiente.get_by_id")
     def get_ambiente_by_id(self, ambiente_id: int) -> Optional[Ambiente]:
         """Busca ambiente por ID"""
         return self.repository.get_by_id(ambiente_id)
@@ -319,7 +452,7 @@ class MesaService(BaseService):
         super().__init__(mesa_repo)
     
     def create_mesa(self, numero: str, capacidade: int, ambiente_id: int, 
-                   observacoes: str = None) -> Optional[Mesa]:
+                   observacoes: str = None, combinavel: bool = False) -> Optional[Mesa]:
         """
         Cria uma nova mesa
         
@@ -328,6 +461,7 @@ class MesaService(BaseService):
             capacidade: Capacidade da mesa
             ambiente_id: ID do ambiente
             observacoes: Observações sobre a mesa (opcional)
+            combinavel: Se a mesa pode ser juntada a outras para grupos grandes
             
         Returns:
             Mesa criada ou None se houver erro
@@ -355,7 +489,8 @@ class MesaService(BaseService):
                 numero=numero.strip(),
                 capacidade=capacidade,
                 ambiente_id=ambiente_id,
-                observacoes=observacoes.strip() if observacoes else None
+                observacoes=observacoes.strip() if observacoes else None,
+                combinavel=combinavel
             )
             return self.repository.create(mesa)
             
@@ -366,19 +501,183 @@ class MesaService(BaseService):
             logger.error(f"Error creating table: {e}")
             return None
     
-    def get_mesas_by_ambiente(self, ambiente_id: int) -> List[Mesa]:
-        """Busca mesas por ambiente"""
-        return self.repository.get_by_ambiente(ambiente_id)
+    @catalogo_cache.cached("mesa.get_by_ambiente")
+    def get_mesas_by_ambiente(self, ambiente_id: int) -> List[MesaRow]:
+        """Busca mesas por ambiente (linhas de leitura)"""
+        return self.repository.get_rows_by_ambiente(ambiente_id)
     
+    @catalogo_cache.cached("mesa.get_by_id")
     def get_mesa_by_id(self, mesa_id: int) -> Optional[Mesa]:
         """Busca mesa por ID"""
         return self.repository.get_by_id(mesa_id)
     
+    @timed("service.mesa.get_available_tables")
     def get_available_tables(self, ambiente_id: int, data_reserva: datetime, 
-                           numero_pessoas: int) -> List[Mesa]:
-        """Busca mesas disponíveis"""
-        return self.repository.get_available_tables(ambiente_id, data_reserva, numero_pessoas)
-    
+                           numero_pessoas: int, token: str = None) -> List[Mesa]:
+        """Busca mesas livres durante toda a duração da reserva (e não bloqueadas por outras sessões)"""
+        data_fim = data_reserva + _duracao_reserva(ambiente_repo.get_duracao_reserva(ambiente_id))
+        mesas = self.repository.get_available_tables(ambiente_id, data_reserva, numero_pessoas, data_fim)
+        bloqueadas = bloqueio_service.mesas_bloqueadas(data_reserva, data_fim, excluir_token=token)
+        return [m for m in mesas if m.id not in bloqueadas]
+
+    def bloquear_mesas(self, mesa_ids: List[int], data_reserva: datetime,
+                       token: str) -> Optional[datetime]:
+        """
+        Bloqueia temporariamente as mesas escolhidas enquanto o cliente confirma
+
+        Returns:
+            Data de expiração do bloqueio ou None se alguma mesa já não estiver livre
+        """
+        if not mesa_ids:
+            return None
+        data_fim = data_reserva + _duracao_reserva(mesa_repo.get_duracao_reserva(mesa_ids[0]))
+        if reserva_repo.get_conflicting_mesas(mesa_ids, data_reserva, data_fim):
+            return None
+        return bloqueio_service.bloquear(mesa_ids, data_reserva, data_fim, token)
+
+    def libertar_mesas(self, token: str) -> int:
+        """Liberta as mesas bloqueadas pela sessão"""
+        return bloqueio_service.libertar(token)
+
+    @timed("service.mesa.alocar")
+    def alocar_mesas(self, ambiente_id: int, data_reserva: datetime,
+                     numero_pessoas: int, token: str = None) -> Optional[Alocacao]:
+        """
+        Escolhe a mesa com menos lugares vazios ou, se nenhuma comportar o
+        grupo, a melhor combinação de mesas combináveis do ambiente
+
+        Returns:
+            Alocacao com as mesas escolhidas ou None se não houver lugar
+        """
+        data_fim = data_reserva + _duracao_reserva(ambiente_repo.get_duracao_reserva(ambiente_id))
+        bloqueadas = bloqueio_service.mesas_bloqueadas(data_reserva, data_fim, excluir_token=token)
+        livres = [
+            m for m in self.repository.get_available_tables(ambiente_id, data_reserva, 1, data_fim)
+            if m.id not in bloqueadas
+        ]
+        return alocar(livres, numero_pessoas, Config.MAX_TABLES_COMBINED)
+
+    @timed("service.mesa.pesquisar")
+    def pesquisar_disponibilidade(self, dia: date, numero_pessoas: int, horario_inicio: str,
+                                  horario_fim: str = None, texto: str = None,
+                                  limite: int = 20, token: str = None) -> List[OpcaoReserva]:
+        """
+        Pesquisa opções de reserva em todos os restaurantes e ambientes
+
+        Usa uma única query para todos os horários da janela; as opções são
+        ordenadas pela alocação (menos lugares vazios, mesa individual primeiro).
+
+        Args:
+            dia: Dia da reserva
+            numero_pessoas: Número de pessoas
+            horario_inicio: Primeiro horário da janela ("HH:MM")
+            horario_fim: Último horário da janela (None para só horario_inicio)
+            texto: Filtro por restaurante, morada/localidade ou ambiente (opcional)
+            limite: Número máximo de opções
+            token: Sessão cujos bloqueios não contam como ocupação
+
+        Returns:
+            Lista de OpcaoReserva, melhor opção primeiro
+        """
+        horario_fim = horario_fim or horario_inicio
+        agora = datetime.now()
+        horarios = [
+            datetime.combine(dia, datetime.strptime(slot, "%H:%M").time())
+            for slot in Config.TIME_SLOTS
+            if horario_inicio <= slot <= horario_fim
+        ]
+        horarios = [h for h in horarios if h > agora]
+
+        livres = _sem_bloqueios(self.repository.get_free_tables(horarios, texto=texto), token)
+        opcoes = _opcoes_reserva(livres, numero_pessoas)
+        opcoes.sort(key=lambda o: o.ordem)
+        return opcoes[:limite]
+
+    @timed("service.mesa.sugerir_alternativas")
+    def sugerir_alternativas(self, ambiente_id: int, data_reserva: datetime, numero_pessoas: int,
+                             k: int = 5, dias: int = 1, token: str = None) -> List[OpcaoReserva]:
+        """
+        Sugere os k horários livres mais próximos do pedido
+
+        Procura primeiro no próprio dia (no mesmo ambiente e depois nos outros
+        ambientes do restaurante) e a seguir nos dias vizinhos, tudo com uma
+        única query de ocupação.
+
+        Args:
+            ambiente_id: Ambiente pedido
+            data_reserva: Data e hora pedidas
+            numero_pessoas: Número de pessoas
+            k: Número máximo de sugestões
+            dias: Dias a procurar antes e depois do dia pedido
+            token: Sessão cujos bloqueios não contam como ocupação
+
+        Returns:
+            Lista de OpcaoReserva, mais próxima primeiro
+        """
+        ambiente = ambiente_repo.get_by_id(ambiente_id)
+        if not ambiente:
+            return []
+
+        agora = datetime.now()
+        horarios = [
+            datetime.combine(data_reserva.date() + timedelta(days=delta), datetime.strptime(slot, "%H:%M").time())
+            for delta in range(-dias, dias + 1)
+            for slot in Config.TIME_SLOTS
+        ]
+        horarios = [h for h in horarios if h > agora]
+
+        livres = _sem_bloqueios(
+            self.repository.get_free_tables(horarios, restaurante_id=ambiente.restaurante_id), token
+        )
+        opcoes = [
+            o for o in _opcoes_reserva(livres, numero_pessoas)
+            if not (o.horario == data_reserva and o.ambiente_id == ambiente_id)
+        ]
+
+        def distancia(opcao: OpcaoReserva):
+            outro_dia = opcao.horario.date() != data_reserva.date()
+            outro_ambiente = opcao.ambiente_id != ambiente_id
+            return (outro_dia, outro_ambiente, abs(opcao.horario - data_reserva), opcao.horario,
+                    opcao.alocacao.lugares_vazios)
+
+        opcoes.sort(key=distancia)
+        return opcoes[:k]
+
+    @timed("service.mesa.get_availability_grid")
+    def get_availability_grid(self, ambiente_id: int, dia: date,
+                              numero_pessoas: int, token: str = None) -> Dict[str, int]:
+        """
+        Retorna o número de mesas livres em cada horário de Config.TIME_SLOTS
+
+        Horários sem mesa individual mas com uma combinação de mesas possível
+        contam como 1. Horários já passados (no próprio dia) aparecem com 0.
+
+        Args:
+            ambiente_id: ID do ambiente
+            dia: Dia da reserva
+            numero_pessoas: Número de pessoas
+            token: Sessão cujos bloqueios não contam como ocupação
+
+        Returns:
+            Dicionário {"HH:MM": mesas livres}, pela ordem de Config.TIME_SLOTS
+        """
+        horarios = {
+            slot: datetime.combine(dia, datetime.strptime(slot, "%H:%M").time())
+            for slot in Config.TIME_SLOTS
+        }
+        livres = _sem_bloqueios(
+            self.repository.get_free_tables(list(horarios.values()), ambiente_id=ambiente_id), token
+        )
+        agora = datetime.now()
+
+        grid = {}
+        for slot, horario in horarios.items():
+            mesas = livres[horario] if horario > agora else []
+            grid[slot] = sum(1 for m in mesas if m.capacidade >= numero_pessoas)
+            if not grid[slot] and alocar(mesas, numero_pessoas, Config.MAX_TABLES_COMBINED):
+                grid[slot] = 1
+        return grid
+
     def update_mesa(self, mesa_id: int, **kwargs) -> Optional[Mesa]:
         """Atualiza dados da mesa"""
         try:
@@ -413,8 +712,11 @@ class ReservaService(BaseService):
     def __init__(self):
         super().__init__(reserva_repo)
     
+    @timed("service.reserva.create")
     def create_reserva(self, cliente_id: int, mesa_id: int, data_reserva: datetime,
-                      numero_pessoas: int, observacoes: str = None) -> Optional[Reserva]:
+                      numero_pessoas: int, observacoes: str = None,
+                      duracao_minutos: int = None, token: str = None,
+                      chave_idempotencia: str = None) -> Optional[Reserva]:
         """
         Cria uma nova reserva
         
@@ -424,25 +726,34 @@ class ReservaService(BaseService):
             data_reserva: Data e hora da reserva
             numero_pessoas: Número de pessoas
             observacoes: Observações sobre a reserva (opcional)
+            duracao_minutos: Duração da reserva (opcional, padrão do restaurante)
+            token: Sessão que bloqueou a mesa (o bloqueio é libertado ao criar)
+            chave_idempotencia: Identificador do pedido; repetições devolvem a reserva original
             
         Returns:
             Reserva criada ou None se houver erro
         """
+        # Pedido repetido: devolver o resultado original antes do controlo de
+        # admissão, para que as repetições do cliente não gastem a sua quota
+        if chave_idempotencia:
+            original = chave_idempotencia_repo.get_reserva(
+                chave_idempotencia, OPERACAO_CRIAR_RESERVA, cliente_id, datetime.now()
+            )
+            if original:
+                logger.info(f"Repeated reservation request {chave_idempotencia}: returning {original.id}")
+                return original
+        
+        return self._create_reserva(cliente_id, mesa_id, data_reserva, numero_pessoas, observacoes,
+                                    duracao_minutos, token, chave_idempotencia)
+    
+    @admission_controller.controlar("reserva", chave="cliente_id")
+    def _create_reserva(self, cliente_id: int, mesa_id: int, data_reserva: datetime,
+                        numero_pessoas: int, observacoes: Optional[str], duracao_minutos: Optional[int],
+                        token: Optional[str], chave_idempotencia: Optional[str]) -> Optional[Reserva]:
+        """Valida e cria a reserva (pedidos novos, sujeitos ao controlo de admissão)"""
         try:
             # Validações
-            if not cliente_id:
-                raise ValidationError("Cliente é obrigatório")
-            
-            if not mesa_id:
-                raise ValidationError("Mesa é obrigatória")
-            
-            is_valid, message = DataValidator.validate_reservation_date(data_reserva)
-            if not is_valid:
-                raise ValidationError(message)
-            
-            is_valid, message = DataValidator.validate_capacity(numero_pessoas)
-            if not is_valid:
-                raise ValidationError(message)
+            _validar_dados_reserva(cliente_id, mesa_id, data_reserva, numero_pessoas, duracao_minutos)
             
             # Verificar se cliente existe
             cliente = cliente_repo.get_by_id(cliente_id)
@@ -458,73 +769,415 @@ class ReservaService(BaseService):
             if numero_pessoas > mesa.capacidade:
                 raise ValidationError(f"Mesa comporta apenas {mesa.capacidade} pessoas")
             
-            # Verificar disponibilidade da mesa
-            session = db_manager.get_session()
-            try:
-                reserva_existente = session.query(Reserva).filter(
-                    Reserva.mesa_id == mesa_id,
-                    Reserva.data_reserva == data_reserva,
-                    Reserva.status == 'confirmada'
-                ).first()
-                
-                if reserva_existente:
-                    raise ValidationError("Mesa já reservada para este horário")
-            finally:
-                db_manager.close_session(session)
+            # Verificar disponibilidade da mesa durante toda a reserva
+            data_fim = data_reserva + _duracao_reserva(
+                duracao_minutos or mesa_repo.get_duracao_reserva(mesa_id)
+            )
+            if self.repository.has_conflict(mesa_id, data_reserva, data_fim):
+                raise ValidationError("Mesa já reservada para este horário")
+            
+            if mesa_id in bloqueio_service.mesas_bloqueadas(data_reserva, data_fim, excluir_token=token):
+                raise ValidationError("Mesa a ser reservada por outro cliente. Tente dentro de alguns minutos.")
             
             # Criar reserva
             reserva = Reserva(
                 cliente_id=cliente_id,
                 mesa_id=mesa_id,
                 data_reserva=data_reserva,
+                data_fim=data_fim,
                 numero_pessoas=numero_pessoas,
                 observacoes=observacoes.strip() if observacoes else None
             )
-            return self.repository.create(reserva)
+            if chave_idempotencia:
+                criada, _ = self.repository.create_idempotente(reserva, ChaveIdempotencia(
+                    chave_idempotencia, OPERACAO_CRIAR_RESERVA, None, _expiracao_idempotencia()
+                ))
+            else:
+                criada = self.repository.create(reserva)
+            if criada:
+                bloqueio_service.libertar(token)
+            return criada
             
         except ValidationError as e:
+            # Um pedido simultâneo com a mesma chave pode ter reservado a mesa entretanto
+            if chave_idempotencia:
+                original = chave_idempotencia_repo.get_reserva(
+                    chave_idempotencia, OPERACAO_CRIAR_RESERVA, cliente_id, datetime.now()
+                )
+                if original:
+                    return original
             logger.error(f"Validation error creating reservation: {e}")
             raise e
         except Exception as e:
             logger.error(f"Error creating reservation: {e}")
             return None
     
-    def get_reservas_by_cliente(self, cliente_id: int) -> List[Reserva]:
-        """Busca reservas por cliente"""
-        return self.repository.get_by_cliente(cliente_id)
+    @timed("service.reserva.create_combinada")
+    @admission_controller.controlar("reserva", chave="cliente_id")
+    def create_reserva_combinada(self, cliente_id: int, mesa_ids: List[int], data_reserva: datetime,
+                                 numero_pessoas: int, observacoes: str = None,
+                                 token: str = None) -> List[Reserva]:
+        """
+        Cria uma reserva para um grupo em várias mesas combinadas (uma reserva por mesa)
+
+        Todas as reservas são criadas na mesma transação: ou o grupo fica
+        com todas as mesas, ou com nenhuma.
+
+        Args:
+            cliente_id: ID do cliente
+            mesa_ids: IDs das mesas a combinar (do mesmo ambiente)
+            data_reserva: Data e hora da reserva
+            numero_pessoas: Número total de pessoas
+            observacoes: Observações sobre a reserva (opcional)
+            token: Sessão que bloqueou as mesas (o bloqueio é libertado ao criar)
+
+        Returns:
+            Reservas criadas (lista vazia se houver erro)
+        """
+        try:
+            if not cliente_id:
+                raise ValidationError("Cliente é obrigatório")
+
+            if len(set(mesa_ids)) < 2:
+                raise ValidationError("Indique pelo menos duas mesas para combinar")
+
+            if len(set(mesa_ids)) > Config.MAX_TABLES_COMBINED:
+                raise ValidationError(f"Só é possível combinar até {Config.MAX_TABLES_COMBINED} mesas")
+
+            is_valid, message = DataValidator.validate_reservation_date(data_reserva)
+            if not is_valid:
+                raise ValidationError(message)
+
+            if not numero_pessoas or numero_pessoas < 1:
+                raise ValidationError("Número de pessoas deve ser pelo menos 1")
+
+            cliente = cliente_repo.get_by_id(cliente_id)
+            if not cliente:
+                raise ValidationError("Cliente não encontrado")
+
+            mesas = [mesa_repo.get_by_id(mesa_id) for mesa_id in dict.fromkeys(mesa_ids)]
+            if not all(mesas):
+                raise ValidationError("Mesa não encontrada")
+
+            if len({m.ambiente_id for m in mesas}) > 1:
+                raise ValidationError("Só é possível combinar mesas do mesmo ambiente")
+
+            if not all(m.combinavel for m in mesas):
+                raise ValidationError("Todas as mesas têm de ser combináveis")
+
+            alocacao = Alocacao(mesas=mesas, numero_pessoas=numero_pessoas)
+            if alocacao.lugares_vazios < 0:
+                raise ValidationError(f"As mesas comportam apenas {alocacao.capacidade} pessoas")
+
+            data_fim = data_reserva + _duracao_reserva(ambiente_repo.get_duracao_reserva(mesas[0].ambiente_id))
+            if self.repository.get_conflicting_mesas([m.id for m in mesas], data_reserva, data_fim):
+                raise ValidationError("Uma das mesas já está reservada para este horário")
+
+            bloqueadas = bloqueio_service.mesas_bloqueadas(data_reserva, data_fim, excluir_token=token)
+            if any(m.id in bloqueadas for m in mesas):
+                raise ValidationError("Uma das mesas está a ser reservada por outro cliente. Tente dentro de alguns minutos.")
+
+            numeros = " + ".join(m.numero for m in mesas)
+            nota = f"Mesas combinadas: {numeros} ({numero_pessoas} pessoas)"
+            if observacoes and observacoes.strip():
+                nota = f"{nota} - {observacoes.strip()}"
+
+            reservas = [
+                Reserva(
+                    cliente_id=cliente_id,
+                    mesa_id=mesa.id,
+                    data_reserva=data_reserva,
+                    data_fim=data_fim,
+                    numero_pessoas=pessoas,
+                    observacoes=nota
+                )
+                for mesa, pessoas in zip(mesas, alocacao.pessoas_por_mesa)
+            ]
+            criadas = self.repository.create_many(reservas)
+            if criadas:
+                bloqueio_service.libertar(token)
+            return criadas
+
+        except ValidationError as e:
+            logger.error(f"Validation error creating combined reservation: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Error creating combined reservation: {e}")
+            return []
+
+    @timed("service.reserva.create_batch")
+    @admission_controller.controlar("reserva", chave="cliente_id")
+    def create_batch(self, cliente_id: int, pedidos: List[PedidoReserva],
+                     token: str = None) -> List[Reserva]:
+        """
+        Cria as reservas de um grupo ou evento (várias mesas e/ou horários) numa só transação
+        
+        Todos os pedidos são validados antes de gravar; se algum falhar, nada é
+        criado e o LoteReservaError indica cada pedido em conflito.
+        
+        Args:
+            cliente_id: ID do cliente
+            pedidos: Pedidos (mesa, horário, pessoas) a reservar
+            token: Sessão que bloqueou as mesas (o bloqueio é libertado ao criar)
+            
+        Returns:
+            Reservas criadas (lista vazia se houver erro)
+        """
+        try:
+            if not cliente_id:
+                raise ValidationError("Cliente é obrigatório")
+            
+            if not pedidos:
+                raise ValidationError("Indique pelo menos um pedido de reserva")
+            
+            cliente = cliente_repo.get_by_id(cliente_id)
+            if not cliente:
+                raise ValidationError("Cliente não encontrado")
+            
+            mesas = mesa_repo.get_with_duracao(list({p.mesa_id for p in pedidos}))
+            conflitos: List[ConflitoLote] = []
+            validos: List[int] = []
+            reservas: List[Reserva] = []
+            
+            for i, pedido in enumerate(pedidos):
+                is_valid, message = DataValidator.validate_reservation_date(pedido.data_reserva)
+                if not is_valid:
+                    conflitos.append(ConflitoLote(i, pedido, message))
+                    continue
+                
+                is_valid, message = DataValidator.validate_capacity(pedido.numero_pessoas)
+                if not is_valid:
+                    conflitos.append(ConflitoLote(i, pedido, message))
+                    continue
+                
+                if pedido.mesa_id not in mesas:
+                    conflitos.append(ConflitoLote(i, pedido, "Mesa não encontrada"))
+                    continue
+                
+                mesa, duracao = mesas[pedido.mesa_id]
+                if pedido.numero_pessoas > mesa.capacidade:
+                    conflitos.append(ConflitoLote(i, pedido, f"Mesa {mesa.numero} comporta apenas {mesa.capacidade} pessoas"))
+                    continue
+                
+                validos.append(i)
+                reservas.append(Reserva(
+                    cliente_id=cliente_id,
+                    mesa_id=mesa.id,
+                    data_reserva=pedido.data_reserva,
+                    data_fim=pedido.data_reserva + _duracao_reserva(duracao),
+                    numero_pessoas=pedido.numero_pessoas,
+                    observacoes=pedido.observacoes.strip() if pedido.observacoes else None
+                ))
+            
+            # Sobreposições dentro do próprio lote: basta comparar cada pedido com o anterior da mesma mesa
+            indices = {id(r): i for i, r in zip(validos, reservas)}
+            anterior: Dict[int, Reserva] = {}
+            for reserva in sorted(reservas, key=lambda r: (r.mesa_id, r.data_reserva)):
+                outra = anterior.get(reserva.mesa_id)
+                if outra is not None and outra.data_fim > reserva.data_reserva:
+                    i = indices[id(reserva)]
+                    conflitos.append(ConflitoLote(
+                        i, pedidos[i], f"Sobrepõe-se ao pedido {indices[id(outra)] + 1} na mesma mesa"
+                    ))
+                if outra is None or reserva.data_fim > outra.data_fim:
+                    anterior[reserva.mesa_id] = reserva
+            
+            # Mesas bloqueadas por outras sessões
+            if reservas:
+                bloqueios = bloqueio_service.get_bloqueios(
+                    min(r.data_reserva for r in reservas), max(r.data_fim for r in reservas), excluir_token=token
+                )
+                for i, reserva in zip(validos, reservas):
+                    if any(b.mesa_id == reserva.mesa_id and b.sobrepoe(reserva.data_reserva, reserva.data_fim)
+                           for b in bloqueios):
+                        conflitos.append(ConflitoLote(i, pedidos[i], "Mesa a ser reservada por outro cliente"))
+            
+            # Com outros conflitos já nada é gravado, mas os conflitos com reservas existentes
+            # também são indicados; sem eles a verificação é feita na transação de criação
+            if conflitos:
+                existentes = self.repository.get_batch_conflicts(reservas)
+                criadas = []
+            else:
+                criadas, existentes = self.repository.create_batch(reservas)
+            
+            conflitos.extend(
+                ConflitoLote(
+                    validos[j], pedidos[validos[j]],
+                    f"Mesa {mesas[existente.mesa_id][0].numero} já reservada das "
+                    f"{existente.data_reserva.strftime('%H:%M')} às {existente.data_fim.strftime('%H:%M')}"
+                )
+                for j, existente in existentes
+            )
+            if conflitos:
+                raise LoteReservaError(sorted(conflitos, key=lambda c: c.indice))
+            
+            if criadas:
+                bloqueio_service.libertar(token)
+            return criadas
+            
+        except ValidationError as e:
+            logger.error(f"Validation error creating reservation batch: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Error creating reservation batch: {e}")
+            return []
+    
+    @timed("service.reserva.get_by_cliente")
+    def get_reservas_by_cliente(self, cliente_id: int, include_archive: bool = False) -> List[ReservaRow]:
+        """Busca reservas por cliente (opcionalmente incluindo o arquivo), como linhas de leitura"""
+        reservas = self.repository.get_rows_by_cliente(cliente_id)
+        if include_archive:
+            reservas = reservas + reserva_arquivo_repo.get_rows_by_cliente(cliente_id)
+            reservas.sort(key=lambda r: r.data_reserva, reverse=True)
+        return reservas
     
-    def get_reservas_by_restaurante(self, restaurante_id: int) -> List[Reserva]:
-        """Busca reservas por restaurante"""
-        return self.repository.get_by_restaurante(restaurante_id)
+    def get_reservas_by_restaurante(self, restaurante_id: int, include_archive: bool = False) -> List[ReservaRow]:
+        """Busca reservas por restaurante (opcionalmente incluindo o arquivo), como linhas de leitura"""
+        reservas = self.repository.get_rows_by_restaurante(restaurante_id)
+        if include_archive:
+            reservas = reservas + reserva_arquivo_repo.get_rows_by_restaurante(restaurante_id)
+            reservas.sort(key=lambda r: r.data_reserva, reverse=True)
+        return reservas
+    
+    @timed("service.reserva.get_periodo")
+    def get_reservas_periodo(self, data_inicio: date, data_fim: date,
+                             include_archive: bool = True) -> List[ReservaRow]:
+        """
+        Busca reservas entre duas datas (inclusive)
+        
+        Args:
+            data_inicio: Primeiro dia do período
+            data_fim: Último dia do período
+            include_archive: Incluir reservas movidas para o arquivo
+            
+        Returns:
+            Lista de reservas (linhas de leitura) ordenada por data
+        """
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim + timedelta(days=1), datetime.min.time())
+        
+        reservas = self.repository.get_rows_by_periodo(inicio, fim)
+        if include_archive:
+            reservas = reservas + reserva_arquivo_repo.get_rows_by_periodo(inicio, fim)
+            reservas.sort(key=lambda r: r.data_reserva)
+        return reservas
     
     def get_reserva_by_id(self, reserva_id: int) -> Optional[Reserva]:
         """Busca reserva por ID"""
         return self.repository.get_by_id(reserva_id)
     
-    def cancel_reserva(self, reserva_id: int) -> bool:
-        """Cancela uma reserva"""
-        return self.repository.cancel_reservation(reserva_id)
+    @timed("service.reserva.cancel")
+    def cancel_reserva(self, reserva_id: int, chave_idempotencia: str = None) -> bool:
+        """
+        Cancela uma reserva e oferece a mesa libertada à lista de espera
+        
+        Com chave_idempotencia, um pedido repetido devolve True sem voltar a escrever.
+        """
+        chave = None
+        if chave_idempotencia:
+            if chave_idempotencia_repo.existe(chave_idempotencia, OPERACAO_CANCELAR_RESERVA,
+                                              reserva_id, datetime.now()):
+                logger.info(f"Repeated cancellation request {chave_idempotencia} for reservation {reserva_id}")
+                return True
+            chave = ChaveIdempotencia(chave_idempotencia, OPERACAO_CANCELAR_RESERVA,
+                                      reserva_id, _expiracao_idempotencia())
+        cancelada, _ = self.repository.cancel_with_promotion(reserva_id, chave, _mesa_bloqueada)
+        return cancelada
     
-    def update_reserva(self, reserva_id: int, **kwargs) -> Optional[Reserva]:
-        """Atualiza dados da reserva"""
+    @timed("service.reserva.move")
+    def move_reserva(self, reserva_id: int, data_reserva: datetime = None, mesa_id: int = None,
+                     token: str = None) -> Optional[Reserva]:
+        """
+        Muda o horário e/ou a mesa de uma reserva confirmada numa única transação
+        
+        A reserva mantém a sua duração. Se o destino estiver ocupado nada é
+        alterado; o lugar libertado na origem é oferecido à lista de espera.
+        
+        Args:
+            reserva_id: ID da reserva
+            data_reserva: Nova data e hora (opcional, mantém a atual)
+            mesa_id: Nova mesa (opcional, mantém a atual)
+            token: Sessão que bloqueou a mesa de destino (o bloqueio é libertado ao mover)
+            
+        Returns:
+            Reserva alterada ou None se houver erro
+        """
         try:
-            if 'data_reserva' in kwargs:
-                is_valid, message = DataValidator.validate_reservation_date(kwargs['data_reserva'])
-                if not is_valid:
-                    raise ValidationError(message)
+            reserva = self.repository.get_by_id(reserva_id)
+            if not reserva:
+                raise ValidationError("Reserva não encontrada")
+            
+            if reserva.status != 'confirmada':
+                raise ValidationError("Só é possível alterar reservas confirmadas")
+            
+            data_reserva = data_reserva or reserva.data_reserva
+            mesa_id = mesa_id or reserva.mesa_id
+            if data_reserva == reserva.data_reserva and mesa_id == reserva.mesa_id:
+                return reserva
+            
+            is_valid, message = DataValidator.validate_reservation_date(data_reserva)
+            if not is_valid:
+                raise ValidationError(message)
             
+            mesas = mesa_repo.get_with_duracao([mesa_id])
+            if mesa_id not in mesas:
+                raise ValidationError("Mesa não encontrada")
+            
+            mesa, duracao = mesas[mesa_id]
+            if reserva.numero_pessoas > mesa.capacidade:
+                raise ValidationError(f"Mesa comporta apenas {mesa.capacidade} pessoas")
+            
+            data_fim = data_reserva + _duracao_reserva(reserva.duracao_minutos or duracao)
+            if mesa_id in bloqueio_service.mesas_bloqueadas(data_reserva, data_fim, excluir_token=token):
+                raise ValidationError("Mesa a ser reservada por outro cliente. Tente dentro de alguns minutos.")
+            
+            movida, conflito = self.repository.move(
+                reserva_id, mesa_id, data_reserva, data_fim, _mesa_bloqueada
+            )
+            if conflito is not None:
+                raise ValidationError(
+                    f"Mesa {mesa.numero} já reservada das {conflito.data_reserva.strftime('%H:%M')} "
+                    f"às {conflito.data_fim.strftime('%H:%M')}"
+                )
+            
+            if movida:
+                bloqueio_service.libertar(token)
+            return movida
+            
+        except ValidationError as e:
+            logger.error(f"Validation error moving reservation: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Error moving reservation: {e}")
+            return None
+    
+    def update_reserva(self, reserva_id: int, **kwargs) -> Optional[Reserva]:
+        """
+        Atualiza dados da reserva (mudanças de horário ou de mesa passam por move_reserva)
+        
+        Todos os dados são validados antes da mudança, que é confirmada na
+        sua própria transação: um valor inválido não deixa a reserva movida.
+        """
+        try:
             if 'numero_pessoas' in kwargs:
                 is_valid, message = DataValidator.validate_capacity(kwargs['numero_pessoas'])
                 if not is_valid:
                     raise ValidationError(message)
                 
-                # Verificar capacidade da mesa se estiver mudando o número de pessoas
+                # Verificar capacidade da mesa (a de destino, se a mesa também mudar)
                 reserva = self.repository.get_by_id(reserva_id)
                 if reserva:
-                    mesa = mesa_repo.get_by_id(reserva.mesa_id)
+                    mesa = mesa_repo.get_by_id(kwargs.get('mesa_id') or reserva.mesa_id)
                     if mesa and kwargs['numero_pessoas'] > mesa.capacidade:
                         raise ValidationError(f"Mesa comporta apenas {mesa.capacidade} pessoas")
             
+            if 'data_reserva' in kwargs or 'mesa_id' in kwargs:
+                reserva = self.move_reserva(
+                    reserva_id, kwargs.pop('data_reserva', None), kwargs.pop('mesa_id', None)
+                )
+                if not reserva or not kwargs:
+                    return reserva
+            
             return self.repository.update(reserva_id, **kwargs)
             
         except ValidationError as e:
@@ -534,32 +1187,19 @@ class ReservaService(BaseService):
             logger.error(f"Error updating reservation: {e}")
             return None
 
+    @timed("service.reserva.get_by_data")
     def get_reservas_by_data(self, data: datetime) -> List[Reserva]:
         """Busca reservas por data específica"""
-        try:
-            session = db_manager.get_session()
-            try:
-                # Criar data de início e fim do dia
-                start_date = data.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_date = data.replace(hour=23, minute=59, second=59, microsecond=999999)
-                
-                # Buscar reservas da data específica
-                reservas = session.query(Reserva).filter(
-                    Reserva.data_reserva >= start_date,
-                    Reserva.data_reserva <= end_date
-                ).all()
-                
-                return reservas
-            finally:
-                db_manager.close_session(session)
-        except Exception as e:
-            logger.error(f"Error getting reservations by date: {e}")
-            return []
+        return self.repository.get_by_slot(data)
     
     def get_all_reservas(self) -> List[Reserva]:
         """Busca todas as reservas"""
         return self.repository.get_all()
     
+    def count_reservas(self) -> int:
+        """Conta as reservas da tabela principal (sem o arquivo)"""
+        return self.repository.count()
+    
     def delete_reserva(self, reserva_id: int) -> bool:
         """
         Exclui uma reserva permanentemente
@@ -577,9 +1217,84 @@ class ReservaService(BaseService):
             return False
 
 
+class ListaEsperaService(BaseService):
+    """Serviço para a lista de espera de horários esgotados"""
+    
+    def __init__(self):
+        super().__init__(lista_espera_repo)
+    
+    def inscrever(self, cliente_id: int, ambiente_id: int, data_reserva: datetime,
+                  numero_pessoas: int, observacoes: str = None) -> Optional[ListaEspera]:
+        """
+        Inscreve um cliente na lista de espera de um horário
+        
+        Quando uma reserva compatível for cancelada, o pedido é convertido
+        automaticamente numa reserva confirmada.
+        
+        Args:
+            cliente_id: ID do cliente
+            ambiente_id: ID do ambiente
+            data_reserva: Data e hora pretendidas
+            numero_pessoas: Número de pessoas
+            observacoes: Observações (opcional)
+            
+        Returns:
+            Pedido criado ou None se houver erro
+        """
+        try:
+            if not cliente_id:
+                raise ValidationError("Cliente é obrigatório")
+            
+            if not ambiente_id:
+                raise ValidationError("Ambiente é obrigatório")
+            
+            is_valid, message = DataValidator.validate_reservation_date(data_reserva)
+            if not is_valid:
+                raise ValidationError(message)
+            
+            is_valid, message = DataValidator.validate_capacity(numero_pessoas)
+            if not is_valid:
+                raise ValidationError(message)
+            
+            if self.repository.get_ativa(cliente_id, ambiente_id, data_reserva):
+                raise ValidationError("Já está na lista de espera para este horário")
+            
+            pedido = ListaEspera(
+                cliente_id=cliente_id,
+                ambiente_id=ambiente_id,
+                data_reserva=data_reserva,
+                numero_pessoas=numero_pessoas,
+                observacoes=observacoes.strip() if observacoes else None
+            )
+            return self.repository.create(pedido)
+            
+        except ValidationError as e:
+            logger.error(f"Validation error joining waitlist: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Error joining waitlist: {e}")
+            return None
+    
+    def get_pedidos_by_cliente(self, cliente_id: int) -> List[ListaEspera]:
+        """Busca os pedidos ativos de um cliente"""
+        return self.repository.get_ativas_by_cliente(cliente_id)
+    
+    def count_pedidos(self, ambiente_id: int, data_reserva: datetime) -> int:
+        """Número de pedidos à espera para um ambiente e horário"""
+        return self.repository.count_ativas(ambiente_id, data_reserva)
+    
+    def sair(self, pedido_id: int) -> bool:
+        """Retira um pedido da lista de espera"""
+        return self.repository.update(pedido_id, status='cancelada') is not None
+
+
 # Instâncias dos serviços
 cliente_service = ClienteService()
 restaurante_service = RestauranteService()
 ambiente_service = AmbienteService()
 mesa_service = MesaService()
-reserva_service = ReservaService()
\ No newline at end of file
+reserva_service = ReservaService()
+lista_espera_service = ListaEsperaService()
+
+# Serviços de manutenção
+from services.maintenance import arquivo_service, finalizacao_service, maintenance_scheduler
@@ -0,0 +1,191 @@
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+from utils.validators import ValidationError
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissaoRecusada(ValidationError):
+    """Pedido recusado pelo controlo de admissão (limite do cliente ou sistema sobrecarregado)"""
+
+    def __init__(self, mensagem: str, operacao: str, motivo: str, retry_after_s: float):
+        super().__init__(mensagem)
+        self.operacao = operacao
+        self.motivo = motivo  # 'limite_cliente' ou 'sobrecarga'
+        self.retry_after_s = retry_after_s
+
+
+class TokenBucket:
+    """Balde de fichas: até `capacidade` pedidos seguidos, repostos a `taxa_por_s` fichas por segundo"""
+
+    def __init__(self, capacidade: float, taxa_por_s: float):
+        self.capacidade = capacidade
+        self.taxa_por_s = taxa_por_s
+        self.fichas = capacidade
+        self.atualizado = time.monotonic()
+
+    def consumir(self, agora: float) -> float:
+        """Consome uma ficha; devolve 0 se conseguiu ou os segundos até haver uma ficha disponível"""
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.taxa_por_s)
+        self.atualizado = agora
+        if self.fichas >= 1:
+            self.fichas -= 1
+            return 0.0
+        return (1 - self.fichas) / self.taxa_por_s if self.taxa_por_s > 0 else float('inf')
+
+
+@dataclass
+class LimiteOperacao:
+    """Limite por cliente de uma operação: rajada e pedidos por minuto"""
+    rajada: int
+    por_minuto: float
+
+
+@dataclass
+class ContadoresOperacao:
+    admitidos: int = 0
+    recusados_limite: int = 0
+    recusados_sobrecarga: int = 0
+    em_curso: int = 0
+    pico_em_curso: int = 0
+
+
+# Limites por operação (rajada, pedidos por minuto por cliente)
+LIMITES_PADRAO = {
+    'reserva': LimiteOperacao(Config.RATE_LIMIT_BOOKING_BURST, Config.RATE_LIMIT_BOOKING_PER_MINUTE),
+    'pesquisa': LimiteOperacao(Config.RATE_LIMIT_SEARCH_BURST, Config.RATE_LIMIT_SEARCH_PER_MINUTE),
+    'login': LimiteOperacao(Config.RATE_LIMIT_LOGIN_BURST, Config.RATE_LIMIT_LOGIN_PER_MINUTE),
+}
+
+
+class AdmissionController:
+    """
+    Controlo de admissão à frente das operações que tocam na base de dados
+
+    Cada cliente tem um balde de fichas por operação e todas as operações
+    partilham um limite global de pedidos em curso. Os pedidos acima dos
+    limites são recusados de imediato (AdmissaoRecusada) em vez de ficarem
+    à espera do bloqueio de escrita do SQLite.
+    """
+
+    def __init__(self, limites: Dict[str, LimiteOperacao] = None,
+                 max_concorrentes: int = Config.ADMISSION_MAX_CONCURRENT,
+                 max_clientes: int = Config.ADMISSION_MAX_TRACKED_CLIENTS,
+                 ativo: bool = Config.ADMISSION_ENABLED):
+        self.limites = dict(limites or LIMITES_PADRAO)
+        self.max_concorrentes = max_concorrentes
+        self.max_clientes = max_clientes
+        self.ativo = ativo
+        self._baldes: 'OrderedDict[tuple, TokenBucket]' = OrderedDict()
+        self._contadores: Dict[str, ContadoresOperacao] = {}
+        self._em_curso = 0
+        self._lock = threading.Lock()
+
+    def _contadores_de(self, operacao: str) -> ContadoresOperacao:
+        if operacao not in self._contadores:
+            self._contadores[operacao] = ContadoresOperacao()
+        return self._contadores[operacao]
+
+    def _balde(self, operacao: str, chave: Hashable) -> Optional[TokenBucket]:
+        limite = self.limites.get(operacao)
+        if limite is None or chave is None:
+            return None
+        balde = self._baldes.get((operacao, chave))
+        if balde is None:
+            balde = TokenBucket(limite.rajada, limite.por_minuto / 60)
+            self._baldes[(operacao, chave)] = balde
+            # Esquecer os clientes inativos há mais tempo
+            while len(self._baldes) > self.max_clientes:
+                self._baldes.popitem(last=False)
+        else:
+            self._baldes.move_to_end((operacao, chave))
+        return balde
+
+    def entrar(self, operacao: str, chave: Hashable = None):
+        """Admite um pedido ou lança AdmissaoRecusada (chamar sair() no fim)"""
+        with self._lock:
+            contadores = self._contadores_de(operacao)
+
+            if self._em_curso >= self.max_concorrentes:
+                contadores.recusados_sobrecarga += 1
+                raise AdmissaoRecusada(
+                    "Sistema com muita procura neste momento. Tente novamente dentro de alguns segundos.",
+                    operacao, 'sobrecarga', 1.0
+                )
+
+            balde = self._balde(operacao, chave)
+            espera = balde.consumir(time.monotonic()) if balde else 0.0
+            if espera > 0:
+                contadores.recusados_limite += 1
+                raise AdmissaoRecusada(
+                    f"Demasiados pedidos seguidos. Aguarde {max(1, round(espera))} segundo(s) e tente novamente.",
+                    operacao, 'limite_cliente', espera
+                )
+
+            self._em_curso += 1
+            contadores.admitidos += 1
+            contadores.em_curso += 1
+            contadores.pico_em_curso = max(contadores.pico_em_curso, contadores.em_curso)
+
+    def sair(self, operacao: str):
+        """Liberta o lugar ocupado por um pedido admitido"""
+        with self._lock:
+            self._em_curso -= 1
+            self._contadores_de(operacao).em_curso -= 1
+
+    @contextmanager
+    def admitir(self, operacao: str, chave: Hashable = None):
+        """Bloco executado apenas se o pedido for admitido (chave None aplica só o limite global)"""
+        if not self.ativo:
+            yield
+            return
+        try:
+            self.entrar(operacao, chave)
+        except AdmissaoRecusada as e:
+            logger.warning(f"Admission rejected for {operacao} ({e.motivo}, key={chave})")
+            raise
+        try:
+            yield
+        finally:
+            self.sair(operacao)
+
+    def controlar(self, operacao: str, chave: str):
+        """Decorador que admite o método pelo valor do argumento `chave` (ex: 'cliente_id')"""
+        def decorator(func):
+            assinatura = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                valor = assinatura.bind_partial(*args, **kwargs).arguments.get(chave)
+                with self.admitir(operacao, valor):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def get_contadores(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores por operação (para afinar os limites)"""
+        with self._lock:
+            return {operacao: dict(vars(c)) for operacao, c in self._contadores.items()}
+
+    @property
+    def em_curso(self) -> int:
+        return self._em_curso
+
+    def reset(self):
+        """Esquece os baldes dos clientes e zera os contadores"""
+        with self._lock:
+            self._baldes.clear()
+            self._contadores = {op: ContadoresOperacao(em_curso=c.em_curso, pico_em_curso=c.em_curso)
+                                for op, c in self._contadores.items()}
+
+
+# Instância global do controlo de admissão
+admission_controller = AdmissionController()
@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+
+@dataclass
+class Alocacao:
+    """Mesa (ou conjunto de mesas combinadas) escolhida para uma reserva"""
+    mesas: List[Any]
+    numero_pessoas: int
+    pessoas_por_mesa: List[int] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.pessoas_por_mesa:
+            self.pessoas_por_mesa = distribuir_pessoas(self.mesas, self.numero_pessoas)
+
+    @property
+    def capacidade(self) -> int:
+        return sum(m.capacidade for m in self.mesas)
+
+    @property
+    def lugares_vazios(self) -> int:
+        return self.capacidade - self.numero_pessoas
+
+    @property
+    def combinada(self) -> bool:
+        return len(self.mesas) > 1
+
+
+@dataclass
+class OpcaoReserva:
+    """Opção de reserva encontrada na pesquisa entre restaurantes"""
+    restaurante_id: int
+    restaurante: str
+    endereco: str
+    ambiente_id: int
+    ambiente: str
+    horario: datetime
+    alocacao: Alocacao
+    mesas_livres: int
+
+    @property
+    def ordem(self):
+        """Chave de ordenação: menos lugares vazios, mesa individual, mais cedo"""
+        return (self.alocacao.lugares_vazios, self.alocacao.combinada, self.horario, self.restaurante)
+
+
+def distribuir_pessoas(mesas: Sequence[Any], numero_pessoas: int) -> List[int]:
+    """Distribui o grupo pelas mesas, enchendo primeiro as maiores"""
+    restantes = numero_pessoas
+    pessoas = [0] * len(mesas)
+    for i in sorted(range(len(mesas)), key=lambda i: -mesas[i].capacidade):
+        pessoas[i] = max(1, min(mesas[i].capacidade, restantes))
+        restantes -= pessoas[i]
+    return pessoas
+
+
+def melhor_mesa(mesas: Sequence[Any], numero_pessoas: int) -> Optional[Any]:
+    """Mesa individual com menos lugares vazios (ou None se nenhuma comportar o grupo)"""
+    candidatas = [m for m in mesas if m.capacidade >= numero_pessoas]
+    return min(candidatas, key=lambda m: m.capacidade, default=None)
+
+
+def melhor_combinacao(mesas: Sequence[Any], numero_pessoas: int,
+                      max_mesas: int) -> Optional[List[Any]]:
+    """
+    Combinação de mesas combináveis com menos lugares vazios (e, em empate, menos mesas)
+
+    Programação dinâmica sobre (número de mesas, lugares): uma combinação ótima
+    nunca excede numero_pessoas + maior capacidade - 1 lugares, por isso o custo é
+    O(mesas × max_mesas × lugares), independentemente do número de subconjuntos.
+
+    Args:
+        mesas: Mesas livres (objetos com capacidade e combinavel)
+        numero_pessoas: Tamanho do grupo
+        max_mesas: Número máximo de mesas a juntar
+
+    Returns:
+        Lista de mesas ou None se não houver combinação possível
+    """
+    candidatas = [m for m in mesas if m.combinavel]
+    if not candidatas or max_mesas < 2:
+        return None
+
+    limite = numero_pessoas + max(m.capacidade for m in candidatas) - 1
+    estados = {(0, 0): ()}
+    for i, mesa in enumerate(candidatas):
+        for (n_mesas, lugares), combinacao in list(estados.items()):
+            chave = (n_mesas + 1, lugares + mesa.capacidade)
+            if n_mesas < max_mesas and chave[1] <= limite and chave not in estados:
+                estados[chave] = combinacao + (i,)
+
+    viaveis = [
+        (lugares, n_mesas, combinacao)
+        for (n_mesas, lugares), combinacao in estados.items()
+        if n_mesas >= 2 and lugares >= numero_pessoas
+    ]
+    if not viaveis:
+        return None
+
+    _, _, combinacao = min(viaveis, key=lambda v: (v[0], v[1]))
+    return [candidatas[i] for i in combinacao]
+
+
+def alocar(mesas: Sequence[Any], numero_pessoas: int, max_mesas: int) -> Optional[Alocacao]:
+    """
+    Escolhe a melhor alocação: uma mesa que comporte o grupo ou, se nenhuma
+    comportar, a melhor combinação de mesas combináveis
+    """
+    mesa = melhor_mesa(mesas, numero_pessoas)
+    if mesa is not None:
+        return Alocacao(mesas=[mesa], numero_pessoas=numero_pessoas)
+
+    combinacao = melhor_combinacao(mesas, numero_pessoas, max_mesas)
+    if combinacao is not None:
+        return Alocacao(mesas=combinacao, numero_pessoas=numero_pessoas)
+    return None
@@ -0,0 +1,156 @@
+"""
+Variantes assíncronas dos serviços de clientes, mesas e reservas
+
+Partilham os modelos, as validações e as regras dos serviços síncronos;
+apenas o acesso à base de dados passa pelos repositórios assíncronos.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from models import Cliente, Mesa, Reserva
+from database.async_repositories import (
+    async_cliente_repo, async_ambiente_repo, async_mesa_repo, async_reserva_repo
+)
+from services import _duracao_reserva, _mesa_bloqueada, _validar_dados_cliente, _validar_dados_reserva
+from services.holds import bloqueio_service
+from utils.validators import ValidationError
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def _mesas_bloqueadas(inicio: datetime, fim: datetime, token: Optional[str]) -> set:
+    """Mesas bloqueadas por outras sessões (fora do event loop se os bloqueios estiverem na base de dados)"""
+    if Config.HOLD_BACKEND == 'database':
+        return await asyncio.to_thread(bloqueio_service.mesas_bloqueadas, inicio, fim, token)
+    return bloqueio_service.mesas_bloqueadas(inicio, fim, excluir_token=token)
+
+
+class AsyncClienteService:
+    """Serviço assíncrono para clientes"""
+
+    def __init__(self):
+        self.repository = async_cliente_repo
+
+    async def create_cliente(self, nome: str, email: str, telefone: str) -> Optional[Cliente]:
+        """Cria um novo cliente (ver ClienteService.create_cliente)"""
+        try:
+            # A validação do email pode consultar o DNS: corre fora do event loop
+            await asyncio.to_thread(_validar_dados_cliente, nome, email, telefone)
+
+            if await self.repository.get_by_email(email.strip().lower()):
+                raise ValidationError("Email já cadastrado")
+
+            cliente = Cliente(nome=nome.strip(), email=email.strip().lower(), telefone=telefone.strip())
+            return await self.repository.create(cliente)
+
+        except ValidationError as e:
+            logger.error(f"Validation error creating client: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Error creating client: {e}")
+            return None
+
+    async def get_cliente_by_email(self, email: str) -> Optional[Cliente]:
+        """Busca cliente por email"""
+        return await self.repository.get_by_email(email.strip().lower())
+
+    async def get_cliente_by_id(self, cliente_id: int) -> Optional[Cliente]:
+        """Busca cliente por ID"""
+        return await self.repository.get_by_id(cliente_id)
+
+
+class AsyncMesaService:
+    """Serviço assíncrono para mesas"""
+
+    def __init__(self):
+        self.repository = async_mesa_repo
+
+    async def get_mesa_by_id(self, mesa_id: int) -> Optional[Mesa]:
+        """Busca mesa por ID"""
+        return await self.repository.get_by_id(mesa_id)
+
+    async def get_available_tables(self, ambiente_id: int, data_reserva: datetime,
+                                   numero_pessoas: int, token: str = None) -> List[Mesa]:
+        """Busca mesas livres durante toda a duração da reserva (ver MesaService.get_available_tables)"""
+        data_fim = data_reserva + _duracao_reserva(await async_ambiente_repo.get_duracao_reserva(ambiente_id))
+        mesas = await self.repository.get_available_tables(ambiente_id, data_reserva, numero_pessoas, data_fim)
+        bloqueadas = await _mesas_bloqueadas(data_reserva, data_fim, token)
+        return [m for m in mesas if m.id not in bloqueadas]
+
+
+class AsyncReservaService:
+    """Serviço assíncrono para reservas"""
+
+    def __init__(self):
+        self.repository = async_reserva_repo
+
+    async def create_reserva(self, cliente_id: int, mesa_id: int, data_reserva: datetime,
+                             numero_pessoas: int, observacoes: str = None,
+                             duracao_minutos: int = None, token: str = None) -> Optional[Reserva]:
+        """Cria uma nova reserva (mesmas regras de ReservaService.create_reserva)"""
+        try:
+            _validar_dados_reserva(cliente_id, mesa_id, data_reserva, numero_pessoas, duracao_minutos)
+
+            cliente, mesa = await asyncio.gather(
+                async_cliente_repo.get_by_id(cliente_id),
+                async_mesa_repo.get_by_id(mesa_id)
+            )
+            if not cliente:
+                raise ValidationError("Cliente não encontrado")
+
+            if not mesa:
+                raise ValidationError("Mesa não encontrada")
+
+            if numero_pessoas > mesa.capacidade:
+                raise ValidationError(f"Mesa comporta apenas {mesa.capacidade} pessoas")
+
+            data_fim = data_reserva + _duracao_reserva(
+                duracao_minutos or await async_mesa_repo.get_duracao_reserva(mesa_id)
+            )
+            if mesa_id in await _mesas_bloqueadas(data_reserva, data_fim, token):
+                raise ValidationError("Mesa a ser reservada por outro cliente. Tente dentro de alguns minutos.")
+
+            reserva = Reserva(
+                cliente_id=cliente_id,
+                mesa_id=mesa_id,
+                data_reserva=data_reserva,
+                data_fim=data_fim,
+                numero_pessoas=numero_pessoas,
+                observacoes=observacoes.strip() if observacoes else None
+            )
+            # A verificação de conflitos e a criação são feitas na mesma transação
+            criada, ocupada = await self.repository.create_sem_conflito(reserva)
+            if ocupada:
+                raise ValidationError("Mesa já reservada para este horário")
+            if criada:
+                bloqueio_service.libertar(token)
+            return criada
+
+        except ValidationError as e:
+            logger.error(f"Validation error creating reservation: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Error creating reservation: {e}")
+            return None
+
+    async def get_reserva_by_id(self, reserva_id: int) -> Optional[Reserva]:
+        """Busca reserva por ID"""
+        return await self.repository.get_by_id(reserva_id)
+
+    async def get_reservas_by_cliente(self, cliente_id: int) -> List[Reserva]:
+        """Busca reservas por cliente (sem o arquivo)"""
+        return await self.repository.get_by_cliente(cliente_id)
+
+    async def cancel_reserva(self, reserva_id: int) -> bool:
+        """Cancela uma reserva e oferece a mesa libertada à lista de espera"""
+        cancelada, _ = await self.repository.cancel_with_promotion(reserva_id, _mesa_bloqueada)
+        return cancelada
+
+
+# Instâncias globais dos serviços assíncronos
+async_cliente_service = AsyncClienteService()
+async_mesa_service = AsyncMesaService()
+async_reserva_service = AsyncReservaService()
@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+from utils.validators import ValidationError
+
+
+@dataclass
+class PedidoReserva:
+    """Pedido de uma mesa num horário, parte de uma reserva de grupo ou evento"""
+    mesa_id: int
+    data_reserva: datetime
+    numero_pessoas: int
+    observacoes: Optional[str] = None
+
+
+@dataclass
+class ConflitoLote:
+    """Pedido do lote que não pode ser reservado e o motivo"""
+    indice: int
+    pedido: PedidoReserva
+    motivo: str
+
+    def __str__(self) -> str:
+        return f"Pedido {self.indice + 1} ({self.pedido.data_reserva.strftime('%d/%m/%Y %H:%M')}): {self.motivo}"
+
+
+class LoteReservaError(ValidationError):
+    """Erro de validação de um lote de reservas, com todos os pedidos em conflito"""
+
+    def __init__(self, conflitos: List[ConflitoLote]):
+        self.conflitos = conflitos
+        super().__init__(f"{len({c.indice for c in conflitos})} pedido(s) do lote em conflito: " + "; ".join(str(c) for c in conflitos))
@@ -0,0 +1,131 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import Restaurante, Ambiente, Mesa
+from database.repositories import versao_cache_repo, VersaoCacheRepository
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nome do contador de versão do catálogo na tabela versoes_cache
+VERSAO_CATALOGO = 'catalogo'
+
+# Modelos cuja alteração invalida o catálogo
+MODELOS_CATALOGO = (Restaurante, Ambiente, Mesa)
+
+
+class CatalogoCache:
+    """
+    Cache em memória das leituras do catálogo (restaurantes, ambientes e mesas)
+
+    Cada escrita no catálogo incrementa, na mesma transação, o contador
+    'catalogo' da tabela versoes_cache. Os restantes processos comparam esse
+    contador com a versão que têm em cache (no máximo uma consulta por
+    intervalo_s) e esvaziam a cache quando muda; o processo que escreveu
+    esvazia-a logo após o commit.
+    """
+
+    def __init__(self, intervalo_s: float = Config.CACHE_CHECK_INTERVAL_SECONDS,
+                 ativo: bool = Config.CATALOG_CACHE_ENABLED):
+        self.intervalo_s = intervalo_s
+        self.ativo = ativo
+        self._valores: Dict[Tuple, Any] = {}
+        self._versao: Optional[int] = None
+        self._ultima_verificacao = 0.0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def invalidar(self):
+        """Esvazia a cache local"""
+        with self._lock:
+            self._valores.clear()
+            self._versao = None
+            self._ultima_verificacao = 0.0
+            self.invalidacoes += 1
+
+    def verificar(self) -> bool:
+        """Compara a versão na base de dados com a da cache; devolve True se a cache foi esvaziada"""
+        agora = time.monotonic()
+        if agora - self._ultima_verificacao < self.intervalo_s:
+            return False
+        self._ultima_verificacao = agora
+
+        versao = versao_cache_repo.get_versao(VERSAO_CATALOGO)
+        with self._lock:
+            if versao is None or versao == self._versao:
+                return False
+            invalidou = self._versao is not None
+            self._valores.clear()
+            self._versao = versao
+            if invalidou:
+                self.invalidacoes += 1
+                logger.info(f"Catalogue cache invalidated (version {versao})")
+            return invalidou
+
+    def get(self, chave: Tuple, carregar: Callable[[], Any]) -> Any:
+        """Valor em cache para a chave, carregado com carregar() se não existir"""
+        if not self.ativo:
+            return carregar()
+
+        self.verificar()
+        with self._lock:
+            if chave in self._valores:
+                self.acertos += 1
+                valor = self._valores[chave]
+                return list(valor) if isinstance(valor, list) else valor
+            versao = self._versao
+
+        self.falhas += 1
+        valor = carregar()
+        # Valores vazios podem resultar de erros: não ficam em cache
+        if valor:
+            with self._lock:
+                if self._versao == versao:
+                    self._valores[chave] = list(valor) if isinstance(valor, list) else valor
+        return valor
+
+    def cached(self, nome: str):
+        """Decorador para métodos de serviço de leitura do catálogo"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(servico, *args, **kwargs):
+                chave = (nome, args, tuple(sorted(kwargs.items())))
+                return self.get(chave, lambda: func(servico, *args, **kwargs))
+            return wrapper
+        return decorator
+
+
+def _altera_catalogo(session: Session) -> bool:
+    if any(isinstance(obj, MODELOS_CATALOGO) for obj in session.new):
+        return True
+    if any(isinstance(obj, MODELOS_CATALOGO) for obj in session.deleted):
+        return True
+    return any(isinstance(obj, MODELOS_CATALOGO) and session.is_modified(obj) for obj in session.dirty)
+
+
+@event.listens_for(Session, "before_flush")
+def _marcar_alteracao_catalogo(session, flush_context, instances):
+    if _altera_catalogo(session) and not session.info.get('catalogo_alterado'):
+        session.info['catalogo_alterado'] = True
+        VersaoCacheRepository.incrementar(session.connection(), VERSAO_CATALOGO)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(session):
+    if session.info.pop('catalogo_alterado', False):
+        catalogo_cache.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_alteracao(session):
+    session.info.pop('catalogo_alterado', None)
+
+
+# Instância global da cache do catálogo
+catalogo_cache = CatalogoCache()
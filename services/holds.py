@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set
+from models import BloqueioMesa
+from database.repositories import bloqueio_mesa_repo
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Bloqueio:
+    """Bloqueio temporário de uma mesa para um intervalo"""
+    mesa_id: int
+    data_reserva: datetime
+    data_fim: datetime
+    token: str
+    expira_em: datetime
+
+    def sobrepoe(self, inicio: datetime, fim: datetime) -> bool:
+        return self.data_reserva < fim and self.data_fim > inicio
+
+
+def _dias(inicio: datetime, fim: datetime) -> List[date]:
+    """Dias com pelo menos um instante em [inicio, fim)"""
+    ultimo = max(inicio, fim - timedelta(microseconds=1)).date()
+    return [inicio.date() + timedelta(days=i) for i in range((ultimo - inicio.date()).days + 1)]
+
+
+class MemoriaBloqueios:
+    """
+    Bloqueios guardados no próprio processo
+
+    As expirações ficam num heap ordenado por expira_em: a limpeza só retira
+    do topo os bloqueios já expirados, sem percorrer os restantes. As
+    consultas por intervalo leem apenas os bloqueios dos dias que ele abrange.
+    """
+
+    def __init__(self):
+        self._por_token: Dict[str, List[Bloqueio]] = {}
+        self._por_mesa: Dict[int, List[Bloqueio]] = {}
+        self._por_dia: Dict[date, List[Bloqueio]] = {}
+        self._expiracoes: list = []
+        self._sequencia = itertools.count()
+        self._lock = threading.Lock()
+
+    def _expirar(self, agora: datetime):
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            _, _, token = heapq.heappop(self._expiracoes)
+            bloqueios = self._por_token.get(token)
+            # O token pode ter renovado o bloqueio depois desta entrada no heap
+            if bloqueios and bloqueios[0].expira_em <= agora:
+                self._remover(token)
+
+    @staticmethod
+    def _retirar(indice: dict, chave, token: str):
+        restantes = [b for b in indice.get(chave, []) if b.token != token]
+        if restantes:
+            indice[chave] = restantes
+        else:
+            indice.pop(chave, None)
+
+    def _remover(self, token: str) -> int:
+        bloqueios = self._por_token.pop(token, [])
+        for bloqueio in bloqueios:
+            self._retirar(self._por_mesa, bloqueio.mesa_id, token)
+            for dia in _dias(bloqueio.data_reserva, bloqueio.data_fim):
+                self._retirar(self._por_dia, dia, token)
+        return len(bloqueios)
+
+    def bloquear(self, bloqueios: List[Bloqueio], agora: datetime) -> bool:
+        token = bloqueios[0].token
+        with self._lock:
+            self._expirar(agora)
+            for bloqueio in bloqueios:
+                for outro in self._por_mesa.get(bloqueio.mesa_id, []):
+                    if outro.token != token and outro.sobrepoe(bloqueio.data_reserva, bloqueio.data_fim):
+                        return False
+
+            self._remover(token)
+            self._por_token[token] = list(bloqueios)
+            for bloqueio in bloqueios:
+                self._por_mesa.setdefault(bloqueio.mesa_id, []).append(bloqueio)
+                for dia in _dias(bloqueio.data_reserva, bloqueio.data_fim):
+                    self._por_dia.setdefault(dia, []).append(bloqueio)
+            heapq.heappush(self._expiracoes, (bloqueios[0].expira_em, next(self._sequencia), token))
+            return True
+
+    def libertar(self, token: str) -> int:
+        with self._lock:
+            return self._remover(token)
+
+    def ativos(self, inicio: datetime, fim: datetime, agora: datetime,
+               excluir_token: Optional[str] = None) -> List[Bloqueio]:
+        with self._lock:
+            self._expirar(agora)
+            encontrados = {
+                id(b): b for dia in _dias(inicio, fim) for b in self._por_dia.get(dia, [])
+                if b.token != excluir_token and b.sobrepoe(inicio, fim)
+            }
+            return list(encontrados.values())
+
+    def limpar_expirados(self, agora: datetime) -> int:
+        with self._lock:
+            antes = len(self._por_token)
+            self._expirar(agora)
+            return antes - len(self._por_token)
+
+
+class BaseDadosBloqueios:
+    """Bloqueios guardados na tabela bloqueios_mesa (partilhados entre processos)"""
+
+    def bloquear(self, bloqueios: List[Bloqueio], agora: datetime) -> bool:
+        return bloqueio_mesa_repo.acquire([
+            BloqueioMesa(b.mesa_id, b.data_reserva, b.data_fim, b.token, b.expira_em)
+            for b in bloqueios
+        ], agora)
+
+    def libertar(self, token: str) -> int:
+        return bloqueio_mesa_repo.release(token)
+
+    def ativos(self, inicio: datetime, fim: datetime, agora: datetime,
+               excluir_token: Optional[str] = None) -> List[Bloqueio]:
+        return [
+            Bloqueio(b.mesa_id, b.data_reserva, b.data_fim, b.token, b.expira_em)
+            for b in bloqueio_mesa_repo.get_ativos(inicio, fim, agora, excluir_token)
+        ]
+
+    def limpar_expirados(self, agora: datetime) -> int:
+        return bloqueio_mesa_repo.purge_expired(agora)
+
+
+class BloqueioService:
+    """Serviço de bloqueios temporários de mesas (TTL) durante a confirmação"""
+
+    def __init__(self, backend: str = Config.HOLD_BACKEND, ttl_s: int = Config.HOLD_TTL_SECONDS):
+        self.ttl_s = ttl_s
+        self.store = BaseDadosBloqueios() if backend == 'database' else MemoriaBloqueios()
+
+    def bloquear(self, mesa_ids: List[int], data_reserva: datetime, data_fim: datetime,
+                 token: str) -> Optional[datetime]:
+        """
+        Bloqueia as mesas para o token, substituindo bloqueios anteriores do mesmo token
+
+        Returns:
+            Data de expiração do bloqueio ou None se alguma mesa já estiver bloqueada
+        """
+        agora = datetime.now()
+        expira_em = agora + timedelta(seconds=self.ttl_s)
+        bloqueios = [Bloqueio(mesa_id, data_reserva, data_fim, token, expira_em) for mesa_id in mesa_ids]
+        if not bloqueios or not self.store.bloquear(bloqueios, agora):
+            return None
+        return expira_em
+
+    def libertar(self, token: Optional[str]) -> int:
+        """Liberta os bloqueios de um token (confirmação ou cancelamento)"""
+        return self.store.libertar(token) if token else 0
+
+    def get_bloqueios(self, inicio: datetime, fim: datetime,
+                      excluir_token: Optional[str] = None) -> List[Bloqueio]:
+        """Bloqueios ativos de outros tokens sobrepostos a [inicio, fim)"""
+        return self.store.ativos(inicio, fim, datetime.now(), excluir_token)
+
+    def mesas_bloqueadas(self, inicio: datetime, fim: datetime,
+                         excluir_token: Optional[str] = None) -> Set[int]:
+        """IDs das mesas bloqueadas por outros tokens em [inicio, fim)"""
+        return {b.mesa_id for b in self.get_bloqueios(inicio, fim, excluir_token)}
+
+    def limpar_expirados(self) -> int:
+        """Remove bloqueios expirados"""
+        return self.store.limpar_expirados(datetime.now())
+
+
+# Instância global do serviço de bloqueios
+bloqueio_service = BloqueioService()
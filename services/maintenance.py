@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from database.repositories import reserva_repo, reserva_arquivo_repo, chave_idempotencia_repo
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultadoManutencao:
+    """Resultado de uma execução de tarefa de manutenção"""
+    tarefa: str
+    linhas: int
+    lotes: int
+    duracao_s: float
+    executado_em: datetime
+
+
+def _run_batches(tarefa: str, batch_fn: Callable[[], int], batch_size: int) -> ResultadoManutencao:
+    """Executa batch_fn até que um lote devolva menos linhas que batch_size"""
+    inicio = time.perf_counter()
+    total = 0
+    lotes = 0
+    while True:
+        linhas = batch_fn()
+        if not linhas:
+            break
+        total += linhas
+        lotes += 1
+        if linhas < batch_size:
+            break
+
+    return ResultadoManutencao(
+        tarefa=tarefa,
+        linhas=total,
+        lotes=lotes,
+        duracao_s=time.perf_counter() - inicio,
+        executado_em=datetime.now()
+    )
+
+
+class ArquivoService:
+    """Serviço que move reservas antigas para a tabela de arquivo"""
+
+    def __init__(self):
+        self.repository = reserva_arquivo_repo
+
+    def arquivar(self, horizonte_dias: Optional[int] = None,
+                 batch_size: Optional[int] = None) -> ResultadoManutencao:
+        """
+        Arquiva reservas canceladas/finalizadas mais antigas que o horizonte
+
+        Cada lote é movido numa transação própria para não bloquear a tabela
+        de reservas durante muito tempo.
+
+        Args:
+            horizonte_dias: Idade mínima (em dias) das reservas a arquivar
+            batch_size: Número de reservas por transação
+
+        Returns:
+            ResultadoManutencao com o total de reservas arquivadas
+        """
+        horizonte_dias = Config.ARCHIVE_HORIZON_DAYS if horizonte_dias is None else horizonte_dias
+        batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+        data_limite = datetime.now() - timedelta(days=horizonte_dias)
+
+        resultado = _run_batches(
+            "arquivo",
+            lambda: self.repository.archive_batch(data_limite, batch_size),
+            batch_size
+        )
+        logger.info(f"Archived {resultado.linhas} reservations in {resultado.lotes} batches "
+                    f"({resultado.duracao_s:.2f}s)")
+        return resultado
+
+    def count_arquivadas(self) -> int:
+        """Conta o número de reservas no arquivo"""
+        return self.repository.count()
+
+
+class FinalizacaoService:
+    """Serviço que marca reservas confirmadas já passadas como 'finalizada'"""
+
+    def __init__(self):
+        self.repository = reserva_repo
+
+    def finalizar(self, batch_size: Optional[int] = None) -> ResultadoManutencao:
+        """
+        Finaliza reservas confirmadas que terminaram há mais de FINALIZE_AFTER_MINUTES
+
+        Args:
+            batch_size: Número de reservas por UPDATE
+
+        Returns:
+            ResultadoManutencao com o total de reservas finalizadas
+        """
+        batch_size = batch_size or Config.FINALIZE_BATCH_SIZE
+        data_limite = datetime.now() - timedelta(minutes=Config.FINALIZE_AFTER_MINUTES)
+
+        resultado = _run_batches(
+            "finalizacao",
+            lambda: self.repository.finalize_batch(data_limite, batch_size),
+            batch_size
+        )
+        logger.info(f"Finalized {resultado.linhas} reservations in {resultado.lotes} batches "
+                    f"({resultado.duracao_s:.2f}s)")
+        return resultado
+
+
+class MaintenanceScheduler:
+    """Executa tarefas de manutenção periodicamente numa thread em segundo plano"""
+
+    def __init__(self, interval_s: int = Config.FINALIZE_INTERVAL_SECONDS, historico: int = 50):
+        self.interval_s = interval_s
+        self._historico = deque(maxlen=historico)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Inicia a thread (não faz nada se já estiver a correr)"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="maintenance-scheduler", daemon=True
+            )
+            self._thread.start()
+            logger.info(f"Maintenance scheduler started (every {self.interval_s}s)")
+            return True
+
+    def stop(self, timeout: float = 5.0):
+        """Pede à thread para terminar e aguarda"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> ResultadoManutencao:
+        """Executa a finalização de imediato e guarda o resultado"""
+        resultado = finalizacao_service.finalizar()
+        self._historico.append(resultado)
+        return resultado
+
+    def get_historico(self) -> List[ResultadoManutencao]:
+        """Retorna os resultados mais recentes (mais recentes primeiro)"""
+        return list(self._historico)[::-1]
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                if Config.SNAPSHOT_ENABLED:
+                    from services.snapshot import snapshot_service
+                    self._historico.append(snapshot_service.export())
+                from services.holds import bloqueio_service
+                bloqueio_service.limpar_expirados()
+                chave_idempotencia_repo.purge_expired(datetime.now())
+                from services.outbox import outbox_service
+                outbox_service.limpar()
+            except Exception as e:
+                logger.error(f"Error running maintenance jobs: {e}")
+            self._stop.wait(self.interval_s)
+
+
+# Instâncias dos serviços
+arquivo_service = ArquivoService()
+finalizacao_service = FinalizacaoService()
+maintenance_scheduler = MaintenanceScheduler()
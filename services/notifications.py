@@ -0,0 +1,390 @@
+"""
+Notificações aos clientes (confirmação, cancelamento, alteração e lembrete)
+
+As reservas não enviam mensagens: cada alteração fica no outbox de eventos
+(services.outbox) na transação da própria reserva. Um worker em segundo
+plano transforma os eventos em notificações (tabela notificacoes) e
+entrega-as em lotes, com uma ligação ao servidor por thread e lote,
+novas tentativas com espera exponencial e um limite de envios em paralelo.
+"""
+
+import os
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional, Tuple
+from models import Notificacao
+from database.repositories import notificacao_repo
+from services.outbox import (
+    outbox_service, EventoDominio, RESERVA_CRIADA, RESERVA_CANCELADA, RESERVA_MOVIDA
+)
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nome do consumidor do outbox
+CONSUMIDOR_NOTIFICACOES = 'notificacoes'
+
+EVENTOS_NOTIFICADOS = [RESERVA_CRIADA, RESERVA_CANCELADA, RESERVA_MOVIDA]
+
+
+class TransporteNotificacao:
+    """
+    Envio de mensagens; abrir() e fechar() delimitam uma ligação reutilizada
+    por todas as mensagens de um lote
+    """
+
+    def abrir(self):
+        pass
+
+    def enviar(self, mensagem: EmailMessage):
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+
+class TransporteSMTP(TransporteNotificacao):
+    """Servidor SMTP (em desenvolvimento, um servidor de depuração local na porta SMTP_PORT)"""
+
+    def __init__(self, host: str = Config.SMTP_HOST, porta: int = Config.SMTP_PORT,
+                 utilizador: str = Config.SMTP_USER, senha: str = Config.SMTP_PASSWORD,
+                 starttls: bool = Config.SMTP_STARTTLS, timeout_s: float = 10):
+        self.host = host
+        self.porta = porta
+        self.utilizador = utilizador
+        self.senha = senha
+        self.starttls = starttls
+        self.timeout_s = timeout_s
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def abrir(self):
+        self._smtp = smtplib.SMTP(self.host, self.porta, timeout=self.timeout_s)
+        if self.starttls:
+            self._smtp.starttls()
+        if self.utilizador:
+            self._smtp.login(self.utilizador, self.senha)
+
+    def enviar(self, mensagem: EmailMessage):
+        self._smtp.send_message(mensagem)
+
+    def fechar(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                self._smtp.close()
+            self._smtp = None
+
+
+class TransporteFicheiro(TransporteNotificacao):
+    """Grava cada mensagem num ficheiro .eml (substituto local do servidor de email)"""
+
+    def __init__(self, diretorio: str = Config.NOTIFY_FILE_DIR):
+        self.diretorio = diretorio
+
+    def abrir(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def enviar(self, mensagem: EmailMessage):
+        caminho = os.path.join(self.diretorio, f"{mensagem['X-Notificacao-Id']}.eml")
+        with open(caminho, 'wb') as ficheiro:
+            ficheiro.write(mensagem.as_bytes())
+
+
+# Transportes disponíveis em NOTIFY_TRANSPORT (outros podem ser registados aqui)
+TRANSPORTES: Dict[str, Callable[[], TransporteNotificacao]] = {
+    'smtp': TransporteSMTP,
+    'ficheiro': TransporteFicheiro,
+}
+
+
+@dataclass
+class MetricasNotificacao:
+    """Contadores acumulados do envio de notificações"""
+    enfileiradas: int = 0
+    enviadas: int = 0
+    falhas: int = 0
+    desistencias: int = 0
+    lotes: int = 0
+    ligacoes: int = 0
+    tempo_envio_s: float = 0.0
+
+    @property
+    def mensagens_por_s(self) -> float:
+        return self.enviadas / self.tempo_envio_s if self.tempo_envio_s else 0.0
+
+
+@dataclass
+class ResultadoEntrega:
+    """Resultado de um lote de envios"""
+    enviadas: int = 0
+    falhas: int = 0
+    desistencias: int = 0
+    duracao_s: float = 0.0
+    erros: List[str] = field(default_factory=list)
+
+
+def _formatar_data(valor: str) -> str:
+    return datetime.fromisoformat(valor).strftime("%d/%m/%Y às %H:%M")
+
+
+def _compor(tipo: str, dados: Dict, nome: str, mesa: str, restaurante: str) -> Tuple[str, str]:
+    """Assunto e corpo de uma mensagem"""
+    quando = _formatar_data(dados['data_reserva'])
+    detalhe = f"{restaurante}, mesa {mesa}, {quando}, {dados['numero_pessoas']} pessoa(s)"
+    if tipo == 'confirmacao':
+        return (f"Reserva confirmada - {restaurante}",
+                f"Olá {nome},\n\nA sua reserva está confirmada: {detalhe}.\n\nAté breve!")
+    if tipo == 'cancelamento':
+        return (f"Reserva cancelada - {restaurante}",
+                f"Olá {nome},\n\nA sua reserva ({detalhe}) foi cancelada.")
+    if tipo == 'alteracao':
+        return (f"Reserva alterada - {restaurante}",
+                f"Olá {nome},\n\nA sua reserva foi alterada: {detalhe}.")
+    return (f"Lembrete: reserva em {restaurante}",
+            f"Olá {nome},\n\nLembramos a sua reserva: {detalhe}.\n\nAté breve!")
+
+
+class NotificacaoService:
+    """Criação (a partir do outbox) e entrega das notificações"""
+
+    def __init__(self, transporte: str = Config.NOTIFY_TRANSPORT, lote: int = Config.NOTIFY_BATCH_SIZE,
+                 concorrencia: int = Config.NOTIFY_CONCURRENCY, max_tentativas: int = Config.NOTIFY_MAX_ATTEMPTS,
+                 espera_base_s: float = Config.NOTIFY_RETRY_BASE_SECONDS,
+                 reserva_s: float = Config.NOTIFY_LEASE_SECONDS):
+        if transporte not in TRANSPORTES:
+            raise ValueError(f"Transporte de notificações desconhecido: {transporte}")
+        self.transporte = transporte
+        self.lote = lote
+        self.concorrencia = concorrencia
+        self.max_tentativas = max_tentativas
+        self.espera_base_s = espera_base_s
+        self.reserva_s = reserva_s  # prazo de um envio; depois as mensagens podem ser reservadas por outro
+        self.repository = notificacao_repo
+        self._metricas = MetricasNotificacao()
+        self._lock = threading.Lock()
+
+    def _notificacoes(self, eventos: List[EventoDominio], agora: datetime) -> Tuple[List[Notificacao], List[int]]:
+        """Notificações geradas por um lote de eventos e reservas cujos lembretes são cancelados"""
+        clientes, mesas = self.repository.get_destinatarios(
+            [e.dados['cliente_id'] for e in eventos], [e.dados['mesa_id'] for e in eventos]
+        )
+        notificacoes = []
+        cancelar_lembretes = []
+        for evento in eventos:
+            dados = evento.dados
+            data_reserva = datetime.fromisoformat(dados['data_reserva'])
+            if evento.tipo != RESERVA_CRIADA:
+                cancelar_lembretes.append(evento.agregado_id)
+                # Lembrete criado por um evento anterior do mesmo lote
+                notificacoes = [n for n in notificacoes
+                                if not (n.reserva_id == evento.agregado_id and n.tipo == 'lembrete')]
+            if data_reserva <= agora or dados['cliente_id'] not in clientes or dados['mesa_id'] not in mesas:
+                continue
+
+            nome, email = clientes[dados['cliente_id']]
+            mesa, restaurante = mesas[dados['mesa_id']]
+            tipos = {
+                RESERVA_CRIADA: [('confirmacao', agora), ('lembrete', None)],
+                RESERVA_CANCELADA: [('cancelamento', agora)],
+                RESERVA_MOVIDA: [('alteracao', agora), ('lembrete', None)],
+            }[evento.tipo]
+            for tipo, enviar_apos in tipos:
+                if tipo == 'lembrete':
+                    enviar_apos = data_reserva - timedelta(hours=Config.NOTIFY_REMINDER_HOURS)
+                    # Reserva feita em cima da hora: a confirmação chega
+                    if enviar_apos <= agora:
+                        continue
+                assunto, corpo = _compor(tipo, dados, nome, mesa, restaurante)
+                notificacoes.append(Notificacao(
+                    reserva_id=evento.agregado_id, tipo=tipo, destinatario=email,
+                    assunto=assunto, corpo=corpo, enviar_apos=enviar_apos
+                ))
+        return notificacoes, cancelar_lembretes
+
+    def enfileirar(self) -> int:
+        """
+        Converte o próximo lote de eventos do outbox em notificações
+
+        Returns:
+            Número de notificações criadas
+        """
+        checkpoint, eventos = outbox_service.ler_com_checkpoint(
+            CONSUMIDOR_NOTIFICACOES, self.lote, EVENTOS_NOTIFICADOS
+        )
+        if not eventos:
+            return 0
+        notificacoes, cancelar_lembretes = self._notificacoes(eventos, datetime.now())
+        if not self.repository.enfileirar(notificacoes, cancelar_lembretes,
+                                          CONSUMIDOR_NOTIFICACOES, checkpoint, eventos[-1].id):
+            return 0
+        with self._lock:
+            self._metricas.enfileiradas += len(notificacoes)
+        return len(notificacoes)
+
+    @staticmethod
+    def _mensagem(notificacao: Notificacao) -> EmailMessage:
+        mensagem = EmailMessage()
+        mensagem['From'] = Config.NOTIFY_FROM
+        mensagem['To'] = notificacao.destinatario
+        mensagem['Subject'] = notificacao.assunto
+        mensagem['X-Notificacao-Id'] = str(notificacao.id)
+        mensagem.set_content(notificacao.corpo)
+        return mensagem
+
+    def _enviar_grupo(self, notificacoes: List[Notificacao]) -> List[Tuple[int, Optional[str]]]:
+        """Envia um grupo de mensagens pela mesma ligação; devolve (id, erro ou None)"""
+        try:
+            transporte = TRANSPORTES[self.transporte]()
+            transporte.abrir()
+        except Exception as e:
+            return [(n.id, f"Ligação: {e}") for n in notificacoes]
+        with self._lock:
+            self._metricas.ligacoes += 1
+
+        resultados = []
+        try:
+            for notificacao in notificacoes:
+                try:
+                    transporte.enviar(self._mensagem(notificacao))
+                    resultados.append((notificacao.id, None))
+                except Exception as e:
+                    resultados.append((notificacao.id, str(e)))
+        finally:
+            try:
+                transporte.fechar()
+            except Exception as e:
+                logger.warning(f"Error closing notification transport: {e}")
+        return resultados
+
+    def _proxima_tentativa(self, tentativas: int, agora: datetime) -> datetime:
+        """Espera exponencial: espera_base_s, 2x, 4x, ... (no máximo uma hora)"""
+        return agora + timedelta(seconds=min(self.espera_base_s * 2 ** (tentativas - 1), 3600))
+
+    def entregar(self) -> ResultadoEntrega:
+        """Envia o próximo lote de notificações pendentes"""
+        inicio = time.perf_counter()
+        agora = datetime.now()
+        envio = uuid.uuid4().hex
+        pendentes = self.repository.reservar_pendentes(
+            agora, self.lote, envio, agora + timedelta(seconds=self.reserva_s)
+        )
+        resultado = ResultadoEntrega()
+        if not pendentes:
+            return resultado
+
+        # Uma ligação por grupo; no máximo `concorrencia` grupos em paralelo
+        grupos = [pendentes[i::self.concorrencia] for i in range(min(self.concorrencia, len(pendentes)))]
+        with ThreadPoolExecutor(max_workers=len(grupos), thread_name_prefix="notificacoes") as executor:
+            envios = [r for grupo in executor.map(self._enviar_grupo, grupos) for r in grupo]
+
+        por_id = {n.id: n for n in pendentes}
+        enviadas = []
+        falhas = []
+        for notificacao_id, erro in envios:
+            if erro is None:
+                enviadas.append(notificacao_id)
+                continue
+            tentativas = por_id[notificacao_id].tentativas + 1
+            desistir = tentativas >= self.max_tentativas
+            falhas.append({
+                'id': notificacao_id,
+                'estado': 'falhada' if desistir else 'pendente',
+                'tentativas': tentativas,
+                'enviar_apos': agora if desistir else self._proxima_tentativa(tentativas, agora),
+                'ultimo_erro': erro[:500],
+            })
+            resultado.desistencias += desistir
+            resultado.erros.append(erro)
+
+        self.repository.registar_envios(enviadas, falhas, datetime.now(), envio)
+        resultado.enviadas = len(enviadas)
+        resultado.falhas = len(falhas)
+        resultado.duracao_s = time.perf_counter() - inicio
+        with self._lock:
+            self._metricas.enviadas += resultado.enviadas
+            self._metricas.falhas += resultado.falhas
+            self._metricas.desistencias += resultado.desistencias
+            self._metricas.lotes += 1
+            self._metricas.tempo_envio_s += resultado.duracao_s
+
+        if falhas:
+            logger.warning(f"{len(falhas)} notification(s) failed ({resultado.desistencias} given up): {falhas[0]['ultimo_erro']}")
+        logger.info(f"Delivered {resultado.enviadas} notification(s) in {resultado.duracao_s:.2f}s")
+        return resultado
+
+    def processar(self) -> ResultadoEntrega:
+        """Enfileira os eventos novos e envia as notificações disponíveis, lote a lote"""
+        while self.enfileirar():
+            pass
+        total = ResultadoEntrega()
+        while True:
+            resultado = self.entregar()
+            total.enviadas += resultado.enviadas
+            total.falhas += resultado.falhas
+            total.desistencias += resultado.desistencias
+            total.duracao_s += resultado.duracao_s
+            total.erros.extend(resultado.erros)
+            # Lote incompleto ou só com falhas (ficam para a próxima tentativa)
+            if resultado.enviadas + resultado.falhas < self.lote or not resultado.enviadas:
+                return total
+
+    def get_metricas(self) -> MetricasNotificacao:
+        """Cópia dos contadores acumulados"""
+        with self._lock:
+            return MetricasNotificacao(**vars(self._metricas))
+
+    def count_by_estado(self) -> Dict[str, int]:
+        return self.repository.count_by_estado()
+
+
+class NotificacaoWorker:
+    """Processa as notificações periodicamente numa thread em segundo plano"""
+
+    def __init__(self, servico: NotificacaoService, interval_s: float = Config.NOTIFY_INTERVAL_SECONDS):
+        self.servico = servico
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Inicia a thread (não faz nada se já estiver a correr)"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="notification-worker", daemon=True)
+            self._thread.start()
+            logger.info(f"Notification worker started (every {self.interval_s}s, transport={self.servico.transporte})")
+            return True
+
+    def stop(self, timeout: float = 5.0):
+        """Pede à thread para terminar e aguarda"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.servico.processar()
+            except Exception as e:
+                logger.error(f"Error processing notifications: {e}")
+            self._stop.wait(self.interval_s)
+
+
+# Instâncias globais
+notificacao_service = NotificacaoService()
+notificacao_worker = NotificacaoWorker(notificacao_service)
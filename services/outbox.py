@@ -0,0 +1,183 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Reserva, Mesa
+from database.repositories import evento_outbox_repo, EventoOutboxRepository
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tipos de evento
+RESERVA_CRIADA = 'reserva_criada'
+RESERVA_CANCELADA = 'reserva_cancelada'
+RESERVA_MOVIDA = 'reserva_movida'
+MESA_DESATIVADA = 'mesa_desativada'
+
+
+@dataclass
+class EventoDominio:
+    """Evento lido do outbox"""
+    id: int
+    tipo: str
+    agregado: str
+    agregado_id: int
+    dados: Dict[str, Any]
+    criado_em: datetime
+
+
+def _valor(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def _dados_reserva(reserva: Reserva) -> Dict[str, Any]:
+    return {
+        'id': reserva.id,
+        'cliente_id': reserva.cliente_id,
+        'mesa_id': reserva.mesa_id,
+        'data_reserva': _valor(reserva.data_reserva),
+        'data_fim': _valor(reserva.data_fim),
+        'numero_pessoas': reserva.numero_pessoas,
+        'status': reserva.status,
+        'dia_reserva': reserva.dia_reserva,
+        'slot_reserva': reserva.slot_reserva,
+    }
+
+
+def _anterior(obj, atributo: str):
+    """Valor do atributo antes da alteração pendente (ou o atual se não mudou)"""
+    historico = getattr(inspect(obj).attrs, atributo).history
+    if historico.deleted:
+        return historico.deleted[0]
+    return getattr(obj, atributo)
+
+
+def _alterado(obj, atributo: str) -> bool:
+    historico = getattr(inspect(obj).attrs, atributo).history
+    return bool(historico.added) and historico.deleted != historico.added
+
+
+def _evento(tipo: str, agregado: str, agregado_id: int, dados: Dict[str, Any], agora: datetime) -> Dict:
+    return {
+        'tipo': tipo,
+        'agregado': agregado,
+        'agregado_id': agregado_id,
+        'dados': json.dumps(dados),
+        'criado_em': agora,
+    }
+
+
+def eventos_do_flush(session: Session) -> List[Dict]:
+    """
+    Eventos de domínio das alterações do flush em curso
+
+    Chamado em after_flush: os ids das novas linhas já existem e o histórico
+    dos atributos ainda tem os valores anteriores ao flush.
+    """
+    agora = datetime.utcnow()
+    eventos = []
+
+    for obj in session.new:
+        if isinstance(obj, Reserva):
+            eventos.append(_evento(RESERVA_CRIADA, 'reserva', obj.id, _dados_reserva(obj), agora))
+
+    for obj in session.dirty:
+        if isinstance(obj, Reserva):
+            if _alterado(obj, 'status') and obj.status == 'cancelada':
+                eventos.append(_evento(RESERVA_CANCELADA, 'reserva', obj.id, _dados_reserva(obj), agora))
+            elif obj.status == 'confirmada' and (_alterado(obj, 'mesa_id') or _alterado(obj, 'data_reserva')):
+                dados = _dados_reserva(obj)
+                dados['de'] = {
+                    'mesa_id': _anterior(obj, 'mesa_id'),
+                    'data_reserva': _valor(_anterior(obj, 'data_reserva')),
+                    'data_fim': _valor(_anterior(obj, 'data_fim')),
+                }
+                eventos.append(_evento(RESERVA_MOVIDA, 'reserva', obj.id, dados, agora))
+        elif isinstance(obj, Mesa):
+            if _alterado(obj, 'ativo') and _anterior(obj, 'ativo') and not obj.ativo:
+                dados = {'id': obj.id, 'numero': obj.numero, 'ambiente_id': obj.ambiente_id}
+                eventos.append(_evento(MESA_DESATIVADA, 'mesa', obj.id, dados, agora))
+
+    return eventos
+
+
+@event.listens_for(Session, "after_flush")
+def _gravar_eventos(session, flush_context):
+    if Config.OUTBOX_ENABLED:
+        EventoOutboxRepository.registar(session.connection(), eventos_do_flush(session))
+
+
+class OutboxService:
+    """
+    Leitura do fluxo de eventos de domínio por consumidores com checkpoint
+
+    Os eventos são gravados pelo listener after_flush na transação da
+    alteração, por isso só ficam visíveis se ela for confirmada. Cada
+    consumidor lê em lotes a partir do seu checkpoint e confirma o último
+    evento processado; um evento pode ser entregue de novo se o consumidor
+    falhar antes de confirmar (entrega pelo menos uma vez).
+    """
+
+    def __init__(self, lote: int = Config.OUTBOX_BATCH_SIZE):
+        self.lote = lote
+
+    def ler(self, consumidor: str, limite: int = None, tipos: Optional[List[str]] = None) -> List[EventoDominio]:
+        """Próximo lote de eventos depois do checkpoint do consumidor (não avança o checkpoint)"""
+        return self.ler_com_checkpoint(consumidor, limite, tipos)[1]
+
+    def ler_com_checkpoint(self, consumidor: str, limite: int = None,
+                           tipos: Optional[List[str]] = None) -> Tuple[int, List[EventoDominio]]:
+        """Checkpoint lido e o lote seguinte (para avançar o checkpoint só se ninguém o alterou)"""
+        ultimo_id = evento_outbox_repo.get_checkpoint(consumidor)
+        return ultimo_id, [
+            EventoDominio(e.id, e.tipo, e.agregado, e.agregado_id, json.loads(e.dados), e.criado_em)
+            for e in evento_outbox_repo.get_after(ultimo_id, limite or self.lote, tipos)
+        ]
+
+    def confirmar(self, consumidor: str, ultimo_evento_id: int) -> bool:
+        """Avança o checkpoint do consumidor até ao evento indicado"""
+        return evento_outbox_repo.set_checkpoint(consumidor, ultimo_evento_id)
+
+    def consumir(self, consumidor: str, handler: Callable[[EventoDominio], None],
+                 limite: int = None, tipos: Optional[List[str]] = None) -> int:
+        """
+        Processa um lote com handler(evento) e confirma-o
+
+        Se o handler falhar, o checkpoint fica no último evento processado com
+        sucesso e a exceção é propagada.
+
+        Returns:
+            Número de eventos processados
+        """
+        eventos = self.ler(consumidor, limite, tipos)
+        processados = 0
+        try:
+            for evento in eventos:
+                handler(evento)
+                processados += 1
+        finally:
+            if processados:
+                self.confirmar(consumidor, eventos[processados - 1].id)
+        return processados
+
+    def iniciar_no_fim(self, consumidor: str) -> bool:
+        """Regista um consumidor novo a partir do evento mais recente (ignora o histórico)"""
+        return self.confirmar(consumidor, evento_outbox_repo.get_ultimo_id())
+
+    def get_checkpoints(self) -> Dict[str, int]:
+        """Último evento confirmado por consumidor"""
+        return {c.consumidor: c.ultimo_evento_id for c in evento_outbox_repo.get_checkpoints()}
+
+    def limpar(self) -> int:
+        """Remove os eventos já lidos por todos os consumidores e mais antigos que a retenção"""
+        removidos = evento_outbox_repo.purge(datetime.utcnow() - timedelta(days=Config.OUTBOX_RETENTION_DAYS))
+        if removidos:
+            logger.info(f"Purged {removidos} outbox events")
+        return removidos
+
+
+# Instância global do serviço do outbox
+outbox_service = OutboxService()
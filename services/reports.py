@@ -0,0 +1,204 @@
+from datetime import date, datetime, timedelta
+import pandas as pd
+from sqlalchemy import select, union_all
+from models import Cliente, Restaurante, Ambiente, Mesa, Reserva, ReservaArquivo
+from database.connection import db_manager
+from services.snapshot import snapshot_service
+from utils.performance import timed
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fontes de dados disponíveis para os relatórios
+SOURCE_DB = 'db'
+SOURCE_SNAPSHOT = 'snapshot'
+
+# Estados de reserva, pela ordem usada nos relatórios
+STATUS_CATEGORIES = ['confirmada', 'finalizada', 'cancelada']
+
+# Estados que correspondem a reservas efetivamente honradas
+STATUS_ATIVOS = ['confirmada', 'finalizada']
+
+RESERVAS_COLUMNS = [
+    'id', 'cliente_id', 'cliente', 'email', 'mesa_id', 'ambiente_id',
+    'restaurante_id', 'restaurante', 'data_reserva', 'numero_pessoas', 'status'
+]
+
+
+def _empty_reservas() -> pd.DataFrame:
+    """DataFrame vazio com o esquema de reservas"""
+    return _apply_dtypes(pd.DataFrame(columns=RESERVAS_COLUMNS))
+
+
+def _apply_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as colunas para tipos compactos (ids inteiros, categorias, datetime64)"""
+    return df.astype({
+        'id': 'int64',
+        'cliente_id': 'int64',
+        'mesa_id': 'int64',
+        'ambiente_id': 'int64',
+        'restaurante_id': 'int64',
+        'numero_pessoas': 'int16',
+        'cliente': 'category',
+        'email': 'category',
+        'restaurante': 'category',
+        'data_reserva': 'datetime64[ns]',
+        'status': pd.CategoricalDtype(STATUS_CATEGORIES)
+    })
+
+
+class ReportingEngine:
+    """Motor de relatórios sobre DataFrames tipados (sem objetos ORM)"""
+
+    def _reservas_source(self, include_archive: bool):
+        """Colunas comuns de reservas (e do arquivo, se pedido) como subquery"""
+        columns = ('id', 'cliente_id', 'mesa_id', 'data_reserva', 'numero_pessoas', 'status')
+        hot = select(*[Reserva.__table__.c[c] for c in columns])
+        if not include_archive:
+            return hot.subquery('r')
+        archive = select(*[ReservaArquivo.__table__.c[c] for c in columns])
+        return union_all(hot, archive).subquery('r')
+
+    @timed("service.reports.load_reservas")
+    def load_reservas(self, data_inicio: date, data_fim: date,
+                      include_archive: bool = True, source: str = SOURCE_DB) -> pd.DataFrame:
+        """
+        Carrega as reservas de um período diretamente para um DataFrame
+
+        Args:
+            data_inicio: Primeiro dia do período
+            data_fim: Último dia do período (inclusive)
+            include_archive: Incluir reservas do arquivo (apenas na base de dados)
+            source: SOURCE_DB (tempo real) ou SOURCE_SNAPSHOT (ficheiros Parquet)
+
+        Returns:
+            DataFrame com uma linha por reserva (colunas em RESERVAS_COLUMNS)
+        """
+        if source == SOURCE_SNAPSHOT:
+            df = snapshot_service.load_reservas(data_inicio, data_fim, columns=RESERVAS_COLUMNS)
+            return _apply_dtypes(df) if not df.empty else _empty_reservas()
+        
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim + timedelta(days=1), datetime.min.time())
+        r = self._reservas_source(include_archive)
+
+        stmt = (
+            select(
+                r.c.id, r.c.cliente_id,
+                Cliente.nome.label('cliente'), Cliente.email.label('email'),
+                r.c.mesa_id, Mesa.ambiente_id,
+                Ambiente.restaurante_id, Restaurante.nome.label('restaurante'),
+                r.c.data_reserva, r.c.numero_pessoas, r.c.status
+            )
+            .join(Cliente, Cliente.id == r.c.cliente_id)
+            .join(Mesa, Mesa.id == r.c.mesa_id)
+            .join(Ambiente, Ambiente.id == Mesa.ambiente_id)
+            .join(Restaurante, Restaurante.id == Ambiente.restaurante_id)
+            .where(r.c.data_reserva >= inicio, r.c.data_reserva < fim)
+        )
+
+        try:
+            df = pd.read_sql(stmt, db_manager.get_engine(), parse_dates=['data_reserva'])
+        except Exception as e:
+            logger.error(f"Error loading reservations report data: {e}")
+            return _empty_reservas()
+
+        return _apply_dtypes(df)
+
+    @timed("service.reports.load_capacidade")
+    def load_capacidade(self, source: str = SOURCE_DB) -> pd.DataFrame:
+        """Carrega as mesas ativas por restaurante (restaurantes sem mesas incluídos)"""
+        if source == SOURCE_SNAPSHOT:
+            return snapshot_service.load_catalogo()
+        
+        stmt = (
+            select(
+                Restaurante.id.label('restaurante_id'), Restaurante.nome.label('restaurante'),
+                Mesa.id.label('mesa_id'), Mesa.capacidade
+            )
+            .outerjoin(Ambiente, (Ambiente.restaurante_id == Restaurante.id) & (Ambiente.ativo == True))
+            .outerjoin(Mesa, (Mesa.ambiente_id == Ambiente.id) & (Mesa.ativo == True))
+            .where(Restaurante.ativo == True)
+        )
+        try:
+            df = pd.read_sql(stmt, db_manager.get_engine())
+        except Exception as e:
+            logger.error(f"Error loading capacity report data: {e}")
+            df = pd.DataFrame(columns=['restaurante_id', 'restaurante', 'mesa_id', 'capacidade'])
+        return df.astype({'restaurante_id': 'int64', 'mesa_id': 'Int64', 'capacidade': 'Int16'})
+
+    @staticmethod
+    def status_counts(df: pd.DataFrame) -> pd.Series:
+        """Número de reservas por estado (todas as categorias presentes)"""
+        return df['status'].value_counts().reindex(STATUS_CATEGORIES, fill_value=0)
+
+    @staticmethod
+    def daily_counts(df: pd.DataFrame) -> pd.DataFrame:
+        """Reservas por dia e estado, com total e taxa de confirmação"""
+        daily = pd.crosstab(df['data_reserva'].dt.normalize(), df['status'], dropna=False)
+        daily = daily.reindex(columns=STATUS_CATEGORIES, fill_value=0)
+        daily.index.name = 'Data'
+        daily['total'] = daily.sum(axis=1)
+        daily['taxa_confirmacao'] = (
+            daily[STATUS_ATIVOS].sum(axis=1) / daily['total'].where(daily['total'] > 0)
+        ).fillna(0) * 100
+        return daily
+
+    def occupancy_by_restaurant(self, df: pd.DataFrame, source: str = SOURCE_DB) -> pd.DataFrame:
+        """
+        Ocupação por restaurante: mesas distintas ocupadas e pessoas servidas
+
+        Args:
+            df: Reservas do período a analisar
+            source: Fonte do catálogo de mesas
+        """
+        capacidade = self.load_capacidade(source).groupby(['restaurante_id', 'restaurante']).agg(
+            total_mesas=('mesa_id', 'count'),
+            capacidade_total=('capacidade', 'sum')
+        )
+
+        ativos = df[df['status'].isin(STATUS_ATIVOS)]
+        ocupacao = ativos.groupby(['restaurante_id'], observed=True).agg(
+            mesas_ocupadas=('mesa_id', 'nunique'),
+            pessoas=('numero_pessoas', 'sum')
+        )
+
+        result = capacidade.reset_index().merge(
+            ocupacao.reset_index(), on='restaurante_id', how='left'
+        ).fillna({'mesas_ocupadas': 0, 'pessoas': 0})
+        result['pct_mesas'] = (result['mesas_ocupadas'] / result['total_mesas'].where(result['total_mesas'] > 0) * 100).fillna(0)
+        result['pct_pessoas'] = (result['pessoas'] / result['capacidade_total'].where(result['capacidade_total'] > 0) * 100).fillna(0)
+        return result.astype({
+            'total_mesas': 'int64', 'capacidade_total': 'int64',
+            'mesas_ocupadas': 'int64', 'pessoas': 'int64'
+        })
+
+    @staticmethod
+    def top_clients(df: pd.DataFrame, limit: int = 10) -> pd.DataFrame:
+        """Clientes com mais reservas e respetiva taxa de confirmação"""
+        por_estado = pd.crosstab(df['cliente_id'], df['status']).reindex(
+            columns=STATUS_CATEGORIES, fill_value=0
+        )
+        nomes = df.groupby('cliente_id')[['cliente', 'email']].first()
+
+        result = nomes.join(pd.DataFrame({
+            'total': por_estado.sum(axis=1),
+            'confirmadas': por_estado[STATUS_ATIVOS].sum(axis=1),
+            'canceladas': por_estado['cancelada']
+        }), how='inner')
+        result['taxa_confirmacao'] = result['confirmadas'] / result['total'] * 100
+        return result.sort_values('total', ascending=False).head(limit).reset_index()
+
+    @staticmethod
+    def slot_heatmap(df: pd.DataFrame) -> pd.DataFrame:
+        """Reservas honradas por dia da semana (linhas) e horário (colunas)"""
+        ativos = df[df['status'].isin(STATUS_ATIVOS)]
+        heatmap = pd.crosstab(
+            ativos['data_reserva'].dt.dayofweek,
+            ativos['data_reserva'].dt.strftime('%H:%M')
+        )
+        return heatmap.reindex(range(7), fill_value=0)
+
+
+# Instância global do motor de relatórios
+reporting_engine = ReportingEngine()
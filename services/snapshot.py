@@ -0,0 +1,307 @@
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+import pandas as pd
+from sqlalchemy import select, func, tuple_
+from models import Cliente, Restaurante, Ambiente, Mesa, Reserva
+from database.connection import db_manager
+from database.repositories import reserva_removida_repo
+from services.maintenance import ResultadoManutencao
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401 - motor Parquet usado pelo pandas
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+PARTITION_KEY = 'ano_mes'
+
+# Ids por consulta ao comparar as partições com a base de dados
+RECONCILE_CHUNK = 500
+
+
+class SnapshotError(Exception):
+    """Erro ao exportar ou ler o snapshot analítico"""
+    pass
+
+
+class SnapshotService:
+    """
+    Exporta reservas para ficheiros Parquet particionados por mês
+
+    A exportação é incremental: usa como marca d'água o par
+    (data_atualizacao, id) da última linha exportada e lê a base de dados em
+    lotes curtos, para que os relatórios pesados nunca bloqueiem as reservas.
+    As reservas apagadas ou arquivadas são retiradas a partir da tabela
+    reservas_removidas (ReservaRemovida), pela ordem em que foram removidas.
+    """
+
+    def __init__(self, base_dir: str = Config.SNAPSHOT_DIR):
+        self.base_dir = base_dir
+
+    @property
+    def reservas_dir(self) -> str:
+        return os.path.join(self.base_dir, 'reservas')
+
+    @property
+    def catalogo_path(self) -> str:
+        return os.path.join(self.base_dir, 'catalogo_mesas.parquet')
+
+    @property
+    def watermark_path(self) -> str:
+        return os.path.join(self.base_dir, '_watermark.json')
+
+    def _require_parquet(self):
+        if not PARQUET_AVAILABLE:
+            raise SnapshotError("pyarrow não está instalado (pip install pyarrow)")
+
+    def _read_state(self) -> dict:
+        try:
+            with open(self.watermark_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get_watermark(self) -> Optional[Tuple[datetime, int]]:
+        """Retorna a marca d'água (data_atualizacao, id) da última exportação"""
+        data = self._read_state()
+        try:
+            return datetime.fromisoformat(data['data_atualizacao']), int(data['id'])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def get_removal_watermark(self) -> Optional[int]:
+        """Última remoção (ReservaRemovida.id) já aplicada ao snapshot"""
+        valor = self._read_state().get('removida_id')
+        return int(valor) if valor is not None else None
+
+    def _save_state(self, **valores):
+        tmp_path = self.watermark_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({**self._read_state(), **valores}, f)
+        os.replace(tmp_path, self.watermark_path)
+
+    def _save_watermark(self, watermark: Tuple[datetime, int]):
+        self._save_state(data_atualizacao=watermark[0].isoformat(), id=watermark[1])
+
+    def _changed_rows(self, watermark: Optional[Tuple[datetime, int]], batch_size: int) -> pd.DataFrame:
+        """Lê o próximo lote de reservas novas ou alteradas depois da marca d'água"""
+        atualizado = func.coalesce(Reserva.data_atualizacao, Reserva.data_criacao)
+        stmt = (
+            select(
+                Reserva.id, Reserva.cliente_id, Cliente.nome.label('cliente'),
+                Cliente.email.label('email'), Reserva.mesa_id, Mesa.ambiente_id,
+                Ambiente.restaurante_id, Restaurante.nome.label('restaurante'),
+                Reserva.data_reserva, Reserva.numero_pessoas, Reserva.status,
+                atualizado.label('data_atualizacao')
+            )
+            .join(Cliente, Cliente.id == Reserva.cliente_id)
+            .join(Mesa, Mesa.id == Reserva.mesa_id)
+            .join(Ambiente, Ambiente.id == Mesa.ambiente_id)
+            .join(Restaurante, Restaurante.id == Ambiente.restaurante_id)
+            .order_by(atualizado, Reserva.id)
+            .limit(batch_size)
+        )
+        if watermark is not None:
+            stmt = stmt.where(tuple_(atualizado, Reserva.id) > tuple_(*watermark))
+
+        return pd.read_sql(
+            stmt, db_manager.get_engine(), parse_dates=['data_reserva', 'data_atualizacao']
+        )
+
+    def _partition_path(self, ano_mes: str) -> str:
+        return os.path.join(self.reservas_dir, f'{PARTITION_KEY}={ano_mes}', 'part.parquet')
+
+    def _existing_partitions(self) -> List[str]:
+        if not os.path.isdir(self.reservas_dir):
+            return []
+        return sorted(
+            name.split('=', 1)[1] for name in os.listdir(self.reservas_dir)
+            if name.startswith(f'{PARTITION_KEY}=')
+        )
+
+    def _write_partition(self, ano_mes: str, df: pd.DataFrame):
+        """Escreve a partição de forma atómica (ficheiro temporário + rename)"""
+        path = self._partition_path(ano_mes)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        df.drop(columns=[PARTITION_KEY], errors='ignore').to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _remove_ids(self, ids: set, skip_partitions: frozenset = frozenset()) -> int:
+        """Retira as linhas com estes ids das partições (exceto as indicadas); devolve quantas"""
+        removidas = 0
+        for ano_mes in self._existing_partitions():
+            if ano_mes in skip_partitions:
+                continue
+            path = self._partition_path(ano_mes)
+            stale = pd.read_parquet(path, columns=['id'])['id'].isin(ids)
+            if stale.any():
+                existing = pd.read_parquet(path)
+                self._write_partition(ano_mes, existing[~existing['id'].isin(ids)])
+                removidas += int(stale.sum())
+        return removidas
+
+    def _merge_batch(self, batch: pd.DataFrame):
+        """Integra um lote nas partições mensais, substituindo versões antigas das linhas"""
+        batch = batch.assign(**{PARTITION_KEY: batch['data_reserva'].dt.strftime('%Y-%m')})
+        ids = set(batch['id'])
+
+        # Reservas alteradas podem ter mudado de mês: retirar versões antigas
+        self._remove_ids(ids, skip_partitions=frozenset(batch[PARTITION_KEY]))
+
+        for ano_mes, rows in batch.groupby(PARTITION_KEY):
+            path = self._partition_path(ano_mes)
+            if os.path.exists(path):
+                existing = pd.read_parquet(path)
+                rows = pd.concat([existing[~existing['id'].isin(ids)], rows], ignore_index=True)
+            self._write_partition(ano_mes, rows.sort_values('data_reserva'))
+
+    def _apply_removals(self, batch_size: int) -> int:
+        """
+        Retira do snapshot as reservas apagadas ou arquivadas desde a última exportação
+
+        Corre antes de exportar as linhas alteradas: um id reutilizado depois
+        da remoção volta a ser exportado a seguir. As remoções aplicadas são
+        apagadas da base de dados (o snapshot é o único consumidor).
+        """
+        ultima = self.get_removal_watermark()
+        if ultima is None:
+            # Primeira exportação com remoções: o que foi removido antes não tem
+            # registo, por isso compara as partições existentes com a base de dados
+            ultima = reserva_removida_repo.get_ultimo_id()
+            removidas = self._reconcile()
+            self._save_state(removida_id=ultima)
+        else:
+            removidas = 0
+
+        while True:
+            remocoes = reserva_removida_repo.get_after(ultima, batch_size)
+            if not remocoes:
+                break
+            removidas += self._remove_ids({r.reserva_id for r in remocoes})
+            ultima = remocoes[-1].id
+            self._save_state(removida_id=ultima)
+            if len(remocoes) < batch_size:
+                break
+
+        reserva_removida_repo.purge(ultima)
+        return removidas
+
+    def _reconcile(self) -> int:
+        """Retira das partições as linhas cujas reservas já não existem na base de dados"""
+        removidas = 0
+        for ano_mes in self._existing_partitions():
+            ids = pd.read_parquet(self._partition_path(ano_mes), columns=['id'])['id'].tolist()
+            existentes = set()
+            for i in range(0, len(ids), RECONCILE_CHUNK):
+                existentes |= reserva_removida_repo.get_existentes(ids[i:i + RECONCILE_CHUNK])
+            em_falta = set(ids) - existentes
+            if em_falta:
+                existing = pd.read_parquet(self._partition_path(ano_mes))
+                self._write_partition(ano_mes, existing[~existing['id'].isin(em_falta)])
+                removidas += len(em_falta)
+        return removidas
+
+    def _export_catalogo(self):
+        """Exporta o catálogo de mesas (pequeno, reescrito a cada exportação)"""
+        from services.reports import reporting_engine
+
+        catalogo = reporting_engine.load_capacidade(source='db')
+        tmp_path = self.catalogo_path + '.tmp'
+        catalogo.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.catalogo_path)
+
+    def export(self, batch_size: Optional[int] = None) -> ResultadoManutencao:
+        """
+        Exporta de forma incremental as reservas novas e alteradas
+
+        Args:
+            batch_size: Número de reservas lidas por query
+
+        Returns:
+            ResultadoManutencao com o número de reservas exportadas
+        """
+        self._require_parquet()
+        batch_size = batch_size or Config.SNAPSHOT_BATCH_SIZE
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        inicio = time.perf_counter()
+        removidas = self._apply_removals(batch_size)
+        watermark = self.get_watermark()
+        total = 0
+        lotes = 0
+        while True:
+            batch = self._changed_rows(watermark, batch_size)
+            if batch.empty:
+                break
+            self._merge_batch(batch)
+
+            last = batch.iloc[-1]
+            watermark = (last['data_atualizacao'].to_pydatetime(), int(last['id']))
+            self._save_watermark(watermark)
+            total += len(batch)
+            lotes += 1
+            if len(batch) < batch_size:
+                break
+
+        self._export_catalogo()
+
+        resultado = ResultadoManutencao(
+            tarefa="snapshot",
+            linhas=total,
+            lotes=lotes,
+            duracao_s=time.perf_counter() - inicio,
+            executado_em=datetime.now()
+        )
+        logger.info(f"Exported {total} reservations to snapshot in {lotes} batches, "
+                    f"removed {removidas} ({resultado.duracao_s:.2f}s)")
+        return resultado
+
+    def load_reservas(self, data_inicio: date, data_fim: date,
+                      columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Lê reservas do snapshot, lendo apenas as partições e colunas necessárias
+
+        Args:
+            data_inicio: Primeiro dia do período
+            data_fim: Último dia do período (inclusive)
+            columns: Colunas a ler (None para todas)
+        """
+        self._require_parquet()
+        meses = pd.period_range(data_inicio, data_fim, freq='M').strftime('%Y-%m').tolist()
+        meses = [m for m in meses if m in set(self._existing_partitions())]
+        if not meses:
+            return pd.DataFrame(columns=columns or [])
+
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(columns + ['data_reserva']))
+
+        df = pd.read_parquet(
+            self.reservas_dir,
+            columns=read_columns,
+            filters=[(PARTITION_KEY, 'in', meses)]
+        )
+        inicio = pd.Timestamp(data_inicio)
+        fim = pd.Timestamp(data_fim + timedelta(days=1))
+        df = df[(df['data_reserva'] >= inicio) & (df['data_reserva'] < fim)]
+        df = df.drop(columns=[PARTITION_KEY], errors='ignore').reset_index(drop=True)
+        return df[columns] if columns is not None else df
+
+    def load_catalogo(self) -> pd.DataFrame:
+        """Lê o catálogo de mesas exportado com o snapshot"""
+        self._require_parquet()
+        if not os.path.exists(self.catalogo_path):
+            raise SnapshotError("Snapshot ainda não foi exportado")
+        return pd.read_parquet(self.catalogo_path)
+
+
+# Instância global do serviço de snapshot
+snapshot_service = SnapshotService()
@@ -0,0 +1,61 @@
+"""
+Configuração comum dos testes: cada teste usa uma base de dados SQLite nova
+"""
+
+from datetime import datetime, timedelta
+import pytest
+
+from config import Config
+from database.connection import db_manager
+from database.repositories import cliente_repo
+from models import Cliente
+from services import restaurante_service, ambiente_service, mesa_service
+from services.admission import admission_controller
+from services.cache import catalogo_cache
+
+
+def _fechar_base_dados():
+    if db_manager.Session is not None:
+        db_manager.Session.remove()
+    if db_manager.engine is not None:
+        db_manager.engine.dispose()
+    db_manager.engine = db_manager.session_factory = db_manager.Session = None
+    catalogo_cache.invalidar()
+
+
+@pytest.fixture
+def abrir_base_dados(monkeypatch):
+    """Função que (re)inicializa o db_manager na base de dados do URL dado"""
+    def abrir(url: str) -> bool:
+        _fechar_base_dados()
+        monkeypatch.setattr(Config, 'DATABASE_URL', url)
+        admission_controller.reset()
+        return db_manager.initialize()
+    return abrir
+
+
+@pytest.fixture(autouse=True)
+def base_dados(tmp_path, abrir_base_dados):
+    """Inicializa o db_manager numa base de dados temporária"""
+    assert abrir_base_dados(f"sqlite:///{tmp_path / 'testes.db'}")
+    yield db_manager
+    _fechar_base_dados()
+
+
+@pytest.fixture
+def dados():
+    """Restaurante com um ambiente, uma mesa de 4 lugares e um cliente"""
+    restaurante = restaurante_service.create_restaurante(
+        nome="Tasca de Teste", endereco="Rua dos Testes, 1 - Lisboa", telefone="213 456 789"
+    )
+    ambiente = ambiente_service.create_ambiente(nome="Salão", restaurante_id=restaurante.id)
+    mesa = mesa_service.create_mesa(numero="1", capacidade=4, ambiente_id=ambiente.id)
+    # Pelo repositório: a validação do email no serviço consulta o DNS
+    cliente = cliente_repo.create(Cliente(nome="Maria Teste", email="maria@example.com", telefone="912 345 678"))
+    data_reserva = (datetime.now() + timedelta(days=2)).replace(hour=20, minute=0, second=0, microsecond=0)
+    return {
+        'ambiente_id': ambiente.id,
+        'mesa_id': mesa.id,
+        'cliente_id': cliente.id,
+        'data_reserva': data_reserva.isoformat(timespec='minutes'),
+    }
@@ -0,0 +1,130 @@
+"""
+Testes da API HTTP com o TestClient (sem servidor)
+"""
+
+import pytest
+
+from api.app import create_app
+from api.testing import TestClient
+from services.admission import admission_controller, LimiteOperacao
+
+
+@pytest.fixture
+def client():
+    return TestClient(create_app(api_key=''))
+
+
+def _reserva(dados, **extra):
+    return {
+        'cliente_id': dados['cliente_id'],
+        'mesa_id': dados['mesa_id'],
+        'data_reserva': dados['data_reserva'],
+        'numero_pessoas': 2,
+        **extra,
+    }
+
+
+def test_criar_reserva(client, dados):
+    resposta = client.post("/reservas", _reserva(dados))
+
+    assert resposta.status == 201
+    assert resposta.json['mesa_id'] == dados['mesa_id']
+    assert resposta.json['status'] == 'confirmada'
+
+    obtida = client.get(f"/reservas/{resposta.json['id']}")
+    assert obtida.status == 200
+    assert obtida.json['id'] == resposta.json['id']
+
+
+def test_reserva_em_conflito(client, dados):
+    assert client.post("/reservas", _reserva(dados)).status == 201
+
+    resposta = client.post("/reservas", _reserva(dados))
+
+    assert resposta.status == 422
+    assert resposta.json['erro']
+
+
+def test_campo_obrigatorio_em_falta(client, dados):
+    corpo = _reserva(dados)
+    del corpo['mesa_id']
+
+    resposta = client.post("/reservas", corpo)
+
+    assert resposta.status == 400
+    assert 'mesa_id' in resposta.json['erro']
+
+
+def test_corpo_invalido(client):
+    resposta = client.request("POST", "/reservas", headers={'Content-Type': 'application/json'})
+
+    assert resposta.status == 400
+
+
+def test_recurso_inexistente(client, dados):
+    assert client.get("/nao-existe").status == 404
+    assert client.get("/reservas/999").status == 404
+    assert client.delete("/reservas/999").status == 404
+
+
+def test_metodo_nao_permitido(client):
+    assert client.delete("/restaurantes").status == 405
+
+
+def test_chave_api():
+    client = TestClient(create_app(api_key='segredo'))
+
+    assert client.get("/restaurantes").status == 401
+    assert client.get("/restaurantes", headers={'X-API-Key': 'errada'}).status == 401
+    assert client.get("/restaurantes", headers={'X-API-Key': 'segredo'}).status == 200
+    assert client.get("/health").status == 200
+
+
+def test_mesas_disponiveis(client, dados):
+    url = f"/ambientes/{dados['ambiente_id']}/mesas-disponiveis?data_reserva={dados['data_reserva']}&numero_pessoas=2"
+
+    livre = client.get(url)
+    client.post("/reservas", _reserva(dados))
+    ocupada = client.get(url)
+
+    assert livre.status == 200
+    assert [m['id'] for m in livre.json['mesas']] == [dados['mesa_id']]
+    assert ocupada.json['mesas'] == []
+
+
+def test_criar_reserva_repetida(client, dados):
+    cabecalhos = {'Idempotency-Key': 'pedido-1'}
+
+    primeira = client.post("/reservas", _reserva(dados), headers=cabecalhos)
+    repetida = client.post("/reservas", _reserva(dados), headers=cabecalhos)
+
+    assert primeira.status == 201
+    assert repetida.status == 201
+    assert repetida.json['id'] == primeira.json['id']
+
+
+def test_reserva_repetida_nao_gasta_a_quota(client, dados, monkeypatch):
+    monkeypatch.setitem(admission_controller.limites, 'reserva', LimiteOperacao(rajada=1, por_minuto=1))
+    monkeypatch.setattr(admission_controller, 'ativo', True)
+    cabecalhos = {'Idempotency-Key': 'pedido-1'}
+
+    primeira = client.post("/reservas", _reserva(dados), headers=cabecalhos)
+    repetidas = [client.post("/reservas", _reserva(dados), headers=cabecalhos) for _ in range(3)]
+    nova = client.post("/reservas", _reserva(dados, numero_pessoas=3), headers={'Idempotency-Key': 'pedido-2'})
+
+    assert primeira.status == 201
+    assert [r.status for r in repetidas] == [201] * 3
+    assert all(r.json['id'] == primeira.json['id'] for r in repetidas)
+    assert nova.status == 429
+
+
+def test_cancelar_reserva_repetido(client, dados):
+    reserva_id = client.post("/reservas", _reserva(dados)).json['id']
+    cabecalhos = {'Idempotency-Key': 'cancelar-1'}
+
+    primeira = client.delete(f"/reservas/{reserva_id}", headers=cabecalhos)
+    repetida = client.delete(f"/reservas/{reserva_id}", headers=cabecalhos)
+
+    assert primeira.status == 200
+    assert repetida.status == 200
+    assert client.get(f"/reservas/{reserva_id}").json['status'] == 'cancelada'
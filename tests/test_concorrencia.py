@@ -0,0 +1,125 @@
+"""
+Reservas simultâneas para a mesma mesa e horário (várias threads, a mesma base de dados)
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.repositories import reserva_repo
+from models import Reserva
+from services import mesa_service, reserva_service
+from services.admission import admission_controller
+from services.batch import PedidoReserva
+from utils.validators import ValidationError
+
+PEDIDOS = 10
+
+
+def _em_paralelo(funcao, argumentos):
+    """Executa funcao(argumento) em threads que arrancam ao mesmo tempo; devolve os resultados"""
+    barreira = threading.Barrier(len(argumentos))
+    resultados = [None] * len(argumentos)
+
+    def executar(i, argumento):
+        barreira.wait()
+        try:
+            resultados[i] = funcao(argumento)
+        except Exception as e:
+            resultados[i] = e
+
+    threads = [threading.Thread(target=executar, args=(i, a)) for i, a in enumerate(argumentos)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultados
+
+
+def _confirmadas(mesa_id, data_reserva):
+    return [
+        r for r in reserva_repo.get_by_slot(data_reserva.date(), status='confirmada')
+        if r.mesa_id == mesa_id and r.data_reserva == data_reserva
+    ]
+
+
+@pytest.fixture(autouse=True)
+def sem_controlo_de_admissao(monkeypatch):
+    # Todos os pedidos têm de chegar à base de dados
+    monkeypatch.setattr(admission_controller, 'ativo', False)
+
+
+@pytest.fixture
+def data_reserva(dados):
+    return datetime.fromisoformat(dados['data_reserva'])
+
+
+def test_mover_para_o_mesmo_horario(dados, data_reserva):
+    # Uma reserva por mesa, às 13:00; todas tentam mudar para a mesa de dados às 20:00
+    origem = data_reserva.replace(hour=13)
+    reserva_ids = []
+    for i in range(PEDIDOS):
+        mesa = mesa_service.create_mesa(numero=f"M{i}", capacidade=4, ambiente_id=dados['ambiente_id'])
+        reserva = reserva_repo.create(Reserva(
+            cliente_id=dados['cliente_id'], mesa_id=mesa.id, data_reserva=origem,
+            numero_pessoas=2, data_fim=origem + timedelta(minutes=90)
+        ))
+        reserva_ids.append(reserva.id)
+
+    _em_paralelo(lambda reserva_id: reserva_repo.move(
+        reserva_id, dados['mesa_id'], data_reserva, data_reserva + timedelta(minutes=90)
+    ), reserva_ids)
+
+    assert len(_confirmadas(dados['mesa_id'], data_reserva)) == 1
+
+
+def test_lotes_para_o_mesmo_horario(dados, data_reserva):
+    pedido = PedidoReserva(mesa_id=dados['mesa_id'], data_reserva=data_reserva, numero_pessoas=2)
+
+    resultados = _em_paralelo(
+        lambda _: reserva_service.create_batch(dados['cliente_id'], [pedido]), range(PEDIDOS)
+    )
+
+    assert len(_confirmadas(dados['mesa_id'], data_reserva)) == 1
+    assert sum(1 for r in resultados if isinstance(r, list) and r) == 1
+
+
+def test_conflito_de_lote_indicado_uma_vez(dados, data_reserva):
+    # Reservas curtas seguidas na mesma mesa, todas sobrepostas a um pedido de grupo longo
+    for minutos in (0, 30, 60):
+        inicio = data_reserva + timedelta(minutes=minutos)
+        reserva_repo.create(Reserva(
+            cliente_id=dados['cliente_id'], mesa_id=dados['mesa_id'], data_reserva=inicio,
+            numero_pessoas=2, data_fim=inicio + timedelta(minutes=30)
+        ))
+    pedido = Reserva(
+        cliente_id=dados['cliente_id'], mesa_id=dados['mesa_id'], data_reserva=data_reserva,
+        numero_pessoas=2, data_fim=data_reserva + timedelta(minutes=120)
+    )
+
+    assert [i for i, _ in reserva_repo.get_batch_conflicts([pedido])] == [0]
+
+
+def test_reservas_assincronas_para_o_mesmo_horario(dados, data_reserva):
+    from database.async_connection import async_db_manager
+    from services.async_services import async_reserva_service
+
+    async def reservar():
+        try:
+            return await async_reserva_service.create_reserva(dados['cliente_id'], dados['mesa_id'], data_reserva, 2)
+        except ValidationError:
+            return None
+
+    async def executar():
+        assert await async_db_manager.initialize()
+        try:
+            return await asyncio.gather(*(reservar() for _ in range(20)))
+        finally:
+            await async_db_manager.dispose()
+
+    criadas = [r for r in asyncio.run(executar()) if r is not None]
+
+    assert len(criadas) == 1
+    assert len(_confirmadas(dados['mesa_id'], data_reserva)) == 1
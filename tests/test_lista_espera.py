@@ -0,0 +1,46 @@
+"""
+Promoção da lista de espera quando uma reserva é cancelada
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.repositories import reserva_repo, lista_espera_repo
+from models import Reserva
+from services import lista_espera_service, reserva_service
+from services.holds import bloqueio_service
+
+
+@pytest.fixture
+def cancelamento(dados):
+    """Reserva confirmada na mesa de dados e um pedido à espera do mesmo horário"""
+    data_reserva = datetime.fromisoformat(dados['data_reserva'])
+    reserva = reserva_repo.create(Reserva(
+        cliente_id=dados['cliente_id'], mesa_id=dados['mesa_id'],
+        data_reserva=data_reserva, numero_pessoas=2, data_fim=data_reserva + timedelta(hours=2)
+    ))
+    pedido = lista_espera_service.inscrever(dados['cliente_id'], dados['ambiente_id'], data_reserva, 2)
+    return reserva, pedido
+
+
+def test_mesa_libertada_promove_o_pedido(cancelamento):
+    reserva, pedido = cancelamento
+
+    assert reserva_service.cancel_reserva(reserva.id)
+
+    promovido = lista_espera_repo.get_by_id(pedido.id)
+    assert promovido.status == 'promovida'
+    assert reserva_repo.get_by_id(promovido.reserva_id).mesa_id == reserva.mesa_id
+
+
+def test_mesa_bloqueada_nao_e_promovida(cancelamento):
+    reserva, pedido = cancelamento
+    token = "sessao-de-outro-cliente"
+    assert bloqueio_service.bloquear([reserva.mesa_id], reserva.data_reserva, reserva.data_fim, token)
+    try:
+        assert reserva_service.cancel_reserva(reserva.id)
+    finally:
+        bloqueio_service.libertar(token)
+
+    assert lista_espera_repo.get_by_id(pedido.id).status == 'ativa'
@@ -0,0 +1,108 @@
+"""
+Migração de uma base de dados criada com o esquema original (antes das colunas novas)
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from config import Config
+from services import mesa_service, reserva_service
+from models import codificar_dia, codificar_slot
+
+# Esquema das tabelas antes de data_fim, data_atualizacao, dia_reserva, slot_reserva,
+# combinavel e duracao_reserva_minutos
+ESQUEMA_ORIGINAL = """
+CREATE TABLE clientes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, nome VARCHAR(100) NOT NULL, email VARCHAR(100) NOT NULL UNIQUE,
+    telefone VARCHAR(20) NOT NULL, data_cadastro DATETIME, ativo BOOLEAN
+);
+CREATE TABLE restaurantes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, nome VARCHAR(100) NOT NULL, endereco TEXT NOT NULL,
+    telefone VARCHAR(20) NOT NULL, email VARCHAR(100), descricao TEXT, ativo BOOLEAN, data_cadastro DATETIME
+);
+CREATE TABLE ambientes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, nome VARCHAR(50) NOT NULL, descricao TEXT,
+    restaurante_id INTEGER NOT NULL REFERENCES restaurantes (id), ativo BOOLEAN
+);
+CREATE TABLE mesas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, numero VARCHAR(10) NOT NULL, capacidade INTEGER NOT NULL,
+    ambiente_id INTEGER NOT NULL REFERENCES ambientes (id), ativo BOOLEAN, observacoes TEXT
+);
+CREATE TABLE reservas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, cliente_id INTEGER NOT NULL REFERENCES clientes (id),
+    mesa_id INTEGER NOT NULL REFERENCES mesas (id), data_reserva DATETIME NOT NULL,
+    numero_pessoas INTEGER NOT NULL, observacoes TEXT, status VARCHAR(20), data_criacao DATETIME
+);
+"""
+
+RESERVAS = 25
+
+
+def _formatar(valor: datetime) -> str:
+    return valor.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _criar_base_original(caminho, data_reserva: datetime, data_criacao: datetime):
+    conn = sqlite3.connect(caminho)
+    conn.executescript(ESQUEMA_ORIGINAL)
+    conn.execute("INSERT INTO clientes VALUES (1, 'Maria Teste', 'maria@example.com', '912345678', NULL, 1)")
+    conn.execute("INSERT INTO restaurantes VALUES (1, 'Tasca', 'Rua A, 1', '213456789', NULL, NULL, 1, NULL)")
+    conn.execute("INSERT INTO ambientes VALUES (1, 'Salão', NULL, 1, 1)")
+    conn.executemany("INSERT INTO mesas VALUES (?, ?, 4, 1, 1, NULL)", [(i, str(i)) for i in range(1, RESERVAS + 1)])
+    conn.executemany(
+        "INSERT INTO reservas VALUES (?, 1, ?, ?, 2, NULL, 'confirmada', ?)",
+        [(i, i, _formatar(data_reserva), _formatar(data_criacao)) for i in range(1, RESERVAS + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrar_base_original(tmp_path, abrir_base_dados, monkeypatch):
+    # Lotes pequenos para o preenchimento passar por vários
+    monkeypatch.setattr('database.connection._LOTE_BACKFILL', 10)
+    data_reserva = (datetime.now() + timedelta(days=3)).replace(hour=20, minute=0, second=0, microsecond=0)
+    data_criacao = datetime(2025, 1, 1, 10, 30)
+    caminho = tmp_path / 'original.db'
+    _criar_base_original(caminho, data_reserva, data_criacao)
+
+    assert abrir_base_dados(f"sqlite:///{caminho}")
+
+    reservas = reserva_service.get_reservas_by_data(data_reserva)
+    assert len(reservas) == RESERVAS
+    for reserva in reservas:
+        assert reserva.data_fim == data_reserva + timedelta(minutes=Config.RESERVATION_DURATION_MINUTES)
+        assert reserva.dia_reserva == codificar_dia(data_reserva)
+        assert reserva.slot_reserva == codificar_slot(data_reserva)
+        assert reserva.data_atualizacao == data_criacao
+
+    # As reservas antigas ocupam as mesas
+    assert mesa_service.get_available_tables(1, data_reserva, 2) == []
+
+
+def test_migracao_repetida_nao_altera_dados(tmp_path, abrir_base_dados):
+    data_reserva = (datetime.now() + timedelta(days=3)).replace(hour=20, minute=0, second=0, microsecond=0)
+    caminho = tmp_path / 'original.db'
+    _criar_base_original(caminho, data_reserva, datetime(2025, 1, 1, 10, 30))
+    assert abrir_base_dados(f"sqlite:///{caminho}")
+    antes = [r.to_dict() for r in reserva_service.get_reservas_by_data(data_reserva)]
+
+    assert abrir_base_dados(f"sqlite:///{caminho}")
+
+    assert [r.to_dict() for r in reserva_service.get_reservas_by_data(data_reserva)] == antes
+
+
+def test_migracao_preenche_todas_as_reservas(tmp_path, abrir_base_dados):
+    data_reserva = (datetime.now() + timedelta(days=3)).replace(hour=20, minute=0, second=0, microsecond=0)
+    caminho = tmp_path / 'original.db'
+    _criar_base_original(caminho, data_reserva, datetime(2025, 1, 1, 10, 30))
+
+    assert abrir_base_dados(f"sqlite:///{caminho}")
+
+    conn = sqlite3.connect(caminho)
+    em_falta = conn.execute(
+        "SELECT COUNT(*) FROM reservas WHERE data_fim IS NULL OR dia_reserva IS NULL OR slot_reserva IS NULL"
+    ).fetchone()[0]
+    conn.close()
+    assert em_falta == 0
+    slot = codificar_slot(data_reserva)
+    assert len(reserva_service.repository.get_by_slot(data_reserva.date(), slot, 'confirmada')) == RESERVAS
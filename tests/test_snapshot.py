@@ -0,0 +1,67 @@
+"""
+Snapshot analítico: reservas apagadas ou arquivadas saem dos ficheiros Parquet
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from database.repositories import reserva_repo, reserva_arquivo_repo, reserva_removida_repo
+from models import Reserva
+from services.snapshot import SnapshotService
+
+
+def _criar(dados, data_reserva, status='confirmada'):
+    reserva = reserva_repo.create(Reserva(
+        cliente_id=dados['cliente_id'], mesa_id=dados['mesa_id'], data_reserva=data_reserva,
+        numero_pessoas=2, data_fim=data_reserva + timedelta(minutes=90)
+    ))
+    if status != 'confirmada':
+        reserva_repo.update(reserva.id, status=status)
+    return reserva.id
+
+
+def _ids(snapshot, inicio, fim):
+    return set(snapshot.load_reservas(inicio.date(), fim.date(), columns=['id'])['id'])
+
+
+def test_remocoes_saem_do_snapshot(tmp_path, dados):
+    snapshot = SnapshotService(str(tmp_path / 'snapshot'))
+    antiga = datetime(2024, 3, 10, 20, 0)
+    futura = datetime.fromisoformat(dados['data_reserva'])
+    apagada = _criar(dados, futura)
+    mantida = _criar(dados, futura + timedelta(hours=2))
+    arquivada = _criar(dados, antiga, status='finalizada')
+    snapshot.export()
+    assert _ids(snapshot, antiga, futura) == {apagada, mantida, arquivada}
+
+    assert reserva_repo.delete(apagada)
+    assert reserva_arquivo_repo.archive_batch(datetime(2025, 1, 1), 100) == 1
+    snapshot.export()
+
+    assert _ids(snapshot, antiga, futura) == {mantida}
+    # As remoções aplicadas são apagadas
+    assert reserva_removida_repo.get_after(0, 10) == []
+
+
+def test_snapshot_anterior_as_remocoes_e_reconciliado(tmp_path, dados):
+    snapshot = SnapshotService(str(tmp_path / 'snapshot'))
+    futura = datetime.fromisoformat(dados['data_reserva'])
+    apagada = _criar(dados, futura)
+    mantida = _criar(dados, futura + timedelta(hours=2))
+    snapshot.export()
+
+    # Snapshot exportado antes de existir o registo de remoções
+    estado = snapshot._read_state()
+    del estado['removida_id']
+    with open(snapshot.watermark_path, 'w') as f:
+        json.dump(estado, f)
+    reserva_repo.delete(apagada)
+    reserva_removida_repo.purge(reserva_removida_repo.get_ultimo_id())
+
+    snapshot.export()
+
+    assert _ids(snapshot, futura, futura) == {mantida}
@@ -0,0 +1,102 @@
+"""
+Arranque de vários processos da aplicação sobre a mesma base de dados SQLite
+
+Os processos partilham o ficheiro da base de dados (em modo WAL); o estado
+que tem de ser comum a todos passa a estar na base de dados:
+- bloqueios de mesas (HOLD_BACKEND=database);
+- versão do catálogo, que invalida as caches locais (services.cache).
+As tarefas de manutenção correm apenas no primeiro processo.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+from urllib.error import URLError
+from urllib.request import urlopen
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Diretório do projeto (onde estão app.py e os pacotes)
+DIRETORIO_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIPOS_WORKER = ('api', 'streamlit')
+
+
+class ClusterError(Exception):
+    """Configuração de processos impossível neste sistema"""
+    pass
+
+
+def ambiente_worker(indice: int) -> Dict[str, str]:
+    """Variáveis de ambiente de cada processo"""
+    env = os.environ.copy()
+    env['HOLD_BACKEND'] = 'database'
+    if indice > 0:
+        env['BACKGROUND_JOBS_ENABLED'] = 'False'
+    return env
+
+
+def comando_worker(tipo: str, host: str, porta: int) -> List[str]:
+    """Linha de comando de um processo da API ou do Streamlit"""
+    if tipo == 'api':
+        return [sys.executable, '-m', 'api.server', '--host', host, '--port', str(porta), '--reuse-port']
+    return [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.address', host,
+            '--server.port', str(porta), '--server.headless', 'true']
+
+
+def iniciar_workers(tipo: str, workers: int, host: str, porta: int) -> List[subprocess.Popen]:
+    """
+    Arranca os processos
+
+    Na API todos escutam a mesma porta (o sistema operativo distribui as
+    ligações); no Streamlit cada processo usa a sua porta (porta, porta+1, ...)
+    e a distribuição fica a cargo de um proxy à frente.
+    """
+    if tipo not in TIPOS_WORKER:
+        raise ClusterError(f"Tipo de processo desconhecido: {tipo}")
+    if tipo == 'api' and workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+        raise ClusterError("Vários processos da API na mesma porta requerem SO_REUSEPORT (Linux/BSD)")
+    if Config.HOLD_BACKEND != 'database':
+        logger.info("Using HOLD_BACKEND=database so table holds are shared between processes")
+
+    processos = []
+    for indice in range(workers):
+        porta_worker = porta if tipo == 'api' else porta + indice
+        processos.append(subprocess.Popen(
+            comando_worker(tipo, host, porta_worker), cwd=DIRETORIO_PROJETO, env=ambiente_worker(indice)
+        ))
+    logger.info(f"Started {workers} {tipo} worker(s)")
+    return processos
+
+
+def aguardar_api(url: str, timeout_s: float = 30) -> bool:
+    """Espera até /health responder"""
+    limite = time.monotonic() + timeout_s
+    while time.monotonic() < limite:
+        try:
+            with urlopen(url.rstrip('/') + '/health', timeout=2) as resposta:
+                if json.loads(resposta.read()).get('status') == 'ok':
+                    return True
+        except (URLError, OSError, ValueError):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def parar_workers(processos: List[subprocess.Popen], timeout_s: float = 10):
+    """Termina os processos (SIGTERM e, se necessário, SIGKILL)"""
+    for processo in processos:
+        if processo.poll() is None:
+            processo.terminate()
+    for processo in processos:
+        try:
+            processo.wait(timeout=timeout_s)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            processo.wait()
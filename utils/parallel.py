@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from config import Config
+from utils.performance import perf_monitor
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultadoTarefa:
+    """Resultado de uma tarefa do ParallelLoader"""
+    nome: str
+    valor: Any = None
+    duracao_ms: float = 0.0
+    estado: str = 'ok'  # 'ok', 'timeout' ou 'erro'
+    erro: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.estado == 'ok'
+
+
+@dataclass
+class _Tarefa:
+    nome: str
+    func: Callable
+    args: tuple
+    kwargs: dict
+    timeout_s: float
+
+
+class ParallelLoader:
+    """
+    Executa consultas independentes em paralelo num conjunto limitado de threads
+
+    Cada tarefa tem o seu limite de tempo: as que não terminam a tempo (ou
+    falham) ficam marcadas no resultado e as restantes são devolvidas
+    normalmente, para que a página possa ser desenhada parcialmente. A
+    latência de cada tarefa é registada no perf_monitor como "<prefixo>.<nome>".
+    """
+
+    def __init__(self, prefixo: str, max_workers: int = None, timeout_s: float = None):
+        self.prefixo = prefixo
+        self.max_workers = max_workers or Config.DASHBOARD_WORKERS
+        self.timeout_s = timeout_s if timeout_s is not None else Config.DASHBOARD_TASK_TIMEOUT_SECONDS
+        self._tarefas: List[_Tarefa] = []
+
+    def add(self, nome: str, func: Callable, *args, timeout_s: float = None, **kwargs) -> 'ParallelLoader':
+        """Adiciona uma tarefa (timeout_s sobrepõe-se ao limite por omissão)"""
+        self._tarefas.append(_Tarefa(nome, func, args, kwargs,
+                                     timeout_s if timeout_s is not None else self.timeout_s))
+        return self
+
+    def run(self) -> Dict[str, ResultadoTarefa]:
+        """Executa as tarefas e devolve os resultados por nome, pela ordem em que foram adicionadas"""
+        rerun_id = perf_monitor.current_rerun_id()
+        resultados: Dict[str, ResultadoTarefa] = {}
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(self._tarefas)) or 1,
+                                      thread_name_prefix=self.prefixo)
+
+        def executar(tarefa: _Tarefa) -> ResultadoTarefa:
+            t0 = time.perf_counter()
+            try:
+                valor = perf_monitor.measure_in_rerun(rerun_id, f"{self.prefixo}.{tarefa.nome}",
+                                                      tarefa.func, *tarefa.args, **tarefa.kwargs)
+                return ResultadoTarefa(tarefa.nome, valor, (time.perf_counter() - t0) * 1000)
+            except Exception as e:
+                logger.error(f"Error in task {self.prefixo}.{tarefa.nome}: {e}")
+                return ResultadoTarefa(tarefa.nome, duracao_ms=(time.perf_counter() - t0) * 1000,
+                                       estado='erro', erro=str(e))
+
+        inicio = time.perf_counter()
+        futuros = [(tarefa, executor.submit(executar, tarefa)) for tarefa in self._tarefas]
+        try:
+            for tarefa, futuro in futuros:
+                restante = max(0.0, tarefa.timeout_s - (time.perf_counter() - inicio))
+                try:
+                    resultados[tarefa.nome] = futuro.result(timeout=restante)
+                except FutureTimeoutError:
+                    futuro.cancel()
+                    logger.warning(f"Task {self.prefixo}.{tarefa.nome} timed out after {tarefa.timeout_s}s")
+                    resultados[tarefa.nome] = ResultadoTarefa(
+                        tarefa.nome, duracao_ms=(time.perf_counter() - inicio) * 1000, estado='timeout'
+                    )
+        finally:
+            # Não esperar pelas tarefas atrasadas: terminam em segundo plano
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return resultados
@@ -0,0 +1,152 @@
+import functools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Deque, List, Optional
+from sqlalchemy import event
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_kb() -> Optional[float]:
+    """
+    Devolve a memória residente atual do processo em KB (None se indisponível)
+
+    Só o Linux expõe a memória residente atual sem dependências (/proc);
+    o ru_maxrss do resource é o pico do processo e não serve para deltas.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+
+@dataclass
+class TimingRecord:
+    """Medição de uma secção de página ou operação de serviço"""
+    nome: str
+    inicio: datetime
+    duracao_ms: float
+    queries: int
+    memoria_kb: Optional[float]  # None se a memória residente não estiver disponível
+    rerun_id: str
+    raiz: bool = False
+    erro: bool = False
+
+
+class PerformanceMonitor:
+    """Regista tempos, queries e memória num buffer circular em memória"""
+
+    def __init__(self, capacidade: int = Config.PERF_BUFFER_SIZE):
+        self.enabled = Config.PERF_MONITOR_ENABLED
+        self._registos: Deque[TimingRecord] = deque(maxlen=capacidade)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def instrument_engine(self, engine):
+        """Conta as queries executadas por thread no engine indicado"""
+        event.listen(engine, "before_cursor_execute", self._on_query)
+
+    def _on_query(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.queries = getattr(self._local, 'queries', 0) + 1
+
+    def query_count(self) -> int:
+        """Número de queries executadas na thread atual"""
+        return getattr(self._local, 'queries', 0)
+
+    def record(self, registo: TimingRecord):
+        """Adiciona uma medição ao buffer"""
+        with self._lock:
+            self._registos.append(registo)
+
+    def get_records(self) -> List[TimingRecord]:
+        """Retorna uma cópia das medições existentes (mais antigas primeiro)"""
+        with self._lock:
+            return list(self._registos)
+
+    def get_reruns(self, limit: int = 20) -> List[TimingRecord]:
+        """Retorna as medições raiz mais recentes (uma por rerun)"""
+        reruns = [r for r in self.get_records() if r.raiz]
+        return reruns[-limit:][::-1]
+
+    def clear(self):
+        """Limpa o buffer de medições"""
+        with self._lock:
+            self._registos.clear()
+
+    def current_rerun_id(self) -> Optional[str]:
+        """Identificador do rerun em curso na thread atual"""
+        return getattr(self._local, 'rerun_id', None)
+
+    def measure_in_rerun(self, rerun_id: Optional[str], nome: str, func: Callable, *args, **kwargs):
+        """measure() numa thread auxiliar, associando a medição ao rerun que a lançou"""
+        anterior = self.current_rerun_id()
+        self._local.rerun_id = rerun_id
+        try:
+            return self.measure(nome, func, *args, **kwargs)
+        finally:
+            self._local.rerun_id = anterior
+
+    def measure(self, nome: str, func: Callable, *args, **kwargs):
+        """Executa func registando tempo, queries e variação de memória"""
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        rerun_id = getattr(self._local, 'rerun_id', None)
+        raiz = rerun_id is None
+        if raiz:
+            rerun_id = uuid.uuid4().hex[:8]
+            self._local.rerun_id = rerun_id
+
+        inicio = datetime.now()
+        queries_inicio = self.query_count()
+        memoria_inicio = _current_rss_kb()
+        t0 = time.perf_counter()
+        erro = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            erro = True
+            raise
+        finally:
+            memoria_fim = _current_rss_kb()
+            memoria_kb = None if memoria_inicio is None or memoria_fim is None else memoria_fim - memoria_inicio
+            self.record(TimingRecord(
+                nome=nome,
+                inicio=inicio,
+                duracao_ms=(time.perf_counter() - t0) * 1000,
+                queries=self.query_count() - queries_inicio,
+                memoria_kb=memoria_kb,
+                rerun_id=rerun_id,
+                raiz=raiz,
+                erro=erro
+            ))
+            if raiz:
+                self._local.rerun_id = None
+
+
+def timed(nome: str):
+    """
+    Decorador que mede uma secção de página ou método de serviço
+
+    Args:
+        nome: Identificador da secção (ex: "admin.dashboard")
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return perf_monitor.measure(nome, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Instância global do monitor
+perf_monitor = PerformanceMonitor()
@@ -0,0 +1,175 @@
+"""
+Estado de sessão compacto do fluxo de reserva e contabilização da memória por sessão
+
+Cada cliente ligado tem o seu st.session_state no processo do Streamlit.
+O fluxo de nova reserva guarda apenas um EstadoReserva (ids, dia/horário
+codificados e contadores); os objetos do catálogo (mesas, ambientes,
+restaurantes) são lidos da cache partilhada quando são apresentados.
+"""
+
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from models import codificar_dia, codificar_slot, descodificar_dia
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EstadoReserva:
+    """Pedido em curso no separador de nova reserva (só ids e valores simples)"""
+    ambiente_id: int = 0
+    dia: int = 0  # dias desde 1970-01-01 (models.codificar_dia)
+    slot: int = -1  # índice em Config.TIME_SLOTS; -1 sem pedido
+    numero_pessoas: int = 0
+    mesas_disponiveis: Tuple[int, ...] = ()
+    mesas_combinadas: Tuple[int, ...] = ()
+    mesa_selecionada: int = 0
+    bloqueio_expira_em: float = 0.0  # timestamp; 0 sem bloqueio
+    alternativas: bool = False
+
+    @property
+    def ativo(self) -> bool:
+        return self.slot >= 0
+
+    @property
+    def data_hora(self) -> Optional[datetime]:
+        if not self.ativo:
+            return None
+        return datetime.combine(descodificar_dia(self.dia),
+                                datetime.strptime(Config.TIME_SLOTS[self.slot], "%H:%M").time())
+
+    @property
+    def expira_em(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.bloqueio_expira_em) if self.bloqueio_expira_em else None
+
+    def novo_pedido(self, ambiente_id: int, data_hora: datetime, numero_pessoas: int):
+        """Começa um pedido novo (descarta resultados, seleção e bloqueio anteriores)"""
+        self.limpar()
+        self.ambiente_id = ambiente_id
+        self.dia = codificar_dia(data_hora)
+        slot = codificar_slot(data_hora)
+        if slot is None:
+            raise ValueError(f"Horário fora da grelha: {data_hora:%H:%M}")
+        self.slot = slot
+        self.numero_pessoas = numero_pessoas
+
+    def bloqueio(self, expira_em: Optional[datetime]):
+        self.bloqueio_expira_em = expira_em.timestamp() if expira_em else 0.0
+
+    def corresponde(self, ambiente_id: int, dia) -> bool:
+        """True se o pedido em curso é do ambiente e dia indicados"""
+        return self.ambiente_id == ambiente_id and self.dia == codificar_dia(dia)
+
+    def limpar(self):
+        for campo in fields(self):
+            setattr(self, campo.name, campo.default)
+
+
+# Tipos percorridos na contabilização; o resto conta só pelo tamanho próprio
+_NAO_PERCORRER = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+
+def tamanho_profundo(obj: Any, vistos: Optional[set] = None) -> int:
+    """
+    Bytes ocupados por um objeto e pelos objetos que referencia (aproximação com sys.getsizeof)
+
+    Objetos já contados (partilhados) contam uma vez. Classes, módulos e
+    funções não são percorridos; nos objetos do SQLAlchemy (ex: o estado
+    de instâncias ORM) conta-se apenas o próprio objeto.
+    """
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos or isinstance(obj, _NAO_PERCORRER):
+        return 0
+    vistos.add(id(obj))
+    tamanho = sys.getsizeof(obj, 0)
+
+    if type(obj).__module__.startswith('sqlalchemy'):
+        return tamanho
+    if isinstance(obj, (str, bytes, int, float, bool, datetime)) or obj is None:
+        return tamanho
+    if isinstance(obj, Mapping):
+        return tamanho + sum(tamanho_profundo(k, vistos) + tamanho_profundo(v, vistos) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return tamanho + sum(tamanho_profundo(item, vistos) for item in obj)
+    if hasattr(obj, '__dict__'):
+        tamanho += tamanho_profundo(vars(obj), vistos)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            tamanho += tamanho_profundo(getattr(obj, slot), vistos)
+    return tamanho
+
+
+@dataclass
+class MedicaoSessao:
+    """Tamanho do estado de uma sessão na última execução da página"""
+    sessao: str
+    bytes_total: int
+    por_chave: Dict[str, int]
+    medido_em: float
+
+
+class MedidorSessoes:
+    """
+    Contabiliza o tamanho do session_state de cada sessão ligada
+
+    Cada sessão regista o seu tamanho no fim da página; as sessões sem
+    medições há mais de expiracao_s deixam de contar.
+    """
+
+    def __init__(self, limite_kb: float = Config.SESSION_STATE_WARN_KB,
+                 max_sessoes: int = 10000, expiracao_s: float = 3600):
+        self.limite_kb = limite_kb
+        self.max_sessoes = max_sessoes
+        self.expiracao_s = expiracao_s
+        self._medicoes: 'OrderedDict[str, MedicaoSessao]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def registar(self, sessao: str, estado: Mapping[str, Any]) -> MedicaoSessao:
+        """Mede o estado de uma sessão (objetos partilhados entre chaves contam uma vez)"""
+        vistos = set()
+        por_chave = {str(chave): tamanho_profundo(valor, vistos) for chave, valor in estado.items()}
+        medicao = MedicaoSessao(sessao, sum(por_chave.values()), por_chave, time.time())
+
+        if self.limite_kb and medicao.bytes_total > self.limite_kb * 1024:
+            maior = max(por_chave, key=por_chave.get)
+            logger.warning(f"Session state of {medicao.bytes_total / 1024:.1f} KB "
+                           f"(largest key '{maior}': {por_chave[maior] / 1024:.1f} KB)")
+
+        with self._lock:
+            self._medicoes[sessao] = medicao
+            self._medicoes.move_to_end(sessao)
+            while len(self._medicoes) > self.max_sessoes:
+                self._medicoes.popitem(last=False)
+        return medicao
+
+    def get_sessoes(self) -> List[MedicaoSessao]:
+        """Medições das sessões ativas (maiores primeiro)"""
+        limite = time.time() - self.expiracao_s
+        with self._lock:
+            for sessao in [s for s, m in self._medicoes.items() if m.medido_em < limite]:
+                del self._medicoes[sessao]
+            medicoes = list(self._medicoes.values())
+        return sorted(medicoes, key=lambda m: m.bytes_total, reverse=True)
+
+    def get_resumo(self) -> Dict[str, float]:
+        """Sessões ativas e tamanho total, médio e máximo do estado (KB)"""
+        medicoes = self.get_sessoes()
+        total = sum(m.bytes_total for m in medicoes) / 1024
+        return {
+            'sessoes': len(medicoes),
+            'total_kb': total,
+            'media_kb': total / len(medicoes) if medicoes else 0.0,
+            'maximo_kb': medicoes[0].bytes_total / 1024 if medicoes else 0.0,
+        }
+
+
+# Instância global do medidor
+medidor_sessoes = MedidorSessoes()
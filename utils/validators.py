@@ -108,6 +108,27 @@ class DataValidator:
         
         return True, ""
     
+    @staticmethod
+    def validate_duration(duration: int, min_duration: int = 15, max_duration: int = 360) -> Tuple[bool, str]:
+        """
+        Valida duração de reserva em minutos
+        
+        Args:
+            duration: Duração em minutos
+            min_duration: Duração mínima
+            max_duration: Duração máxima
+            
+        Returns:
+            Tuple[bool, str]: (is_valid, message)
+        """
+        if not isinstance(duration, int) or duration < min_duration:
+            return False, f"Duração deve ser pelo menos {min_duration} minutos"
+        
+        if duration > max_duration:
+            return False, f"Duração não pode exceder {max_duration} minutos"
+        
+        return True, ""
+    
     @staticmethod
     def validate_reservation_date(reservation_date: datetime) -> Tuple[bool, str]:
         """